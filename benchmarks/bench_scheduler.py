@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Measures the scheduler's own overhead (folder index, pre-flight/dedup checks,
+state store, slot planning and the upload loop) on synthetic videos, with the
+in-process FakeUploader standing in for YouTube Studio. No browser, account or
+network is needed.
+
+    python3 benchmarks/bench_scheduler.py --videos 5000 --uploads 1000 --failure-rate 0.1
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+def box(box_type, payload):
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+def synthetic_mp4(duration, width, height, payload):
+    """Smallest MP4 that video_probe accepts: ftyp, moov (mvhd + one video trak) and an mdat."""
+    mvhd = box(b'mvhd', bytes(4) + struct.pack('>IIII', 0, 0, 1000, int(duration * 1000)) + bytes(80))
+    identity = struct.pack('>9i', 0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000)
+    tkhd = box(b'tkhd', bytes(40) + identity + struct.pack('>II', width << 16, height << 16))
+    hdlr = box(b'hdlr', bytes(8) + b'vide' + bytes(13))
+    stsd = box(b'stsd', bytes(4) + struct.pack('>I', 1) + struct.pack('>I', 16) + b'avc1' + bytes(8))
+    mdia = box(b'mdia', hdlr + box(b'minf', box(b'stbl', stsd)))
+    moov = box(b'moov', mvhd + box(b'trak', tkhd + mdia))
+    return box(b'ftyp', b'isom' + bytes(4)) + moov + box(b'mdat', payload)
+
+
+def make_videos(folder, count, payload_size, rng):
+    """Writes `count` numbered Shorts-shaped videos; a few are landscape or too long to exercise pre-flight rejection."""
+    os.makedirs(folder, exist_ok=True)
+    for number in range(4, count + 4):
+        width, height, duration = 1080, 1920, rng.uniform(10, 59)
+        if number % 97 == 0:
+            width, height = height, width
+        elif number % 89 == 0:
+            duration = 600
+        with open(os.path.join(folder, f"{number}.mp4"), 'wb') as f:
+            f.write(synthetic_mp4(duration, width, height, rng.randbytes(payload_size)))
+
+
+def timed(results, name, operations, fn):
+    start = time.perf_counter()
+    value = fn()
+    elapsed = time.perf_counter() - start
+    results.append({'benchmark': name, 'seconds': round(elapsed, 4), 'operations': operations,
+                    'ops_per_second': round(operations / elapsed, 1) if elapsed > 0 else None})
+    return value
+
+
+def configure_main(main, workdir, args):
+    main.video_folder_path = os.path.join(workdir, 'videos')
+    main.titles_file_path = os.path.join(workdir, 'titles.txt')
+    main.state_db_file = os.path.join(workdir, 'bench_state.db')
+    main.uploaded_log_file = main.channel_counter_file = main.daily_upload_counter_file = None
+    main.METRICS_JSONL_FILE = os.path.join(workdir, 'upload_metrics.jsonl')
+    main.METRICS_TEXTFILE_DIR = workdir
+    main.UPLOAD_TIMES_PER_DAY = args.uploads
+    main.UPLOAD_WINDOW_START_HOUR = 0
+    main.UPLOAD_WINDOW_END_HOUR = 23
+    main.MIN_UPLOAD_GAP_SECONDS = 0
+    main.PLAN_DAYS_AHEAD = 1
+    main.UPLOADER_BACKEND = 'fake'
+    latency = {stage: (0, args.stage_latency) for stage in ('file_transfer', 'publish')} if args.stage_latency else {}
+    main.FAKE_UPLOADER_OPTIONS = {
+        'stage_latency': latency, 'failure_rate': args.failure_rate, 'rng': random.Random(args.seed),
+    }
+    # Email delivery is out of scope here; count what would have been queued instead.
+    sent = []
+    main.send_email_notification = lambda subject, body, digest_key=None: sent.append(subject)
+    return sent
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix='shorts-bench-', dir=args.workdir)
+    results = []
+    try:
+        timed(results, 'generate_videos', args.videos,
+              lambda: make_videos(os.path.join(workdir, 'videos'), args.videos, args.payload_size, rng))
+        with open(os.path.join(workdir, 'titles.txt'), 'w') as f:
+            f.write('\n'.join(f"Synthetic title {i}" for i in range(200)))
+
+        # main.py resolves its state files relative to the working directory, so import it from inside the workdir.
+        os.chdir(workdir)
+        import main
+        from logging_setup import setup_console_logging
+        # Injected failures are logged as errors; keep the report readable unless asked.
+        setup_console_logging(logging.INFO if args.verbose else logging.CRITICAL)
+        sent = configure_main(main, workdir, args)
+
+        from slot_scheduler import UploadScheduler
+        from video_index import VideoIndex
+
+        store = main.get_state_store()
+        folder = main.video_folder_path
+
+        cold_index = VideoIndex(folder, store)
+        timed(results, 'folder_index_cold_scan', args.videos, cold_index.load)
+        timed(results, 'folder_index_warm_load', args.videos, VideoIndex(folder, store).load)
+        timed(results, 'folder_index_rescan', args.videos, cold_index.rescan)
+
+        entries = list(main.get_video_index().entries)
+        timed(results, 'eligibility_cold', len(entries), lambda: sum(map(main.is_eligible_for_upload, entries)))
+        eligible = timed(results, 'eligibility_cached', len(entries), lambda: sum(map(main.is_eligible_for_upload, entries)))
+
+        lookups = [entry.filename for entry in entries] * 10
+        timed(results, 'store_is_uploaded', len(lookups), lambda: sum(map(store.is_uploaded, lookups)))
+        timed(results, 'video_index_next_pending', 1000,
+              lambda: [main.get_video_index().next_pending(store.is_uploaded) for _ in range(1000)])
+
+        plan_store = main.StateStore(os.path.join(workdir, 'plan_state.db'), channel='planning')
+        planner = UploadScheduler(plan_store, main.get_timezone(), 50, plan_days_ahead=365,
+                                  min_gap_seconds=600, rng=rng)
+        timed(results, 'plan_365_days_50_per_day', 365 * 50, planner.plan)
+
+        # The upload loop runs on virtual time: every wait returns immediately.
+        scheduler = main.get_upload_scheduler()
+        scheduler.wait_until = lambda deadline_ts, stop_event=None: True
+        timed(results, 'schedule_daily_uploads', args.uploads, main.schedule_daily_uploads)
+
+        fake = main.uploader
+        summary = {
+            'videos': args.videos,
+            'eligible_videos': eligible,
+            'uploads_recorded': store.uploaded_count(),
+            'fake_upload_attempts': fake.attempts,
+            'quarantined': len(store.quarantined_videos()),
+            'notifications': len(sent),
+        }
+        return results, summary
+    finally:
+        os.chdir(REPO_ROOT)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+        else:
+            print(f"Benchmark files kept in {workdir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scheduler overhead with the fake uploader backend.")
+    parser.add_argument('--videos', type=int, default=2000, help="Synthetic videos to generate.")
+    parser.add_argument('--uploads', type=int, default=500, help="Upload slots to run through schedule_daily_uploads.")
+    parser.add_argument('--failure-rate', type=float, default=0.05, help="Probability that a fake upload attempt fails.")
+    parser.add_argument('--stage-latency', type=float, default=0.0, help="Max simulated seconds for transfer and publish stages.")
+    parser.add_argument('--payload-size', type=int, default=16 * 1024, help="Bytes of random mdat data per video.")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--workdir', default=None, help="Parent directory for the temporary benchmark tree.")
+    parser.add_argument('--keep', action='store_true', help="Keep the generated files afterwards.")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON.")
+    parser.add_argument('--verbose', action='store_true', help="Show the scheduler's INFO logging.")
+    args = parser.parse_args()
+
+    results, summary = run(args)
+    if args.json:
+        print(json.dumps({'results': results, 'summary': summary}, indent=2))
+        return
+    print(f"{'benchmark':<28} {'seconds':>10} {'ops':>8} {'ops/s':>12}")
+    for row in results:
+        print(f"{row['benchmark']:<28} {row['seconds']:>10.4f} {row['operations']:>8} {row['ops_per_second'] or 0:>12.1f}")
+    print()
+    for key, value in summary.items():
+        print(f"{key:<28} {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+import logging
+import os
+import tempfile
+
+from browser_session import kill_processes, list_processes, process_tree
+
+# Firefox prefs for the "lean" resource profile. Studio's upload flow needs
+# none of what these switch off.
+LEAN_FIREFOX_PREFS = {
+    # No images or media playback
+    'permissions.default.image': 2,
+    'media.autoplay.default': 5,
+    'media.autoplay.blocking_policy': 2,
+    'media.preload.default': 0,
+    'media.preload.auto': 0,
+    # Fewer content processes
+    'dom.ipc.processCount': 1,
+    'dom.ipc.processCount.webIsolated': 1,
+    'dom.ipc.processPrelaunch.enabled': False,
+    'fission.autostart': False,
+    # Caches that only cost memory and disk for a single parked tab
+    'browser.cache.disk.enable': False,
+    'browser.cache.memory.capacity': 65536,
+    'browser.sessionhistory.max_entries': 3,
+    'browser.sessionstore.resume_from_crash': False,
+    'network.prefetch-next': False,
+    'network.dns.disablePrefetch': True,
+    'network.http.speculative-parallel-limit': 0,
+    # Telemetry, studies and background update checks
+    'toolkit.telemetry.enabled': False,
+    'toolkit.telemetry.unified': False,
+    'toolkit.telemetry.archive.enabled': False,
+    'datareporting.healthreport.uploadEnabled': False,
+    'datareporting.policy.dataSubmissionEnabled': False,
+    'app.normandy.enabled': False,
+    'app.shield.optoutstudies.enabled': False,
+    'app.update.auto': False,
+    'app.update.disabledForTesting': True,
+    'extensions.update.enabled': False,
+    'browser.safebrowsing.malware.enabled': False,
+    'browser.safebrowsing.phishing.enabled': False,
+    'browser.safebrowsing.downloads.enabled': False,
+    'browser.ping-centre.telemetry': False,
+    'browser.newtabpage.enabled': False,
+    'browser.shell.checkDefaultBrowser': False,
+    'extensions.pocket.enabled': False,
+}
+
+RESOURCE_PROFILES = {'default': {}, 'lean': LEAN_FIREFOX_PREFS}
+DEFAULT_PID_DIR = os.path.join(tempfile.gettempdir(), "yt-shorts-browser-pids")
+
+
+def process_start_time(pid):
+    """Start time of `pid` in clock ticks since boot (from /proc), used to tell a reused pid apart."""
+    try:
+        with open(f"/proc/{pid}/stat", 'r') as f:
+            stat = f.read()
+        return int(stat[stat.rindex(')') + 2:].split()[19])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def process_arguments(pid):
+    try:
+        with open(f"/proc/{pid}/cmdline", 'rb') as f:
+            return [arg.decode(errors='replace') for arg in f.read().split(b'\0') if arg]
+    except OSError:
+        return []
+
+
+def uses_profile_under(pid, profile_roots):
+    """Whether `pid` is a Marionette-driven Firefox whose command line names a profile inside one of `profile_roots`."""
+    arguments = process_arguments(pid)
+    if '-marionette' not in arguments:
+        return False
+    for arg in arguments:
+        if not arg.startswith(os.sep):
+            continue
+        path = os.path.realpath(arg)
+        if any(path == root or path.startswith(root + os.sep) for root in profile_roots):
+            return True
+    return False
+
+
+class BrowserProcessRegistry:
+    """
+    Records the geckodriver and Firefox pids each scheduler process launched, one
+    file per owner process in `directory`, so that browsers left behind by a
+    process that crashed or was killed can be reaped by the next run.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory = directory or DEFAULT_PID_DIR
+        self.path = os.path.join(directory, f"{os.getpid()}.pids")
+        os.makedirs(directory, exist_ok=True)
+
+    def record(self, pids):
+        """Adds `pids` (with their start times, to survive pid reuse) to this process's record."""
+        with open(self.path, 'a') as f:
+            for pid in pids:
+                f.write(f"{pid} {process_start_time(pid)}\n")
+
+    def forget(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def reap_orphans(self, profile_roots=()):
+        """
+        Kills browsers recorded by scheduler processes that are no longer
+        running. Browsers that were never recorded (e.g. a crash between launch
+        and record) are only reaped if they have been orphaned to init and run
+        on a profile inside one of `profile_roots` (the profile and snapshot
+        directories this tool launches on), so other Selenium jobs of the same
+        user are left alone. Returns the number of processes signalled.
+        """
+        processes = list_processes()
+        targets = set()
+
+        for name in os.listdir(self.directory):
+            owner, _, suffix = name.partition('.')
+            if suffix != 'pids' or not owner.isdigit() or int(owner) == os.getpid():
+                continue
+            if int(owner) in processes:
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, 'r') as f:
+                    for line in f:
+                        pid, _, start_time = line.partition(' ')
+                        pid = int(pid)
+                        if pid in processes and str(process_start_time(pid)) == start_time.strip():
+                            targets.update(process_tree(pid, processes))
+                os.remove(path)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Could not read browser process record '{path}': {e}")
+
+        profile_roots = [os.path.realpath(os.path.expanduser(root)) for root in profile_roots if root]
+        uid = os.getuid()
+        for pid, (ppid, name) in processes.items():
+            if not profile_roots or ppid != 1 or pid in targets:
+                continue
+            try:
+                if os.stat(f"/proc/{pid}").st_uid != uid:
+                    continue
+            except OSError:
+                continue
+            tree = process_tree(pid, processes)
+            # A geckodriver doesn't name the profile itself; the Firefox it launched does.
+            if name == 'geckodriver' or name.startswith('firefox'):
+                if any(processes[member][1].startswith('firefox') and uses_profile_under(member, profile_roots) for member in tree):
+                    targets.update(tree)
+
+        if not targets:
+            return 0
+        logging.warning(f"Reaping {len(targets)} orphaned firefox/geckodriver process(es) left by an earlier run.")
+        return len(kill_processes(sorted(targets)))
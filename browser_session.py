@@ -0,0 +1,421 @@
+import fcntl
+import logging
+import os
+import signal
+import threading
+import time
+
+
+def read_process_rss_mb(pid):
+    """Returns the resident set size of a process in MB, or None if it can't be read."""
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def list_processes():
+    """Returns {pid: (ppid, name)} for every process visible in /proc."""
+    processes = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'r') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The name is in parentheses and may itself contain spaces or parentheses.
+        name = stat[stat.index('(') + 1:stat.rindex(')')]
+        ppid = int(stat[stat.rindex(')') + 2:].split()[1])
+        processes[int(entry)] = (ppid, name)
+    return processes
+
+
+def process_tree(pid, processes=None):
+    """Returns `pid` followed by all of its descendants (e.g. Firefox's content processes)."""
+    processes = list_processes() if processes is None else processes
+    children = {}
+    for child, (ppid, _) in processes.items():
+        children.setdefault(ppid, []).append(child)
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, ()))
+    return tree
+
+
+def process_tree_rss_mb(pid):
+    """Total resident memory of `pid` and its descendants in MB, or None if `pid` can't be read."""
+    if read_process_rss_mb(pid) is None:
+        return None
+    return sum(read_process_rss_mb(member) or 0.0 for member in process_tree(pid))
+
+
+def kill_processes(pids, grace_seconds=5):
+    """Sends SIGTERM to `pids`, then SIGKILL to any still alive after `grace_seconds`. Returns the pids signalled."""
+    signalled = []
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+            signalled.append(pid)
+        except (ProcessLookupError, PermissionError):
+            pass
+    for pid in wait_for_exit(signalled, grace_seconds):
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    return signalled
+
+
+def wait_for_exit(pids, timeout):
+    """Waits up to `timeout` seconds for `pids` to exit. Returns the ones still running."""
+    deadline = time.monotonic() + timeout
+    remaining = [pid for pid in pids if is_running(pid)]
+    while remaining and time.monotonic() < deadline:
+        time.sleep(0.1)
+        remaining = [pid for pid in remaining if is_running(pid)]
+    return remaining
+
+
+def is_running(pid):
+    return os.path.exists(f"/proc/{pid}") and not is_zombie(pid)
+
+
+def is_zombie(pid):
+    try:
+        with open(f"/proc/{pid}/stat", 'r') as f:
+            stat = f.read()
+        return stat[stat.rindex(')') + 2] == 'Z'
+    except (OSError, ValueError, IndexError):
+        return False
+
+
+class BrowserSlots:
+    """
+    Cross-process cap on the number of concurrently running browsers.
+
+    Each slot is an exclusive `flock` on one of `max_slots` lock files in
+    `lock_dir`. The kernel drops the lock when the holder exits, so a worker that
+    is killed while its browser is hung never leaks a slot.
+    """
+
+    def __init__(self, lock_dir, max_slots, poll_interval=1.0):
+        self.lock_dir = lock_dir
+        self.max_slots = max_slots
+        self.poll_interval = poll_interval
+        self.held_fd = None
+        os.makedirs(lock_dir, exist_ok=True)
+
+    def acquire(self, timeout=None):
+        """Takes a free slot, waiting up to `timeout` seconds (forever if None). Returns True on success."""
+        if self.held_fd is not None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        logged_wait = False
+        while True:
+            for i in range(self.max_slots):
+                fd = os.open(os.path.join(self.lock_dir, f"browser_slot_{i}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    os.close(fd)
+                    continue
+                self.held_fd = fd
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            if not logged_wait:
+                logging.info(f"All {self.max_slots} browser slots are busy. Waiting for one to free up...")
+                logged_wait = True
+            time.sleep(self.poll_interval)
+
+    def release(self):
+        if self.held_fd is not None:
+            fcntl.flock(self.held_fd, fcntl.LOCK_UN)
+            os.close(self.held_fd)
+            self.held_fd = None
+
+
+class StudioSession:
+    """
+    Keeps a single warm WebDriver parked on YouTube Studio between uploads.
+
+    The driver is health-checked every time it is handed out and relaunched
+    transparently if the browser session has died. It is recycled after
+    `max_uploads` successful uploads, once the resident memory of the browser's
+    process tree has grown by more than `max_rss_growth_mb` since launch, or once
+    it exceeds `max_rss_mb` in total. With `start_watchdog`, the memory budget is
+    also enforced while the browser sits idle between uploads.
+
+    If `driver.quit()` fails or leaves processes behind, the geckodriver and
+    Firefox process trees are killed, and with a `process_registry` their pids
+    are recorded so a later run can reap them if this process dies first.
+    """
+
+    def __init__(self, launcher, profile_path, studio_url, max_uploads=20, max_rss_growth_mb=600, launch_attempts=2,
+                 slots=None, slot_timeout=None, profile_snapshot=None, max_rss_mb=None, process_registry=None):
+        """
+        Args:
+            launcher (callable): Called with `profile_path`, returns a WebDriver or None.
+            profile_path (str): Firefox profile directory passed to the launcher.
+            studio_url (str): YouTube Studio page the driver is parked on.
+            max_uploads (int): Successful uploads after which the browser is recycled.
+            max_rss_growth_mb (int): Memory growth after which the browser is recycled.
+            launch_attempts (int): Launch/navigation attempts before giving up in `acquire`.
+            slots (BrowserSlots): Optional cross-process limit on concurrent browsers.
+            slot_timeout (float): Seconds to wait for a free browser slot (forever if None).
+            profile_snapshot (ProfileSnapshot): If given, the browser is launched on this
+                process's trimmed copy of `profile_path` instead of the profile itself.
+            max_rss_mb (int): Memory budget for the whole browser process tree (None for no limit).
+            process_registry (BrowserProcessRegistry): Records launched browser pids for orphan reaping.
+        """
+        self.launcher = launcher
+        self.profile_path = profile_path
+        self.studio_url = studio_url
+        self.max_uploads = max_uploads
+        self.max_rss_growth_mb = max_rss_growth_mb
+        self.launch_attempts = launch_attempts
+        self.slots = slots
+        self.slot_timeout = slot_timeout
+        self.profile_snapshot = profile_snapshot
+        self.max_rss_mb = max_rss_mb
+        self.process_registry = process_registry
+        self.driver = None
+        self.browser_pids = []
+        self.in_use = False
+        self.lock = threading.RLock()
+        self.watchdog_stop = threading.Event()
+        self.watchdog_thread = None
+        self.uploads_since_launch = 0
+        self.baseline_rss_mb = None
+        self.last_timings = {}
+
+    def acquire(self, navigate=True):
+        """
+        Returns a healthy driver freshly navigated to YouTube Studio, launching
+        or reconnecting the browser as needed. Returns None if no usable browser
+        could be obtained. Time spent waiting for a slot, launching and navigating
+        is left in `last_timings` (seconds per stage).
+
+        With `navigate=False` a warm driver is handed out on whatever page it is
+        on (a newly launched one is still navigated), for callers that continue
+        from where the previous upload left off.
+        """
+        with self.lock:
+            driver = self._acquire(navigate)
+            self.in_use = driver is not None
+            return driver
+
+    def _acquire(self, navigate):
+        self.last_timings = {}
+        if self.driver is not None and not self.is_healthy():
+            logging.warning("Browser session is no longer responsive. Reconnecting...")
+            self.close()
+        if self.driver is not None and not navigate:
+            logging.info(f"Continuing in the warm browser session ({self.uploads_since_launch} upload(s) since launch).")
+            return self.driver
+
+        for attempt in range(self.launch_attempts):
+            if self.driver is None:
+                start = time.monotonic()
+                slot_acquired = self.slots is None or self.slots.acquire(self.slot_timeout)
+                self._add_timing('browser_slot_wait', start)
+                if not slot_acquired:
+                    logging.error(f"No browser slot became free within {self.slot_timeout}s.")
+                    return None
+                start = time.monotonic()
+                launch_path = self._launch_profile_path()
+                self._add_timing('profile_snapshot', start)
+                start = time.monotonic()
+                self.driver = self.launcher(launch_path)
+                self._add_timing('browser_launch', start)
+                if self.driver is None:
+                    logging.warning(f"Browser launch attempt {attempt + 1}/{self.launch_attempts} failed.")
+                    if self.slots is not None:
+                        self.slots.release()
+                    continue
+                self.uploads_since_launch = 0
+                self.baseline_rss_mb = None
+                self._record_browser_pids()
+            else:
+                logging.info(f"Reusing warm browser session ({self.uploads_since_launch} upload(s) since launch).")
+
+            start = time.monotonic()
+            try:
+                # A fresh navigation also resets any half-finished dialog from a previous attempt.
+                self.driver.get(self.studio_url)
+            except Exception as e:
+                logging.warning(f"Could not navigate warm browser to YouTube Studio: {e}. Relaunching...")
+                self.close()
+                continue
+            finally:
+                self._add_timing('studio_navigation', start)
+
+            if self.baseline_rss_mb is None:
+                self.baseline_rss_mb = self.browser_rss_mb()
+            return self.driver
+
+        return None
+
+    def _record_browser_pids(self):
+        """Remembers geckodriver's and Firefox's pids, so they can be killed if quitting fails."""
+        pids = []
+        try:
+            pids.append(self.driver.service.process.pid)
+        except Exception:
+            pass
+        try:
+            firefox_pid = self.driver.capabilities.get("moz:processID")
+            if firefox_pid:
+                pids.append(firefox_pid)
+        except Exception:
+            pass
+        self.browser_pids = pids
+        if self.process_registry is not None and pids:
+            self.process_registry.record(pids)
+
+    def _launch_profile_path(self):
+        if self.profile_snapshot is None:
+            return self.profile_path
+        try:
+            return self.profile_snapshot.checkout()
+        except OSError as e:
+            logging.warning(f"Could not prepare the profile snapshot ({e}). Launching on '{self.profile_path}' directly.")
+            return self.profile_path
+
+    def _add_timing(self, stage, start):
+        self.last_timings[stage] = self.last_timings.get(stage, 0.0) + time.monotonic() - start
+
+    def release(self, upload_successful):
+        """
+        Hands the driver back after an upload attempt. The browser is kept warm
+        unless it is unhealthy or due for recycling.
+        """
+        with self.lock:
+            self.in_use = False
+            self._release(upload_successful)
+
+    def _release(self, upload_successful):
+        if self.driver is None:
+            return
+        if upload_successful:
+            self.uploads_since_launch += 1
+
+        if not self.is_healthy():
+            logging.warning("Browser session died during the upload attempt. It will be relaunched on next use.")
+            self.close()
+            return
+
+        if self.uploads_since_launch >= self.max_uploads:
+            logging.info(f"Recycling browser after {self.uploads_since_launch} uploads.")
+            self.close()
+            return
+
+        self._recycle_if_over_budget()
+
+    def _recycle_if_over_budget(self):
+        rss_mb = self.browser_rss_mb()
+        if rss_mb is None:
+            return False
+        if self.max_rss_mb is not None and rss_mb > self.max_rss_mb:
+            logging.info(f"Recycling browser: its process tree uses {rss_mb:.0f} MB, over the {self.max_rss_mb} MB budget.")
+            self.close()
+            return True
+        if self.baseline_rss_mb is not None:
+            growth_mb = rss_mb - self.baseline_rss_mb
+            if growth_mb > self.max_rss_growth_mb:
+                logging.info(f"Recycling browser: memory grew by {growth_mb:.0f} MB since launch ({rss_mb:.0f} MB now).")
+                self.close()
+                return True
+        return False
+
+    def start_watchdog(self, interval=60):
+        """Checks the browser's memory every `interval` seconds and recycles an idle browser that is over budget."""
+        if self.watchdog_thread is not None:
+            return
+        self.watchdog_stop.clear()
+        self.watchdog_thread = threading.Thread(target=self._watchdog_loop, args=(interval,), name="browser-watchdog", daemon=True)
+        self.watchdog_thread.start()
+
+    def stop_watchdog(self):
+        self.watchdog_stop.set()
+        if self.watchdog_thread is not None:
+            self.watchdog_thread.join(timeout=5)
+            self.watchdog_thread = None
+
+    def _watchdog_loop(self, interval):
+        while not self.watchdog_stop.wait(interval):
+            with self.lock:
+                if self.driver is None:
+                    continue
+                if self.in_use:
+                    # Never pull the browser out from under an upload; it is checked again on release.
+                    rss_mb = self.browser_rss_mb()
+                    if rss_mb is not None and self.max_rss_mb is not None and rss_mb > self.max_rss_mb:
+                        logging.warning(f"Browser uses {rss_mb:.0f} MB during an upload (budget {self.max_rss_mb} MB). It will be recycled afterwards.")
+                    continue
+                try:
+                    self._recycle_if_over_budget()
+                except Exception as e:
+                    logging.warning(f"Browser memory watchdog error: {e}")
+
+    def is_healthy(self):
+        """Returns True if the browser still answers WebDriver commands."""
+        if self.driver is None:
+            return False
+        try:
+            self.driver.execute_script("return document.readyState")
+            return True
+        except Exception:
+            return False
+
+    def browser_rss_mb(self):
+        """Returns the resident memory of Firefox and its content processes in MB, or None if unknown."""
+        if self.driver is None:
+            return None
+        try:
+            pid = self.driver.capabilities.get("moz:processID")
+        except Exception:
+            return None
+        if not pid:
+            return None
+        return process_tree_rss_mb(pid)
+
+    def close(self):
+        """Quits the browser if one is running and frees its browser slot. Safe to call repeatedly."""
+        with self.lock:
+            self._close()
+
+    def _close(self):
+        driver, self.driver = self.driver, None
+        browser_pids, self.browser_pids = self.browser_pids, []
+        self.in_use = False
+        self.uploads_since_launch = 0
+        self.baseline_rss_mb = None
+        if driver is not None:
+            processes = list_processes()
+            leftovers = [member for pid in browser_pids if pid in processes for member in process_tree(pid, processes)]
+            try:
+                driver.quit()
+            except Exception as e:
+                logging.warning(f"Error while quitting browser session: {e}")
+            leftovers = wait_for_exit(leftovers, 3)
+            if leftovers:
+                logging.warning(f"Browser processes survived quit; killing {len(leftovers)} leftover process(es).")
+                kill_processes(leftovers)
+            if self.process_registry is not None:
+                self.process_registry.forget()
+            if self.profile_snapshot is not None:
+                try:
+                    self.profile_snapshot.checkin()
+                except Exception as e:
+                    logging.warning(f"Could not check the profile snapshot back in: {e}")
+        if self.slots is not None:
+            self.slots.release()
@@ -0,0 +1,238 @@
+import http.client
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Control commands accepted as POST /<command>; GET /status and GET /queue are read-only.
+CONTROL_COMMANDS = ('pause', 'resume', 'upload-now', 'reload', 'stop', 'unquarantine')
+
+
+class DaemonAlreadyRunning(RuntimeError):
+    """Another daemon is listening on the control socket."""
+
+
+def remove_stale_socket(socket_path):
+    """
+    Removes a control socket left behind by a daemon that didn't shut down
+    cleanly. Nothing is removed if a daemon still accepts connections on it.
+
+    Raises:
+        DaemonAlreadyRunning: If the socket answers.
+    """
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except FileNotFoundError:
+        return
+    except ConnectionRefusedError:
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise DaemonAlreadyRunning(f"A daemon is already listening on '{socket_path}'.")
+
+
+def socket_identity(path):
+    st = os.stat(path)
+    return st.st_dev, st.st_ino, st.st_ctime_ns
+
+
+class DaemonState:
+    """
+    Flags shared between the daemon loop, its signal handlers and the control
+    endpoint.
+
+    `interrupt` is passed to the scheduler as its stop event: setting it ends the
+    scheduler's current wait (never an upload in progress), after which the
+    daemon loop looks at the flags to decide whether to stop, reload, pause or
+    simply carry on. "Upload now" is delivered through the scheduler's own wake
+    flag instead, so the wait ends as if its deadline had passed.
+    """
+
+    def __init__(self):
+        self.interrupt = threading.Event()
+        self.lock = threading.Lock()
+        self.stopping = False
+        self.reload_requested = False
+        self.paused = False
+        self.started_at = time.time()
+        self.activity = 'starting'
+
+    def request_stop(self):
+        with self.lock:
+            self.stopping = True
+        self.interrupt.set()
+
+    def request_reload(self):
+        with self.lock:
+            self.reload_requested = True
+        self.interrupt.set()
+
+    def pause(self):
+        with self.lock:
+            self.paused = True
+        self.interrupt.set()
+
+    def resume(self):
+        with self.lock:
+            self.paused = False
+        self.interrupt.set()
+
+    def take_reload_request(self):
+        with self.lock:
+            requested, self.reload_requested = self.reload_requested, False
+        return requested
+
+    def wait(self, timeout=None):
+        """Sleeps until something is requested (or `timeout` passes), then re-arms the interrupt."""
+        triggered = self.interrupt.wait(timeout)
+        if not self.stopping:
+            self.interrupt.clear()
+        return triggered
+
+
+class ControlServer:
+    """
+    Small HTTP control endpoint for a running daemon, served on a Unix socket
+    (and optionally on a localhost TCP port):
+
+        GET  /status      progress, flags and the current upload
+        GET  /queue       pending slots and the next videos in line
+        POST /pause       finish the current upload, then hold
+        POST /resume
+        POST /upload-now  end the current wait and run the next slot immediately
+        POST /reload      re-read the channel config (same as SIGHUP)
+        POST /stop        shut down after the current upload (same as SIGTERM)
+        POST /unquarantine  release the files in the JSON body {"filenames": [...]}
+
+    `handlers` maps 'status', 'queue' and each of CONTROL_COMMANDS to a callable
+    returning a JSON-serialisable dict. A POST's JSON object body is passed to it
+    as keyword arguments; a ValueError (or a body it doesn't accept) becomes a 409.
+
+    Raises DaemonAlreadyRunning if another daemon still answers on `socket_path`.
+    """
+
+    def __init__(self, handlers, socket_path=None, tcp_port=None):
+        self.handlers = handlers
+        self.socket_path = socket_path
+        self.socket_identity = None
+        self.servers = []
+        if socket_path:
+            remove_stale_socket(socket_path)
+            server = ThreadingUnixHTTPServer(socket_path, self._handler_class())
+            os.chmod(socket_path, 0o600)
+            self.socket_identity = socket_identity(socket_path)
+            self.servers.append(server)
+        if tcp_port:
+            self.servers.append(ThreadingHTTPServer(('127.0.0.1', tcp_port), self._handler_class()))
+        for server in self.servers:
+            server.daemon_threads = True
+
+    def start(self):
+        for server in self.servers:
+            threading.Thread(target=server.serve_forever, name="daemon-control", daemon=True).start()
+        return self
+
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        try:
+            # Only remove the socket this server created, never one that replaced it.
+            if self.socket_identity is not None and socket_identity(self.socket_path) == self.socket_identity:
+                os.remove(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+    def _handler_class(self):
+        handlers = self.handlers
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                name = self.path.strip('/')
+                if name not in ('status', 'queue'):
+                    self._send_json(404, {'error': f"unknown endpoint '{self.path}'"})
+                    return
+                self._dispatch(name)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', '0')))
+                name = self.path.strip('/')
+                if name not in CONTROL_COMMANDS:
+                    self._send_json(404, {'error': f"unknown command '{self.path}'"})
+                    return
+                try:
+                    arguments = json.loads(body) if body else {}
+                except ValueError:
+                    arguments = None
+                if not isinstance(arguments, dict):
+                    self._send_json(400, {'error': "the request body must be a JSON object"})
+                    return
+                self._dispatch(name, arguments)
+
+            def _dispatch(self, name, arguments=None):
+                try:
+                    self._send_json(200, handlers[name](**(arguments or {})))
+                except (ValueError, TypeError) as e:
+                    self._send_json(409, {'error': str(e)})
+                except Exception as e:
+                    logging.error(f"Control endpoint '{name}' failed: {e}")
+                    self._send_json(500, {'error': str(e)})
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload, indent=2, default=str).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects a (host, port) client address.
+        return request, ('local', 0)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout=10):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def send_control_command(command, socket_path=None, tcp_port=None, timeout=10, payload=None):
+    """
+    Sends `command` ('status', 'queue' or one of CONTROL_COMMANDS), with the
+    optional `payload` dict as its JSON body, to a running daemon and returns
+    (http_status, decoded JSON reply).
+    """
+    if socket_path:
+        conn = UnixHTTPConnection(socket_path, timeout)
+    else:
+        conn = http.client.HTTPConnection('127.0.0.1', tcp_port, timeout=timeout)
+    try:
+        if command in ('status', 'queue'):
+            conn.request('GET', f"/{command}")
+        else:
+            body = json.dumps(payload or {}).encode()
+            conn.request('POST', f"/{command}", body=body, headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read() or b'{}')
+    finally:
+        conn.close()
@@ -0,0 +1,117 @@
+import hashlib
+import logging
+import os
+
+PARTIAL_BLOCK_SIZE = 64 * 1024 # Bytes hashed from each end of the file for the prefilter
+FULL_HASH_CHUNK_SIZE = 4 * 1024 * 1024 # Streaming chunk size for the full content hash
+
+
+def partial_fingerprint(path, size):
+    """Hashes the file size plus its first and last blocks. Cheap prefilter for `full_fingerprint`."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(size).encode())
+    with open(path, 'rb') as f:
+        h.update(f.read(PARTIAL_BLOCK_SIZE))
+        if size > PARTIAL_BLOCK_SIZE:
+            f.seek(max(PARTIAL_BLOCK_SIZE, size - PARTIAL_BLOCK_SIZE))
+            h.update(f.read(PARTIAL_BLOCK_SIZE))
+    return h.hexdigest()
+
+
+def full_fingerprint(path):
+    """Streams the whole file through SHA-256 in fixed-size chunks."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(FULL_HASH_CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FingerprintIndex:
+    """
+    Content fingerprints of videos, stored alongside upload records, so a file
+    that was renamed or copied under a new number is recognised as already
+    uploaded.
+
+    Every file gets a cheap partial fingerprint (size + first/last block). The
+    full streaming hash is only computed when a partial fingerprint collides with
+    an uploaded one, and each fingerprint is computed once per (path, size, mtime).
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def partial(self, path, size, mtime):
+        cached = self.store.get_fingerprint(path, size, mtime)
+        if cached is not None:
+            return cached[0]
+        partial_hash = partial_fingerprint(path, size)
+        self.store.save_fingerprint(path, size, mtime, partial_hash, None)
+        return partial_hash
+
+    def full(self, path, size, mtime):
+        cached = self.store.get_fingerprint(path, size, mtime)
+        if cached is not None and cached[1] is not None:
+            return cached[1]
+        partial_hash = cached[0] if cached is not None else partial_fingerprint(path, size)
+        content_hash = full_fingerprint(path)
+        self.store.save_fingerprint(path, size, mtime, partial_hash, content_hash)
+        return content_hash
+
+    def hashes_for_file(self, path):
+        """Returns (partial_hash, content_hash) for a file, computing whatever isn't cached."""
+        st = os.stat(path)
+        partial_hash = self.partial(path, st.st_size, st.st_mtime)
+        return partial_hash, self.full(path, st.st_size, st.st_mtime)
+
+    def find_uploaded_duplicate(self, entry, folder):
+        """
+        Returns the filename of an already-uploaded video with the same content as
+        `entry` (a VideoEntry), or None.
+        """
+        try:
+            partial_hash = self.partial(entry.path, entry.size, entry.mtime)
+        except OSError as e:
+            logging.warning(f"Could not fingerprint '{entry.filename}': {e}")
+            return None
+
+        candidates = [
+            (filename, content_hash)
+            for filename, content_hash in self.store.uploads_with_partial_hash(partial_hash)
+            if filename != entry.filename
+        ]
+        if not candidates:
+            return None
+
+        content_hash = self.full(entry.path, entry.size, entry.mtime)
+        for filename, uploaded_hash in candidates:
+            if uploaded_hash is None:
+                # Uploaded before full hashes were recorded; hash it now if it is still on disk.
+                uploaded_path = os.path.join(folder, filename)
+                try:
+                    _, uploaded_hash = self.hashes_for_file(uploaded_path)
+                except OSError:
+                    logging.warning(f"'{filename}' matches '{entry.filename}' by size and sampled blocks but is no longer on disk. Treating as a duplicate.")
+                    return filename
+                self.store.set_upload_hashes(filename, partial_hash, uploaded_hash)
+            if uploaded_hash == content_hash:
+                return filename
+        return None
+
+    def backfill_uploads(self, video_index):
+        """Adds partial fingerprints to upload records that predate fingerprinting and are still on disk."""
+        missing = self.store.uploads_missing_partial_hash()
+        if not missing:
+            return
+        by_name = {entry.filename: entry for entry in video_index.entries}
+        filled = 0
+        for filename in missing:
+            entry = by_name.get(filename)
+            if entry is None:
+                continue
+            try:
+                self.store.set_upload_hashes(filename, self.partial(entry.path, entry.size, entry.mtime), None)
+                filled += 1
+            except OSError as e:
+                logging.warning(f"Could not fingerprint uploaded video '{filename}': {e}")
+        logging.info(f"Backfilled fingerprints for {filled} of {len(missing)} previously uploaded videos.")
@@ -0,0 +1,236 @@
+import atexit
+import datetime
+import fcntl
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+queue_handler = None
+listener = None
+
+
+class SizeAndTimeRotatingFileHandler(logging.FileHandler):
+    """
+    Rotates the log file when it reaches `max_bytes` or at local midnight,
+    whichever comes first, and gzips the finished segment.
+
+    Segments are named `<file>.<YYYY-MM-DD_HHMMSS>[.gz]` after the time they
+    were rotated out, so they sort chronologically; only the newest
+    `backup_count` are kept.
+
+    Several processes may write the same file. Records are written under a
+    shared flock on `<file>.lock` and rotation happens under an exclusive one,
+    and a process whose open file was rotated away by another reopens the
+    file before its next record, so no record lands in a rotated segment.
+    """
+
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024, backup_count=30, daily=True, compress=True, encoding='utf-8'):
+        super().__init__(filename, 'a', encoding=encoding)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.daily = daily
+        self.compress = compress
+        self.lock_fd = os.open(f"{self.baseFilename}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        # A file left over from a previous day is rotated on the first record.
+        started = os.path.getmtime(self.baseFilename) if os.path.exists(self.baseFilename) else time.time()
+        self.rollover_at = self._next_midnight(started)
+
+    @staticmethod
+    def _next_midnight(timestamp):
+        day = datetime.date.fromtimestamp(timestamp) + datetime.timedelta(days=1)
+        return time.mktime(day.timetuple())
+
+    @contextmanager
+    def _interprocess_lock(self, operation):
+        fcntl.flock(self.lock_fd, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.lock_fd, fcntl.LOCK_UN)
+
+    def emit(self, record):
+        try:
+            with self._interprocess_lock(fcntl.LOCK_SH):
+                self._reopen_if_rotated()
+                if self.shouldRollover(record):
+                    # Not atomic: another process may rotate in between, so check again once exclusive.
+                    fcntl.flock(self.lock_fd, fcntl.LOCK_EX)
+                    self._reopen_if_rotated()
+                    if self.shouldRollover(record):
+                        self.doRollover()
+                logging.FileHandler.emit(self, record)
+        except Exception:
+            self.handleError(record)
+
+    def _reopen_if_rotated(self):
+        if self.stream is None:
+            self.stream = self._open()
+            return
+        try:
+            current = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            current = None
+        opened = os.fstat(self.stream.fileno())
+        if current is None or (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino):
+            self.stream.close()
+            self.stream = self._open()
+            self.rollover_at = self._next_midnight(time.time())
+
+    def shouldRollover(self, record):
+        if self.daily and time.time() >= self.rollover_at:
+            return True
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            # The file's size rather than our offset: other processes append to it too.
+            if os.fstat(self.stream.fileno()).st_size + len(self.format(record)) + 1 >= self.max_bytes:
+                return True
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+            stamp = datetime.datetime.now().strftime('%Y-%m-%d_%H%M%S')
+            segment = f"{self.baseFilename}.{stamp}"
+            suffix = 1
+            while os.path.exists(segment) or os.path.exists(f"{segment}.gz"):
+                segment = f"{self.baseFilename}.{stamp}-{suffix}"
+                suffix += 1
+            os.rename(self.baseFilename, segment)
+            if self.compress:
+                compress_segment(segment)
+            self._delete_old_segments()
+
+        self.rollover_at = self._next_midnight(time.time())
+        self.stream = self._open()
+
+    def close(self):
+        super().close()
+        if self.lock_fd is not None:
+            os.close(self.lock_fd)
+            self.lock_fd = None
+
+    def _delete_old_segments(self):
+        if self.backup_count <= 0:
+            return
+        segments = rotated_segments(self.baseFilename)
+        for path in segments[:-self.backup_count]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def compress_segment(path):
+    import gzip
+    import shutil
+
+    try:
+        with open(path, 'rb') as src, gzip.open(f"{path}.gz", 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(path)
+    except OSError as e:
+        sys.stderr.write(f"Could not compress log segment '{path}': {e}\n")
+
+
+def rotated_segments(log_file):
+    """Returns the rotated segments of `log_file` (plain or gzipped), oldest first."""
+    directory = os.path.dirname(os.path.abspath(log_file))
+    prefix = os.path.basename(log_file) + '.'
+    segments = [
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.startswith(prefix) and name[len(prefix):len(prefix) + 1].isdigit()
+    ]
+    # Several rotations in one second get -1, -2 suffixes, which don't sort by name; mtime does.
+    return sorted(segments, key=lambda path: (os.path.getmtime(path), path))
+
+
+def setup_logging(log_file, level=logging.INFO, max_bytes=10 * 1024 * 1024, backup_count=30, daily=True,
+                  compress=True, console=True, log_queue=None):
+    """
+    Routes every log record through a QueueHandler to a listener thread that
+    owns the actual handlers (the rotating file and optionally stdout), so the
+    caller never waits on disk I/O or rotation.
+
+    `log_queue` may be a multiprocessing queue shared with worker processes
+    (see `forward_logging_to`), which makes this process the single writer of
+    the log file.
+    """
+    global listener
+    # Imported here so processes that only log to the console (see setup_console_logging) skip them.
+    import queue
+    from logging.handlers import QueueListener
+
+    stop_logging()
+
+    handlers = []
+    if log_file:
+        handlers.append(SizeAndTimeRotatingFileHandler(log_file, max_bytes, backup_count, daily, compress))
+    if console:
+        handlers.append(logging.StreamHandler(sys.stdout))
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = log_queue if log_queue is not None else queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _install_queue_handler(log_queue, level)
+    atexit.register(stop_logging)
+    return listener
+
+
+def setup_console_logging(level=logging.WARNING):
+    """For short-lived inspection commands: records go straight to stderr, with no log file and no listener thread."""
+    global queue_handler
+    stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root.addHandler(handler)
+    root.setLevel(level)
+    queue_handler = None
+
+
+def forward_logging_to(log_queue, level=logging.INFO):
+    """For worker processes: send all records to a parent process's listener instead of writing them here."""
+    stop_logging()
+    _install_queue_handler(log_queue, level)
+
+
+def set_message_prefix(prefix):
+    """Prefixes every message from this process, e.g. with the channel name."""
+    if queue_handler is not None:
+        prefix = prefix.replace('%', '%%')
+        queue_handler.setFormatter(logging.Formatter(f'{prefix} %(message)s' if prefix else '%(message)s'))
+
+
+def stop_logging():
+    """Flushes queued records and closes the handlers owned by this process's listener."""
+    global listener
+    current, listener = listener, None
+    if current is not None:
+        current.stop()
+        for handler in current.handlers:
+            handler.close()
+
+
+def _install_queue_handler(log_queue, level):
+    global queue_handler
+    from logging.handlers import QueueHandler
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    queue_handler = QueueHandler(log_queue)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
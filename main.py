@@ -2,24 +2,21 @@
 
 import time
 import datetime
-import random
-import pytz
 import os
 import sys
-import re
 import logging
-import smtplib
-import ssl
-from email.message import EmailMessage
-
-# Selenium imports
-from selenium import webdriver
-from selenium.webdriver.firefox.service import Service
-from selenium.webdriver.firefox.options import Options
-from selenium.webdriver.firefox.firefox_profile import FirefoxProfile
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import atexit
+
+from state_store import StateStore
+from retry_policy import (
+    FAILURE_AUTH, FAILURE_BAD_FILE, FAILURE_TRANSIENT,
+    CircuitBreaker, RetryPolicy, UploadFailure, classify_failure, directory_accessible,
+)
+from slot_scheduler import UploadScheduler
+from video_index import VideoIndex
+from metrics import UploadMetrics, load_records, stage_percentiles
+from logging_setup import setup_logging, setup_console_logging, set_message_prefix
+from video_probe import ProbeResult, probe_video, check_short_eligibility
 
 # --- Configuration for your Firefox Profile ---
 # IMPORTANT: You need to find your Firefox profile path on your Linux system.
@@ -28,21 +25,105 @@ profile_path = "/home/kali/.mozilla/firefox/yh9x5vth.talha" # <<<--- REPLACE THI
 # --- Video Files Configuration ---
 # Path to the directory containing your video files on the Desktop.
 video_folder_path = "/home/kali/Desktop/video"
-# Path for the log file to keep track of uploaded video filenames
+# SQLite database holding upload history, the channel video counter and daily counts
+state_db_file = "scheduler_state.db"
+# Legacy state files, imported once into the state database
 uploaded_log_file = "uploaded_videos.log"
-# Path for the log file to keep track of the channel video number for titles
 channel_counter_file = "channel_video_counter.txt"
+daily_upload_counter_file = "daily_upload_counter.log"
 # Path for the main automation log file
 automation_log_file = "youtube_automation.log"
-# Path for the daily upload counter log file
-daily_upload_counter_file = "daily_upload_counter.log"
 # Path to the file containing video titles
 titles_file_path = "titles.txt" # Assumes titles.txt is in the same directory as the script
 
 # --- Scheduler Configuration ---
 PAKISTAN_TIMEZONE = 'Asia/Karachi'
 UPLOAD_TIMES_PER_DAY = 5 # Maximum videos to upload per day
-RETRY_DELAY_SECONDS = 300 # 5 minutes delay before retrying a failed upload
+RETRY_DELAY_SECONDS = 300 # Base delay before retrying a transiently failed upload (doubles per attempt)
+# Per failure class: backoff base/cap (seconds) and how many attempts a video gets before giving up.
+# Exhausted transient/bad_file budgets quarantine the video; exhausted auth/layout budgets pause the channel.
+# An inaccessible video folder is waited out instead; it never counts against a video's budget.
+RETRY_POLICIES = {
+    'transient': {'base_delay': RETRY_DELAY_SECONDS, 'max_delay': 3600, 'max_attempts': 6},
+    'layout': {'base_delay': 120, 'max_delay': 900, 'max_attempts': 3},
+    'auth': {'base_delay': 60, 'max_delay': 600, 'max_attempts': 2},
+    'bad_file': {'base_delay': 0, 'max_delay': 0, 'max_attempts': 1},
+}
+RETRY_JITTER = 0.2 # +/- 20% randomisation on every retry delay
+CIRCUIT_BREAKER_THRESHOLD = 3 # Consecutive auth/layout failures that pause the channel
+CIRCUIT_BREAKER_COOLDOWN_SECONDS = 2 * 3600 # How long the channel stays paused
+UPLOAD_WINDOW_START_HOUR = 8 # Earliest local hour for a planned upload slot
+UPLOAD_WINDOW_END_HOUR = 20 # Latest local hour (8 PM PKT) for a planned upload slot
+MIN_UPLOAD_GAP_SECONDS = 30 * 60 # Minimum spacing between two uploads
+PLAN_DAYS_AHEAD = 2 # Days of upload slots kept planned (and persisted) ahead of time
+SLOT_PLANNER_ENABLED = True # Favour hours where uploads historically fail less and finish faster (uniform until there's enough history)
+SLOT_PLANNER_HISTORY_DAYS = 60 # Upload history (log, metrics, state store) the hourly estimates are drawn from
+SLOT_PLANNER_MIN_ATTEMPTS = 10 # Below this many historical attempts, slots are placed uniformly
+SLOT_PLANNER_FAILURE_AVERSION = 3.0 # Higher values steer slots harder away from failure-prone hours
+SCHEDULER_WAKE_INTERVAL_SECONDS = 60 # Longest single sleep while waiting for a slot
+BATCH_MIN_SCHEDULE_LEAD_SECONDS = 30 * 60 # `batch --schedule` leaves slots due sooner than this to the regular run
+
+# --- Channel Configuration ---
+# Key under which this channel's state is stored. Each channel in channels.json gets its own.
+CHANNEL_NAME = "default"
+YOUTUBE_CHANNEL_ID = "UC3cMUITF1p9eu9GXvWbzesg"
+YOUTUBE_STUDIO_URL = f"https://studio.youtube.com/channel/{YOUTUBE_CHANNEL_ID}"
+
+# --- Pre-flight Video Checks ---
+SHORTS_MAX_DURATION_SECONDS = 180 # Longer videos are rejected before a browser is opened
+ALLOW_LANDSCAPE_SHORTS = False # Reject videos wider than they are tall
+
+# --- Titles ---
+TITLE_NO_REPEAT_WINDOW = 30 # A title is not reused within this many uploads (least recently used first if the file has fewer titles)
+
+# --- Browser Session Configuration ---
+SESSION_MAX_UPLOADS = 20 # Recycle the warm browser after this many successful uploads
+SESSION_MAX_RSS_GROWTH_MB = 600 # Recycle the warm browser once its memory grows by this much
+BROWSER_RESOURCE_PROFILE = "lean" # "lean": no images/autoplay, one content process, no telemetry/updates; "default": Firefox's own prefs
+BROWSER_RSS_BUDGET_MB = 1500 # Recycle the browser once Firefox and its content processes use more than this in total
+BROWSER_WATCHDOG_INTERVAL_SECONDS = 60 # How often the memory budget is checked while the browser idles
+BROWSER_PID_DIR = None # Where launched browser pids are recorded for orphan reaping; None means <tmp>/yt-shorts-browser-pids
+# Set by the multi-channel supervisor to cap concurrent browsers across worker processes.
+browser_slots = None
+BROWSER_SLOT_TIMEOUT_SECONDS = 3600 # Give up on an upload attempt if no browser slot frees up in time
+PROFILE_SNAPSHOT_ENABLED = True # Launch Firefox on a trimmed per-process copy of profile_path on tmpfs (cookies, session, site storage)
+PROFILE_SNAPSHOT_DIR = None # Where snapshots are kept; None means /dev/shm/yt-shorts-profiles (or the temp dir without /dev/shm)
+PROFILE_SNAPSHOT_WRITE_BACK = False # Also write rotated cookies back into profile_path (only while no Firefox holds its lock)
+SESSION_IDLE_RELEASE_SECONDS = 600 # With browser slots, close the warm browser before waits longer than this
+# Set by the supervisor to a shared value holding the start time of the running upload (0 when idle).
+upload_heartbeat = None
+
+# --- Uploader Backend ---
+UPLOADER_BACKEND = "selenium" # "selenium" drives the real YouTube Studio UI; "resumable" uploads over the YouTube Data API; "fake" simulates it in-process
+FAKE_UPLOADER_OPTIONS = {} # FakeUploader arguments, e.g. {'stage_latency': {'file_transfer': (5, 20)}, 'failure_rate': 0.1}
+YOUTUBE_OAUTH_FILE = "youtube_oauth.json" # client_id, client_secret, refresh_token (and optional token_uri) for the "resumable" backend
+RESUMABLE_UPLOAD_URL = os.getenv("RESUMABLE_UPLOAD_URL", "https://www.googleapis.com/upload/youtube/v3/videos?uploadType=resumable&part=snippet,status")
+RESUMABLE_CHUNK_SIZE = 8 * 1024 * 1024 # Bytes per PUT (multiple of 256 KiB); a failed chunk is resumed from the last acknowledged byte
+RESUMABLE_PRIVACY_STATUS = "public"
+
+# --- Daemon Configuration ---
+DAEMON_SOCKET_PATH = "youtube_daemon-{channel}.sock" # Unix socket of each channel's daemon control endpoint (`python3 main.py control status`)
+DAEMON_CONTROL_PORT = None # Also serve the control endpoint on 127.0.0.1:<port> (None to disable)
+DAEMON_IDLE_RECHECK_SECONDS = 600 # With no videos left, look for new ones this often
+CHANNELS_CONFIG_FILE = "channels.json" # Re-read on SIGHUP when the daemon runs with --channel
+
+# --- Upload Stage Timeouts (seconds) ---
+# Each stage of the Studio upload waits on a DOM condition and moves on as soon as it is met.
+STAGE_TIMEOUTS = {
+    'upload_icon': 20,            # Studio dashboard loaded and upload icon clickable
+    'dialog_ready': 15,           # Upload dialog open with its file input present
+    'details_ready': 60,          # Title textbox editable after the file was selected
+    'upload_stall': 120,          # Fail if the upload percentage doesn't advance for this long
+    'upload_total': 3600,         # Hard cap on the whole file transfer
+    'step_change': 15,            # Each 'Next' step rendered / buttons clickable
+    'checks_complete': 120,       # Processing/copyright checks (0 to skip; timeout is non-fatal)
+    'publish_confirmation': 60,   # Share/processing dialog shown after Publish
+}
+
+# --- Upload Metrics ---
+METRICS_JSONL_FILE = "upload_metrics.jsonl" # One JSON record per upload attempt with per-stage durations (None to disable)
+METRICS_TEXTFILE_DIR = "." # Directory for Prometheus textfile-collector output, one file per channel (None to disable)
+STATUS_STAGE_TIMING_DAYS = 7 # Upload attempts `status` computes the per-stage p50/p95 over
 
 # --- Email Configuration ---
 SENDER_EMAIL = "talha.developer.01@gmail.com" # <<<--- REPLACE THIS
@@ -51,36 +132,47 @@ RECEIVER_EMAIL = "flutterdeveloper246@gmail.com" # <<<--- REPLACE THIS (can be s
 EMAIL_SUBJECT_SUCCESS = "YouTube Short Upload Success!"
 EMAIL_SUBJECT_FAILURE = "YouTube Short Upload Failed!"
 EMAIL_SUBJECT_DAILY_LIMIT = "YouTube Short Daily Upload Limit Reached"
+EMAIL_SUBJECT_QUARANTINE = "YouTube Short Quarantined After Repeated Failures"
+EMAIL_SUBJECT_PAUSED = "YouTube Shorts Uploads Paused"
+# Point these at a local stand-in server (e.g. `python -m aiosmtpd -n -l localhost:8025`, SSL off) for testing.
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+SMTP_USE_SSL = os.getenv("SMTP_USE_SSL", "1") == "1"
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "0") == "1"
+EMAIL_DIGEST_WINDOW_SECONDS = 1800 # Coalesce repeated failures of the same video into one email per window
 
 # --- Logging Setup ---
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(automation_log_file), # Log to file
-        logging.StreamHandler(sys.stdout) # Log to console
-    ]
-)
+# Commands that upload (run, batch, daemon) log through a queue to a background listener thread
+# that writes automation_log_file; other commands only print warnings to stderr. The log file is
+# rotated at LOG_MAX_BYTES and at midnight, and old segments are gzipped (youtube_automation.log.<date>_<time>.gz).
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 30 # Rotated segments kept
+LOG_COMPRESS_BACKUPS = True
 
 # --- Helper Functions ---
 
-def send_email_notification(subject, body):
-    """Sends an email notification."""
-    em = EmailMessage()
-    em['From'] = SENDER_EMAIL
-    em['To'] = RECEIVER_EMAIL
-    em['Subject'] = subject
-    em.set_content(body)
+notification_queue = None
+
+def get_notification_queue():
+    """Returns the shared background email notifier, starting its worker on first use."""
+    global notification_queue
+    if notification_queue is None:
+        from notifier import NotificationQueue # smtplib/ssl are only loaded once something is actually sent
+        notification_queue = NotificationQueue(
+            get_state_store(), SENDER_EMAIL, RECEIVER_EMAIL, SENDER_PASSWORD,
+            smtp_host=SMTP_HOST, smtp_port=SMTP_PORT, use_ssl=SMTP_USE_SSL, starttls=SMTP_STARTTLS,
+            digest_window=EMAIL_DIGEST_WINDOW_SECONDS
+        )
+        notification_queue.start()
+        atexit.register(notification_queue.stop)
+    return notification_queue
 
-    context = ssl.create_default_context()
-    try:
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465, context=context) as smtp:
-            smtp.login(SENDER_EMAIL, SENDER_PASSWORD)
-            smtp.send_message(em)
-        logging.info(f"Email notification sent successfully to {RECEIVER_EMAIL}.")
-    except Exception as e:
-        logging.error(f"Failed to send email notification: {e}")
-        logging.error("Please check your email configuration (sender email, password, recipient, SMTP server/port).")
+def send_email_notification(subject, body, digest_key=None):
+    """
+    Queues an email notification for background delivery. Messages sharing a
+    `digest_key` within EMAIL_DIGEST_WINDOW_SECONDS are sent as one digest.
+    """
+    get_notification_queue().enqueue(subject, body, digest_key=digest_key)
 
 
 def open_firefox_with_profile(profile_path):
@@ -93,8 +185,16 @@ def open_firefox_with_profile(profile_path):
     Returns:
         webdriver.Firefox: The WebDriver instance if successful, None otherwise.
     """
+    # Selenium is imported here, not at module level, so commands that never open a browser start fast.
+    from selenium import webdriver
+    from selenium.webdriver.firefox.service import Service
+    from selenium.webdriver.firefox.options import Options
+    from browser_resources import RESOURCE_PROFILES
+
     try:
         firefox_options = Options()
+        for name, value in RESOURCE_PROFILES[BROWSER_RESOURCE_PROFILE].items():
+            firefox_options.set_preference(name, value)
         firefox_options.add_argument(f"-profile")
         firefox_options.add_argument(os.path.expanduser(profile_path))
         # --- CHANGE MADE HERE: UNCOMMENTED FOR HEADLESS MODE ---
@@ -105,7 +205,6 @@ def open_firefox_with_profile(profile_path):
         driver = webdriver.Firefox(service=service_obj, options=firefox_options)
 
         logging.info(f"Successfully opened Firefox with profile: '{profile_path}' (Headless Mode: Enabled)")
-        time.sleep(3) # Wait for 3 seconds
 
         return driver
 
@@ -119,298 +218,502 @@ def open_firefox_with_profile(profile_path):
         logging.error("complete any verification, and then close it. This often resolves the issue for future automated runs.")
         return None
 
-def get_uploaded_videos(log_file):
-    """Reads the log file and returns a set of uploaded video filenames."""
-    uploaded = set()
-    if os.path.exists(log_file):
-        with open(log_file, 'r') as f:
-            for line in f:
-                uploaded.add(line.strip())
-    return uploaded
-
-def add_to_uploaded_log(log_file, filename):
-    """Appends a filename to the uploaded videos log file."""
-    with open(log_file, 'a') as f:
-        f.write(filename + '\n')
-
-def get_next_channel_video_number(counter_file):
+studio_session = None
+
+def get_studio_session(profile_path):
+    """Returns the shared warm YouTube Studio browser session, creating it on first use."""
+    global studio_session
+    if studio_session is None or studio_session.profile_path != profile_path:
+        from browser_session import StudioSession
+        retire_studio_session()
+        snapshot = None
+        if PROFILE_SNAPSHOT_ENABLED:
+            from profile_snapshot import ProfileSnapshot
+            snapshot = ProfileSnapshot(profile_path, PROFILE_SNAPSHOT_DIR, write_back=PROFILE_SNAPSHOT_WRITE_BACK)
+        studio_session = StudioSession(
+            open_firefox_with_profile, profile_path, YOUTUBE_STUDIO_URL,
+            max_uploads=SESSION_MAX_UPLOADS, max_rss_growth_mb=SESSION_MAX_RSS_GROWTH_MB,
+            slots=browser_slots, slot_timeout=BROWSER_SLOT_TIMEOUT_SECONDS, profile_snapshot=snapshot,
+            max_rss_mb=BROWSER_RSS_BUDGET_MB, process_registry=get_browser_process_registry()
+        )
+        studio_session.start_watchdog(BROWSER_WATCHDOG_INTERVAL_SECONDS)
+    return studio_session
+
+browser_process_registry = None
+
+def get_browser_process_registry():
+    """Returns this process's browser pid registry, reaping browsers orphaned by earlier runs on first use."""
+    global browser_process_registry
+    if browser_process_registry is None:
+        from browser_resources import BrowserProcessRegistry
+        from profile_snapshot import default_snapshot_root
+        browser_process_registry = BrowserProcessRegistry(BROWSER_PID_DIR)
+        try:
+            browser_process_registry.reap_orphans(profile_roots=(profile_path, PROFILE_SNAPSHOT_DIR or default_snapshot_root()))
+        except OSError as e:
+            logging.warning(f"Could not reap orphaned browser processes: {e}")
+    return browser_process_registry
+
+uploader = None
+
+def get_uploader(profile_path):
+    """Returns the configured uploader backend (see UPLOADER_BACKEND), creating it on first use."""
+    global uploader
+    if uploader is None:
+        if UPLOADER_BACKEND == 'selenium':
+            from selenium_uploader import SeleniumUploader
+            uploader = SeleniumUploader(get_studio_session(profile_path), STAGE_TIMEOUTS, timezone=get_timezone())
+        elif UPLOADER_BACKEND == 'resumable':
+            from resumable_uploader import OAuthCredentials, ResumableUploader
+            uploader = ResumableUploader(
+                OAuthCredentials.from_file(YOUTUBE_OAUTH_FILE), RESUMABLE_UPLOAD_URL, store=get_state_store(),
+                chunk_size=RESUMABLE_CHUNK_SIZE, privacy_status=RESUMABLE_PRIVACY_STATUS
+            )
+        elif UPLOADER_BACKEND == 'fake':
+            from uploader import FakeUploader
+            uploader = FakeUploader(**FAKE_UPLOADER_OPTIONS)
+        else:
+            raise ValueError(f"Unknown UPLOADER_BACKEND '{UPLOADER_BACKEND}' (expected 'selenium', 'resumable' or 'fake').")
+    return uploader
+
+def close_studio_session():
+    """Quits the shared browser session, if any."""
+    if studio_session is not None:
+        studio_session.close()
+
+def retire_studio_session():
+    """Quits the shared browser session for good, stops its watchdog and deletes this process's profile snapshot copy."""
+    if studio_session is not None:
+        studio_session.close()
+        studio_session.stop_watchdog()
+        if studio_session.profile_snapshot is not None:
+            studio_session.profile_snapshot.discard()
+
+atexit.register(retire_studio_session)
+
+def apply_channel_config(channel):
+    """
+    Points this process at one channel from channels.json. Used by supervisor
+    worker processes before they start the scheduler; each worker is its own
+    process, so overriding the module settings here doesn't affect other channels.
     """
-    Reads the next channel video number from the counter file.
-    Initializes to 16 if the file doesn't exist or contains invalid data.
+    global CHANNEL_NAME, YOUTUBE_CHANNEL_ID, YOUTUBE_STUDIO_URL, UPLOAD_TIMES_PER_DAY
+    global profile_path, video_folder_path, titles_file_path, state_db_file
+    global uploaded_log_file, channel_counter_file, daily_upload_counter_file
+
+    CHANNEL_NAME = channel['name']
+    YOUTUBE_CHANNEL_ID = channel['channel_id']
+    YOUTUBE_STUDIO_URL = f"https://studio.youtube.com/channel/{YOUTUBE_CHANNEL_ID}"
+    profile_path = channel['profile_path']
+    video_folder_path = channel['video_folder']
+    titles_file_path = channel['titles_file']
+    UPLOAD_TIMES_PER_DAY = channel.get('daily_limit', UPLOAD_TIMES_PER_DAY)
+    state_db_file = channel.get('state_db', state_db_file)
+    # Legacy files are only imported for a channel that explicitly lists them.
+    uploaded_log_file = channel.get('legacy_uploaded_log')
+    channel_counter_file = channel.get('legacy_channel_counter')
+    daily_upload_counter_file = channel.get('legacy_daily_counter')
+
+    set_message_prefix(f"[{CHANNEL_NAME}]")
+
+def reset_channel_state():
     """
-    if os.path.exists(counter_file):
+    Closes and drops every per-channel singleton (browser, uploader, state store,
+    indexes, scheduler, notifier) so they are rebuilt from the current settings
+    on next use. Used when the daemon reloads its config.
+    """
+    global uploader, studio_session, state_store, video_index, fingerprint_index, title_catalog
+    global upload_scheduler, breaker, upload_metrics, notification_queue, slot_planner
+    if uploader is not None:
+        uploader.close()
+    retire_studio_session()
+    if video_index is not None:
+        video_index.stop_watching()
+    if notification_queue is not None:
+        notification_queue.stop()
+    if state_store is not None:
+        state_store.close()
+    uploader = studio_session = state_store = video_index = fingerprint_index = title_catalog = None
+    upload_scheduler = breaker = upload_metrics = notification_queue = slot_planner = None
+    reported_duplicates.clear()
+
+upload_metrics = None
+
+def get_upload_metrics():
+    """Returns the per-channel upload metrics sink (JSONL records + Prometheus textfile)."""
+    global upload_metrics
+    if upload_metrics is None:
+        textfile_path = None
+        if METRICS_TEXTFILE_DIR:
+            textfile_path = os.path.join(METRICS_TEXTFILE_DIR, f"upload_metrics_{CHANNEL_NAME}.prom")
+        upload_metrics = UploadMetrics(CHANNEL_NAME, METRICS_JSONL_FILE, textfile_path)
+    return upload_metrics
+
+state_store = None
+
+def get_state_store():
+    """Returns the shared state store, importing the legacy text files on first use."""
+    global state_store
+    if state_store is None:
+        state_store = StateStore(state_db_file, channel=CHANNEL_NAME)
+        state_store.migrate_from_files(uploaded_log_file, channel_counter_file, daily_upload_counter_file)
+    return state_store
+
+video_index = None
+
+def get_video_index():
+    """Returns the shared index of eligible videos in `video_folder_path`, loading it on first use."""
+    global video_index
+    if video_index is None:
+        video_index = VideoIndex(video_folder_path, store=get_state_store(), min_number=4).load()
+    return video_index
+
+def preflight_video(video_path, size=None, mtime=None):
+    """
+    Checks that a video qualifies as a Short using its container headers, with
+    results cached in the state store per (path, size, mtime).
+
+    Returns:
+        str: The reason the video was rejected, or None if it can be uploaded.
+    """
+    if size is None or mtime is None:
         try:
-            with open(counter_file, 'r') as f:
-                content = f.read().strip()
-                if content.isdigit():
-                    return int(content)
-        except Exception as e:
-            logging.warning(f"Could not read channel counter file. Starting from default. Error: {e}")
-    return 16 # Default starting number for the channel video title
-
-def update_channel_video_number(counter_file, next_number):
-    """Writes the next channel video number to the counter file."""
-    try:
-        with open(counter_file, 'w') as f:
-            f.write(str(next_number))
-    except Exception as e:
-        logging.error(f"Could not update channel counter file. Error: {e}")
+            st = os.stat(video_path)
+        except OSError as e:
+            return f"Video file is not accessible: {e}"
+        size, mtime = st.st_size, st.st_mtime
+
+    store = get_state_store()
+    cached = store.get_probe(video_path, size, mtime)
+    if cached is not None:
+        result = ProbeResult(*cached)
+    else:
+        result = probe_video(video_path)
+        store.save_probe(video_path, size, mtime, result)
+        if result.error is None and result.duration is not None:
+            logging.info(f"Probed '{os.path.basename(video_path)}': {result.duration:.1f}s, {result.width}x{result.height}, codec {result.codec}.")
+
+    reason = check_short_eligibility(result, SHORTS_MAX_DURATION_SECONDS, ALLOW_LANDSCAPE_SHORTS)
+    if reason and cached is None:
+        logging.warning(f"Skipping '{os.path.basename(video_path)}' in pre-flight check: {reason}")
+    return reason
+
+fingerprint_index = None
+
+def get_fingerprint_index():
+    global fingerprint_index
+    if fingerprint_index is None:
+        from fingerprint import FingerprintIndex
+        fingerprint_index = FingerprintIndex(get_state_store())
+    return fingerprint_index
+
+title_catalog = None
+
+def get_title_catalog():
+    """Returns the channel's title catalogue, which reloads `titles_file_path` only when the file changes."""
+    global title_catalog
+    if title_catalog is None:
+        from title_catalog import TitleCatalog
+        title_catalog = TitleCatalog(titles_file_path, get_state_store(), TITLE_NO_REPEAT_WINDOW)
+    return title_catalog
+
+reported_duplicates = set()
+
+def is_eligible_for_upload(entry):
+    """
+    `VideoIndex.next_pending` filter: True if the indexed video isn't quarantined,
+    passes the pre-flight check and its content hasn't already been uploaded under
+    another name.
+    """
+    if get_state_store().is_quarantined(entry.filename):
+        return False
+    if preflight_video(entry.path, entry.size, entry.mtime) is not None:
+        return False
+    duplicate_of = get_fingerprint_index().find_uploaded_duplicate(entry, video_folder_path)
+    if duplicate_of:
+        # Selection re-checks every candidate, so only report each duplicate once per run.
+        if entry.filename not in reported_duplicates:
+            reported_duplicates.add(entry.filename)
+            logging.info(f"Skipping '{entry.filename}': same content as already uploaded '{duplicate_of}'.")
+        return False
+    return True
 
-def get_daily_upload_count(daily_log_file):
-    """Reads the daily upload count for the current day."""
-    today = get_pakistan_time().strftime('%Y-%m-%d')
-    if os.path.exists(daily_log_file):
-        with open(daily_log_file, 'r') as f:
-            for line in f:
-                parts = line.strip().split(',')
-                if len(parts) == 2 and parts[0] == today:
-                    try:
-                        return int(parts[1])
-                    except ValueError:
-                        logging.warning(f"Invalid count in daily log for {today}. Resetting count to 0.")
-                        return 0
-    return 0
-
-def increment_daily_upload_count(daily_log_file):
-    """Increments the daily upload count for the current day."""
+def get_next_channel_video_number():
+    """
+    Returns the next channel video number for the title.
+    Defaults to 16 if no number has been recorded yet.
+    """
+    return get_state_store().next_channel_video_number(default=16) # Default starting number for the channel video title
+
+def get_daily_upload_count():
+    """Returns the upload count for the current day."""
     today = get_pakistan_time().strftime('%Y-%m-%d')
-    current_count = get_daily_upload_count(daily_log_file)
-    new_count = current_count + 1
-
-    lines = []
-    if os.path.exists(daily_log_file):
-        with open(daily_log_file, 'r') as f:
-            lines = f.readlines()
-
-    found = False
-    with open(daily_log_file, 'w') as f:
-        for line in lines:
-            parts = line.strip().split(',')
-            if len(parts) == 2 and parts[0] == today:
-                f.write(f"{today},{new_count}\n")
-                found = True
-            else:
-                f.write(line)
-        if not found:
-            f.write(f"{today},{new_count}\n")
-    logging.info(f"Daily upload count for {today} updated to {new_count}.")
+    return get_state_store().daily_count(today)
 
-def get_titles_from_file(file_path):
-    """Reads titles from a text file, one title per line."""
-    titles = []
-    if not os.path.exists(file_path):
-        logging.error(f"Titles file not found: {file_path}")
-        return []
+def record_successful_upload(filename, channel_video_number, title, title_choice=None):
+    """
+    Records the upload with its content fingerprints and catalogue title, advances
+    the channel counter and bumps today's count in one transaction.
+    """
+    today = get_pakistan_time().strftime('%Y-%m-%d')
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                stripped_line = line.strip()
-                if stripped_line:
-                    titles.append(stripped_line)
-        if not titles:
-            logging.warning(f"Titles file '{file_path}' is empty or contains no valid titles.")
-        return titles
-    except Exception as e:
-        logging.error(f"Error reading titles from '{file_path}': {e}")
-        return []
+        partial_hash, content_hash = get_fingerprint_index().hashes_for_file(os.path.join(video_folder_path, filename))
+    except OSError as e:
+        logging.warning(f"Could not fingerprint '{filename}' for the upload record: {e}")
+        partial_hash = content_hash = None
+    new_count = get_state_store().record_upload(filename, channel_video_number, title, today, partial_hash, content_hash, title_choice)
+    if title_choice is not None:
+        get_title_catalog().mark_used(title_choice)
+    logging.info(f"Logged '{filename}' as successfully processed.")
+    logging.info(f"Updated channel video counter to: {channel_video_number + 1}")
+    logging.info(f"Daily upload count for {today} updated to {new_count}.")
 
+def build_video_title(channel_video_number, reserved=()):
+    """
+    Picks the next base title from the title catalogue and appends the Shorts number.
+    Titles whose ids are in `reserved` are skipped (for previewing several uploads).
 
-def upload_youtube_short(profile_path, video_folder_path, uploaded_log_file, channel_counter_file, titles_file_path, video_to_upload_name_param=None):
+    Returns:
+        tuple: (final title, catalogue Title or None if the fallback title was used)
     """
-    Automates the process of opening Firefox, navigating to YouTube Studio,
-    uploading a video, updating its title, and clicking through initial steps.
-    Returns True on successful upload process completion, False otherwise.
+    choice = get_title_catalog().choose(channel_video_number, reserved)
+    if choice is not None:
+        logging.info(f"Selected base title from file: '{choice.text}' (id {choice.title_id})")
+        return f"{choice.text} | #Shorts {channel_video_number}", choice
+    logging.warning("No valid titles found in titles.txt. Using a fallback default title.")
+    return f"Default Short Title | #Shorts {channel_video_number}", None
+
+def upload_youtube_short(profile_path, video_folder_path, titles_file_path, video_to_upload_name_param=None, attempt=1, publish_at=None):
+    """
+    Picks the next video and its title, then hands it to the configured uploader
+    backend (the warm Firefox session on YouTube Studio by default), which uploads
+    the video, updates its title, and clicks through the publish steps. With
+    `publish_at` (UTC epoch) the video is scheduled to go public then instead.
+    Returns True on successful upload process completion. On failure, raises
+    UploadFailure carrying the failure class (transient, layout, auth, bad_file).
     If video_to_upload_name_param is provided, it attempts to upload that specific video.
+    Each stage is timed, and the attempt's record is written to the upload metrics sinks.
     """
-    driver = None
+    uploader = get_uploader(profile_path)
+    trace = get_upload_metrics().trace(video_to_upload_name_param, attempt)
+    upload_started = False
+    upload_successful = False
     video_to_upload_name = video_to_upload_name_param
     current_channel_video_number = None
     final_video_title = "N/A"
 
     try:
-        driver = open_firefox_with_profile(profile_path)
-        if not driver:
-            logging.error("Failed to open Firefox profile. Aborting upload.")
-            return False
-
-        driver.get("https://studio.youtube.com/channel/UC3cMUITF1p9eu9GXvWbzesg")
-        logging.info("Navigated to YouTube Studio. You should see your specific profile logged in.")
-
-        uploaded_videos = get_uploaded_videos(uploaded_log_file)
-        logging.info(f"Already uploaded video filenames (from log): {uploaded_videos}")
-
-        current_channel_video_number = get_next_channel_video_number(channel_counter_file)
-        logging.info(f"Next channel video number for title: {current_channel_video_number}")
-
-        if video_to_upload_name_param is None:
-            all_video_files = []
-            for f in os.listdir(video_folder_path):
-                if f.endswith(('.mp4', '.mov', '.avi', '.webm')):
-                    match = re.match(r'(\d+)\.(mp4|mov|avi|webm)', f, re.IGNORECASE)
-                    if match:
-                        all_video_files.append((int(match.group(1)), f))
-
-            all_video_files.sort(key=lambda x: x[0])
-            logging.info(f"All detected video files (sorted): {[f[1] for f in all_video_files]}")
-
-            for video_num, video_name in all_video_files:
-                if video_num >= 4 and video_name not in uploaded_videos:
-                    video_to_upload_name = video_name
-                    break
-        
-        if not video_to_upload_name:
-            logging.info("No new video files found to upload (or all eligible files have been uploaded).")
-            return True 
-
-        video_to_upload_path = os.path.join(video_folder_path, video_to_upload_name)
-        logging.info(f"Next video file to upload: {video_to_upload_path}")
-
-        titles_list = get_titles_from_file(titles_file_path)
-        if titles_list:
-            title_index = (current_channel_video_number - 42) % len(titles_list)
-            base_title = titles_list[title_index]
-            final_video_title = f"{base_title} | #Shorts {current_channel_video_number}"
-            logging.info(f"Selected base title from file: '{base_title}'")
-        else:
-            logging.warning("No valid titles found in titles.txt. Using a fallback default title.")
-            final_video_title = f"Default Short Title | #Shorts {current_channel_video_number}"
-        
+        with trace.span('prepare'):
+            store = get_state_store()
+            logging.info(f"Videos already uploaded to this channel: {store.uploaded_count()}")
+
+            current_channel_video_number = get_next_channel_video_number()
+            logging.info(f"Next channel video number for title: {current_channel_video_number}")
+
+            if video_to_upload_name_param is None:
+                next_entry = get_video_index().next_pending(store.is_uploaded, is_eligible_for_upload)
+                if next_entry:
+                    video_to_upload_name = next_entry.filename
+
+            if not video_to_upload_name:
+                logging.info("No new video files found to upload (or all eligible files have been uploaded).")
+                return True
+
+            trace.filename = video_to_upload_name
+            video_to_upload_path = os.path.join(video_folder_path, video_to_upload_name)
+            logging.info(f"Next video file to upload: {video_to_upload_path}")
+
+        with trace.span('preflight'):
+            if not directory_accessible(video_folder_path):
+                raise UploadFailure(FAILURE_TRANSIENT, f"Video folder '{video_folder_path}' is not accessible (unmounted or unreadable).")
+            rejection_reason = preflight_video(video_to_upload_path)
+            if rejection_reason:
+                raise UploadFailure(FAILURE_BAD_FILE, f"Failed the pre-flight check: {rejection_reason}. Not opening the browser.")
+            trace.file_size = os.path.getsize(video_to_upload_path)
+
+        final_video_title, title_choice = build_video_title(current_channel_video_number)
         logging.info(f"Constructed video title: '{final_video_title}'")
 
-        logging.info("Attempting to click the upload icon...")
-        upload_icon = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, '//*[@id="upload-icon"]'))
-        )
-        upload_icon.click()
-        logging.info("Successfully clicked the upload icon.")
-        time.sleep(3)
-
-        logging.info(f"Attempting to upload video file: {video_to_upload_path}")
-        file_input_xpath = '//input[@type="file"]'
-
-        file_input_element = WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.XPATH, file_input_xpath))
-        )
-        file_input_element.send_keys(os.path.abspath(video_to_upload_path))
-        logging.info("Successfully sent video file path to the upload input. Upload should now be in progress.")
-        time.sleep(10)
-
-        logging.info(f"Attempting to update video title...")
-        title_textbox_xpath = '//*[@id="textbox"]'
-        title_element = WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.XPATH, title_textbox_xpath))
-        )
-        title_element.clear()
-        title_element.send_keys(final_video_title)
-        logging.info(f"Successfully updated title to: '{final_video_title}'")
-        time.sleep(2)
-
-        next_button_xpath = "/html/body/ytcp-uploads-dialog/tp-yt-paper-dialog/div/ytcp-animatable[2]/div/div[2]/ytcp-button[2]/ytcp-button-shape/button"
-        for i in range(3):
-            logging.info(f"Attempting to click 'Next' button (attempt {i+1}/3)...")
-            next_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, next_button_xpath))
-            )
-            next_button.click()
-            logging.info(f"Successfully clicked 'Next' button (attempt {i+1}/3).")
-            time.sleep(2)
-
-        final_button_xpath = "/html/body/ytcp-uploads-dialog/tp-yt-paper-dialog/div/ytcp-animatable[2]/div/div[2]/ytcp-button[3]/ytcp-button-shape/button"
-        logging.info(f"Attempting to click the final button with XPath: {final_button_xpath}...")
-        final_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, final_button_xpath))
-        )
-        final_button.click()
-        logging.info("Successfully clicked the final button.")
-        time.sleep(5)
+        upload_started = True
+        uploader.upload(video_to_upload_path, final_video_title, trace, publish_at=publish_at)
 
-        add_to_uploaded_log(uploaded_log_file, video_to_upload_name)
-        logging.info(f"Logged '{video_to_upload_name}' as successfully processed.")
-
-        update_channel_video_number(channel_counter_file, current_channel_video_number + 1)
-        logging.info(f"Updated channel video counter to: {current_channel_video_number + 1}")
-        
-        increment_daily_upload_count(daily_upload_counter_file)
+        with trace.span('record'):
+            record_successful_upload(video_to_upload_name, current_channel_video_number, final_video_title, title_choice)
 
         email_body = (
             f"YouTube Short Upload Details:\n\n"
             f"File Name: {video_to_upload_name}\n"
             f"Channel Video Number: {current_channel_video_number}\n"
             f"Video Title: {final_video_title}\n"
+            f"Scheduled Publish (PKT): {format_pkt(publish_at) if publish_at else 'Published immediately'}\n"
             f"Status: Script-side upload process completed (monitor YouTube Studio for final status)\n"
             f"Timestamp (PKT): {get_pakistan_time().strftime('%Y-%m-%d %H:%M:%S %Z%z')}"
         )
         send_email_notification(EMAIL_SUBJECT_SUCCESS, email_body)
 
+        upload_successful = True
+        trace.finish('success')
         return True
 
     except Exception as e:
-        error_message = f"An error occurred during YouTube upload process for video '{video_to_upload_name or 'N/A'}' (Channel # {current_channel_video_number or 'N/A'} - Title: '{final_video_title}'): {e}"
+        category = classify_failure(e)
+        trace.finish('failure', category)
+        error_message = f"An error occurred during YouTube upload process for video '{video_to_upload_name or 'N/A'}' (Channel # {current_channel_video_number or 'N/A'} - Title: '{final_video_title}') [{category}]: {e}"
         logging.error(error_message)
         email_body = (
             f"YouTube Short Upload FAILED!\n\n"
             f"File Name Attempted: {video_to_upload_name or 'N/A'}\n"
             f"Channel Video Number Attempted: {current_channel_video_number or 'N/A'}\n"
             f"Video Title Attempted: {final_video_title}\n"
+            f"Failure Class: {category}\n"
             f"Error: {e}\n"
             f"Timestamp (PKT): {get_pakistan_time().strftime('%Y-%m-%d %H:%M:%S %Z%z')}\n\n"
-            f"This video will be retried in the next retry attempt for this slot."
+            f"The scheduler will retry or quarantine this video according to its retry policy."
         )
-        send_email_notification(EMAIL_SUBJECT_FAILURE, email_body)
-        return False
+        send_email_notification(EMAIL_SUBJECT_FAILURE, email_body, digest_key=f"failure:{video_to_upload_name or 'N/A'}")
+        if isinstance(e, UploadFailure):
+            raise
+        raise UploadFailure(category, str(e)) from e
 
     finally:
-        if driver:
-            driver.quit()
+        if upload_started:
+            with trace.span('backend_release'):
+                uploader.release(upload_successful)
+        if trace.outcome is not None:
+            get_upload_metrics().record(trace)
+            logging.info(f"Upload attempt timings (s): {', '.join(f'{stage}={seconds:.1f}' for stage, seconds in trace.stages.items())}")
+
+current_upload = None # {'filename', 'attempt', 'started_at'} while an upload attempt runs, for the daemon's status
+
+def run_upload_attempt(video_name, attempt=1, publish_at=None):
+    """Runs one upload attempt, publishing its start time to the supervisor's hang watchdog."""
+    global current_upload
+    if upload_heartbeat is not None:
+        upload_heartbeat.value = time.time()
+    current_upload = {'filename': video_name, 'attempt': attempt, 'started_at': time.time()}
+    try:
+        return upload_youtube_short(
+            profile_path, video_folder_path, titles_file_path,
+            video_to_upload_name_param=video_name, attempt=attempt, publish_at=publish_at
+        )
+    finally:
+        current_upload = None
+        if upload_heartbeat is not None:
+            upload_heartbeat.value = 0
 
 # --- Scheduler Logic ---
 
+def get_timezone():
+    """Returns the scheduler's timezone. zoneinfo loads only this zone (pytz.timezone() scanned its whole zone list on first use)."""
+    from zoneinfo import ZoneInfo
+    return ZoneInfo(PAKISTAN_TIMEZONE)
+
 def get_pakistan_time():
     """Returns the current datetime object in Pakistan Standard Time."""
-    tz = pytz.timezone(PAKISTAN_TIMEZONE)
+    tz = get_timezone()
     return datetime.datetime.now(tz)
 
-def generate_random_upload_times(start_time, end_time, num_times):
-    """
-    Generates a list of unique random datetime objects within a given time range.
-    """
-    if start_time >= end_time:
-        logging.warning("Start time is not before end time. No random times generated.")
-        return []
-
-    time_diff_seconds = int((end_time - start_time).total_seconds())
-    if time_diff_seconds <= 0:
-        logging.warning("Time window is too small or invalid. No random times generated.")
-        return []
-
-    random_seconds = set()
-    max_possible_times = min(num_times, time_diff_seconds)
-    while len(random_seconds) < max_possible_times:
-        random_seconds.add(random.randint(0, time_diff_seconds))
-
-    upload_times = []
-    for sec in random_seconds:
-        upload_times.append(start_time + datetime.timedelta(seconds=sec))
-
-    upload_times.sort()
-    return upload_times
-
-def can_upload_today(daily_log_file, limit):
+def can_upload_today(limit):
     """Checks if the daily upload limit has been reached for the current day."""
-    current_count = get_daily_upload_count(daily_log_file)
+    current_count = get_daily_upload_count()
     if current_count >= limit:
         logging.info(f"Daily upload limit of {limit} reached for today ({get_pakistan_time().strftime('%Y-%m-%d')}).")
         return False
     return True
 
-def schedule_daily_uploads():
+retry_policy = None
+breaker = None
+
+def get_retry_policy():
+    global retry_policy
+    if retry_policy is None:
+        retry_policy = RetryPolicy(RETRY_POLICIES, jitter=RETRY_JITTER)
+    return retry_policy
+
+def get_circuit_breaker():
+    global breaker
+    if breaker is None:
+        breaker = CircuitBreaker(
+            get_state_store(), threshold=CIRCUIT_BREAKER_THRESHOLD, cooldown_seconds=CIRCUIT_BREAKER_COOLDOWN_SECONDS
+        )
+    return breaker
+
+def quarantine_video(filename, category, error):
+    """Moves a video that keeps failing out of the upload queue and notifies about it."""
+    get_state_store().quarantine_video(filename, category, str(error))
+    logging.error(f"Quarantined '{filename}' after repeated {category} failures. Continuing with the next video.")
+    email_body = (
+        f"A video was quarantined after exhausting its retry budget.\n\n"
+        f"File Name: {filename}\n"
+        f"Failure Class: {category}\n"
+        f"Last Error: {error}\n"
+        f"Timestamp (PKT): {get_pakistan_time().strftime('%Y-%m-%d %H:%M:%S %Z%z')}\n\n"
+        f"It will not be retried until it is released with `python3 main.py unquarantine {filename}` "
+        f"(or `python3 main.py control unquarantine {filename}` while the daemon runs)."
+    )
+    send_email_notification(EMAIL_SUBJECT_QUARANTINE, email_body)
+
+def release_quarantined_video(filename):
+    """Puts a quarantined video back in the upload queue. Returns False if it wasn't quarantined."""
+    filename = os.path.basename(filename)
+    released = get_state_store().release_quarantine(filename)
+    if released:
+        logging.info(f"Released '{filename}' from quarantine; it will be uploaded again in its turn.")
+    return released
+
+def notify_channel_paused(category, error):
+    paused_until = get_circuit_breaker().open_until()
+    email_body = (
+        f"Uploads for channel '{CHANNEL_NAME}' are paused after repeated {category} failures.\n\n"
+        f"Last Error: {error}\n"
+        f"Paused Until (PKT): {format_pkt(paused_until) if paused_until else 'N/A'}\n\n"
+        f"{'Log the Firefox profile into YouTube again.' if category == FAILURE_AUTH else 'YouTube Studio layout may have changed; check the XPaths.'}"
+    )
+    send_email_notification(EMAIL_SUBJECT_PAUSED, email_body, digest_key="channel-paused")
+
+upload_scheduler = None
+
+def get_upload_scheduler():
+    """Returns the shared persistent slot scheduler."""
+    global upload_scheduler
+    if upload_scheduler is None:
+        upload_scheduler = UploadScheduler(
+            get_state_store(), get_timezone(), UPLOAD_TIMES_PER_DAY,
+            window_start_hour=UPLOAD_WINDOW_START_HOUR, window_end_hour=UPLOAD_WINDOW_END_HOUR,
+            min_gap_seconds=MIN_UPLOAD_GAP_SECONDS, plan_days_ahead=PLAN_DAYS_AHEAD,
+            wake_interval=SCHEDULER_WAKE_INTERVAL_SECONDS,
+            slot_planner=get_slot_planner() if SLOT_PLANNER_ENABLED else None
+        )
+    return upload_scheduler
+
+slot_planner = None
+
+def get_slot_planner():
+    """Returns the history-driven slot planner for this channel."""
+    global slot_planner
+    if slot_planner is None:
+        from slot_planner import SlotPlanner
+        slot_planner = SlotPlanner(
+            get_state_store(), get_timezone(), log_file=automation_log_file, metrics_file=METRICS_JSONL_FILE,
+            channel=CHANNEL_NAME, history_days=SLOT_PLANNER_HISTORY_DAYS, min_attempts=SLOT_PLANNER_MIN_ATTEMPTS,
+            failure_aversion=SLOT_PLANNER_FAILURE_AVERSION, retry_delay=RETRY_DELAY_SECONDS
+        )
+    return slot_planner
+
+def format_pkt(timestamp):
+    """Formats a UTC epoch timestamp in Pakistan time for log messages."""
+    return datetime.datetime.fromtimestamp(timestamp, get_timezone()).strftime('%Y-%m-%d %H:%M:%S %Z%z')
+
+def schedule_daily_uploads(stop_event=None):
     """
-    Schedules and executes YouTube Shorts uploads daily, respecting a daily limit
-    and retrying the same video until script-level success.
+    Runs the planned upload slots of the current day (or of tomorrow, once today's
+    window has closed), respecting a daily limit and retrying the same video until
+    script-level success. The plan is persisted, so a restart resumes the same slots.
+    If `stop_event` is set, the scheduler returns at the next wait or before the next upload attempt.
     """
     logging.info("Starting YouTube Shorts daily scheduler...")
 
-    if not can_upload_today(daily_upload_counter_file, UPLOAD_TIMES_PER_DAY):
+    if not can_upload_today(UPLOAD_TIMES_PER_DAY):
         email_body = (
             f"The daily upload limit ({UPLOAD_TIMES_PER_DAY}) for YouTube Shorts has been reached for today "
             f"({get_pakistan_time().strftime('%Y-%m-%d %Z%z')}). "
@@ -420,55 +723,38 @@ def schedule_daily_uploads():
         logging.info("Daily upload limit reached. Script will exit for today.")
         return
 
-    now_pkt = get_pakistan_time()
-    end_of_day_pkt = now_pkt.replace(hour=20, minute=0, second=0, microsecond=0)
-
-    if now_pkt >= end_of_day_pkt:
-        logging.info("Current time is past 8 PM PKT. Scheduling uploads for tomorrow.")
-        start_time_for_scheduling = now_pkt.replace(hour=8, minute=0, second=0, microsecond=0) + datetime.timedelta(days=1)
-        end_time_for_scheduling = end_of_day_pkt + datetime.timedelta(days=1)
-    else:
-        logging.info(f"Scheduling uploads from now ({now_pkt.strftime('%H:%M:%S')}) until 8 PM PKT today.")
-        start_time_for_scheduling = now_pkt
-        end_time_for_scheduling = end_of_day_pkt
-
-    remaining_slots = UPLOAD_TIMES_PER_DAY - get_daily_upload_count(daily_upload_counter_file)
-    if remaining_slots <= 0:
-        logging.info("No remaining upload slots for today. Exiting scheduler.")
-        return 
-
-    scheduled_times = generate_random_upload_times(start_time_for_scheduling, end_time_for_scheduling, remaining_slots)
-
-    if not scheduled_times:
-        logging.warning("Could not generate valid upload times. Exiting scheduler for today.")
+    scheduler = get_upload_scheduler().plan()
+    first_slot = scheduler.peek()
+    if first_slot is None:
+        logging.warning("No upload slots are planned. Exiting scheduler for today.")
         return
-
-    logging.info(f"Generated {len(scheduled_times)} upload times for today (PKT):")
-    for s_time in scheduled_times:
-        logging.info(f"- {s_time.strftime('%Y-%m-%d %H:%M:%S %Z%z')}")
-
-    uploaded_videos = get_uploaded_videos(uploaded_log_file)
-    all_video_files = []
-    for f in os.listdir(video_folder_path):
-        if f.lower().endswith(('.mp4', '.mov', '.avi', '.webm')):
-            match = re.match(r'(\d+)\.(mp4|mov|avi|webm)', f, re.IGNORECASE)
-            if match:
-                all_video_files.append((int(match.group(1)), f))
-    all_video_files.sort(key=lambda x: x[0])
-
-    video_to_upload_for_this_schedule = None
-    for video_num, video_name in all_video_files:
-        if video_num >= 4 and video_name not in uploaded_videos:
-            video_to_upload_for_this_schedule = video_name
-            break
+    run_day = first_slot.day
+    logging.info(f"Running upload slots for {run_day}: {sum(1 for slot in scheduler.pending() if slot.day == run_day)} pending.")
+
+    store = get_state_store()
+    retry_policy = get_retry_policy()
+    breaker = get_circuit_breaker()
+    folder_index = get_video_index()
+    folder_index.start_watching()
+    get_fingerprint_index().backfill_uploads(folder_index)
+
+    next_entry = folder_index.next_pending(store.is_uploaded, is_eligible_for_upload)
+    video_to_upload_for_this_schedule = next_entry.filename if next_entry else None
     
     if not video_to_upload_for_this_schedule:
         logging.info("No new video files found to upload (or all eligible files have been uploaded). Scheduler finished.")
+        folder_index.stop_watching()
         return
 
+    while True:
+        if stop_event is not None and stop_event.is_set():
+            logging.info("Scheduler stop requested before the next slot.")
+            break
+        slot = scheduler.peek()
+        if slot is None or slot.day != run_day:
+            break
 
-    for i, scheduled_time in enumerate(scheduled_times):
-        if not can_upload_today(daily_upload_counter_file, UPLOAD_TIMES_PER_DAY):
+        if not can_upload_today(UPLOAD_TIMES_PER_DAY):
             logging.info("Daily upload limit reached during scheduling. Stopping further uploads for today.")
             email_body = (
                 f"The daily upload limit ({UPLOAD_TIMES_PER_DAY}) for YouTube Shorts has been reached during execution for today "
@@ -478,49 +764,555 @@ def schedule_daily_uploads():
             send_email_notification(EMAIL_SUBJECT_DAILY_LIMIT, email_body)
             break
 
-        now = get_pakistan_time()
-        time_to_wait = (scheduled_time - now).total_seconds()
+        remaining_today = sum(1 for pending_slot in scheduler.pending() if pending_slot.day == run_day)
+        run_at = scheduler.run_at(slot)
+        time_to_wait = run_at - time.time()
 
         if time_to_wait > 0:
-            logging.info(f"\nWaiting until {scheduled_time.strftime('%Y-%m-%d %H:%M:%S %Z%z')} (PKT) for next upload ({i+1}/{len(scheduled_times)})...")
-            time.sleep(time_to_wait)
+            if run_at > slot.due_at:
+                logging.info(f"Slot {format_pkt(slot.due_at)} pushed back to keep {MIN_UPLOAD_GAP_SECONDS}s after the previous upload.")
+            logging.info(f"\nWaiting until {format_pkt(run_at)} (PKT) for next upload ({remaining_today} remaining today)...")
+            if browser_slots is not None and time_to_wait > SESSION_IDLE_RELEASE_SECONDS:
+                # Don't hold one of the shared browser slots while idling between slots.
+                close_studio_session()
+            if not scheduler.wait_until(run_at, stop_event):
+                logging.info("Scheduler stop requested while waiting for the next slot.")
+                break
         else:
-            logging.info(f"\nScheduled time {scheduled_time.strftime('%Y-%m-%d %H:%M:%S %Z%z')} is in the past. Attempting upload immediately ({i+1}/{len(scheduled_times)}).")
+            logging.info(f"\nScheduled time {format_pkt(slot.due_at)} is in the past. Attempting upload immediately ({remaining_today} remaining today).")
+            scheduler.wake_requested = False # An "upload now" is already satisfied by this one
 
         upload_successful = False
-        retry_count = 0
+        stopped = False
+        attempts_by_class = {}
+        folder_checks = 0
         while not upload_successful:
-            logging.info(f"--- Starting upload attempt {retry_count + 1} for video '{video_to_upload_for_this_schedule}' (scheduled time {scheduled_time.strftime('%H:%M:%S')}) ---")
+            if not directory_accessible(video_folder_path):
+                # Not the video's fault: wait for the folder without using up its retry budget.
+                folder_checks += 1
+                delay = retry_policy.delay(FAILURE_TRANSIENT, folder_checks)
+                logging.warning(f"Video folder '{video_folder_path}' is not accessible (unmounted or unreadable). Checking again in {delay:.0f} seconds.")
+                if not scheduler.wait_until(time.time() + delay, stop_event):
+                    stopped = True
+                    break
+                continue
+            folder_checks = 0
+            rejection_reason = preflight_video(os.path.join(video_folder_path, video_to_upload_for_this_schedule))
+            if rejection_reason:
+                logging.warning(f"'{video_to_upload_for_this_schedule}' no longer passes the pre-flight check ({rejection_reason}). Moving on to the next video.")
+                next_entry = folder_index.next_pending(store.is_uploaded, is_eligible_for_upload)
+                video_to_upload_for_this_schedule = next_entry.filename if next_entry else None
+                if not video_to_upload_for_this_schedule:
+                    break
+                attempts_by_class = {}
+                continue
+
+            paused_until = breaker.open_until()
+            if paused_until:
+                logging.warning(f"Channel is paused by the circuit breaker until {format_pkt(paused_until)} (PKT).")
+                if not scheduler.wait_until(paused_until, stop_event):
+                    stopped = True
+                    break
+
+            if stop_event is not None and stop_event.is_set():
+                # Overdue slots and retries without a wait don't pass through wait_until, so check before every attempt.
+                stopped = True
+                break
+            attempt = sum(attempts_by_class.values()) + 1
+            logging.info(f"--- Starting upload attempt {attempt} for video '{video_to_upload_for_this_schedule}' (scheduled time {format_pkt(slot.due_at)}) ---")
             try:
-                upload_successful = upload_youtube_short(
-                    profile_path, video_folder_path, uploaded_log_file, 
-                    channel_counter_file, titles_file_path,
-                    video_to_upload_name_param=video_to_upload_for_this_schedule
-                )
+                upload_successful = run_upload_attempt(video_to_upload_for_this_schedule, attempt)
+            except Exception as e:
+                category = classify_failure(e)
+                attempts_by_class[category] = attempts_by_class.get(category, 0) + 1
+                logging.error(f"Upload attempt {attempt} for '{video_to_upload_for_this_schedule}' failed [{category}]: {e}")
+                exhausted = retry_policy.exhausted(category, attempts_by_class[category])
+                if category in breaker.categories:
+                    # Auth/layout problems affect every video, so they pause the channel instead of quarantining this one.
+                    tripped = breaker.record_failure(category)
+                    if exhausted and not tripped:
+                        breaker.trip(f"{category} retry budget exhausted")
+                        tripped = True
+                    if tripped:
+                        notify_channel_paused(category, e)
+                        attempts_by_class = {}
+                        continue
+                elif exhausted and directory_accessible(video_folder_path):
+                    quarantine_video(video_to_upload_for_this_schedule, category, e)
+                    next_entry = folder_index.next_pending(store.is_uploaded, is_eligible_for_upload)
+                    video_to_upload_for_this_schedule = next_entry.filename if next_entry else None
+                    if not video_to_upload_for_this_schedule:
+                        break
+                    attempts_by_class = {}
+                    continue
+
+                delay = retry_policy.delay(category, attempts_by_class[category])
+                logging.info(f"Retrying '{video_to_upload_for_this_schedule}' in {delay:.0f} seconds...")
+                if not scheduler.wait_until(time.time() + delay, stop_event):
+                    stopped = True
+                    break
+            else:
                 if upload_successful:
+                    breaker.record_success()
                     logging.info(f"Upload process completed successfully for '{video_to_upload_for_this_schedule}'.")
                 else:
-                    logging.warning(f"Upload process failed for '{video_to_upload_for_this_schedule}'. Retrying in {RETRY_DELAY_SECONDS} seconds...")
-                    time.sleep(RETRY_DELAY_SECONDS)
-                    retry_count += 1
-            except Exception as e:
-                logging.error(f"An unexpected error occurred during upload attempt {retry_count + 1} for '{video_to_upload_for_this_schedule}': {e}")
-                logging.info(f"Retrying in {RETRY_DELAY_SECONDS} seconds...")
-                time.sleep(RETRY_DELAY_SECONDS)
-                retry_count += 1
+                    break
+
+        if stopped:
+            logging.info("Scheduler stop requested during retries.")
+            break
+        scheduler.complete(slot, 'done' if upload_successful else 'skipped')
         
-        uploaded_videos = get_uploaded_videos(uploaded_log_file)
-        video_to_upload_for_this_schedule = None
-        for video_num, video_name in all_video_files:
-            if video_num >= 4 and video_name not in uploaded_videos:
-                video_to_upload_for_this_schedule = video_name
-                break
+        next_entry = folder_index.next_pending(store.is_uploaded, is_eligible_for_upload)
+        video_to_upload_for_this_schedule = next_entry.filename if next_entry else None
         
         if not video_to_upload_for_this_schedule:
             logging.info("No more new video files to upload. Scheduler finished for today.")
             break
 
+    close_studio_session()
+    folder_index.stop_watching()
     logging.info("\nAll scheduled uploads for today have been attempted or daily limit reached.")
 
+# --- Command Line Interface ---
+
+def command_run(args):
+    schedule_daily_uploads()
+
+def command_status(args):
+    """Prints today's progress, the next planned slots and anything that needs attention."""
+    store = get_state_store()
+    today = get_pakistan_time().strftime('%Y-%m-%d')
+    folder_index = get_video_index()
+    waiting = sum(1 for entry in folder_index.entries if not store.is_uploaded(entry.filename))
+    last_upload = store.last_upload_timestamp()
+    pending_slots = store.pending_slots()
+    paused_until = get_circuit_breaker().open_until()
+
+    print(f"Channel:              {CHANNEL_NAME}")
+    print(f"Uploaded today:       {store.daily_count(today)} / {UPLOAD_TIMES_PER_DAY} ({today})")
+    print(f"Uploaded in total:    {store.uploaded_count()}")
+    print(f"Last upload:          {format_pkt(last_upload) if last_upload else 'never'}")
+    print(f"Next channel number:  {get_next_channel_video_number()}")
+    print(f"Videos not uploaded:  {waiting} of {len(folder_index.entries)} in '{video_folder_path}'")
+    quarantined = store.quarantined_videos()
+    print(f"Quarantined videos:   {len(quarantined)}{' (release with `unquarantine <file>`)' if quarantined else ''}")
+    for filename, category, reason, quarantined_at in quarantined:
+        print(f"  - {filename} [{category}] since {quarantined_at}: {reason}")
+    print(f"Unsent notifications: {len(store.pending_notifications())}")
+    print(f"Circuit breaker:      {'open until ' + format_pkt(paused_until) if paused_until else 'closed'}")
+    print(f"Pending slots:        {len(pending_slots)}")
+    for _, day, due_at in pending_slots[:args.limit]:
+        print(f"  - {format_pkt(due_at)}")
+    if METRICS_JSONL_FILE:
+        print_stage_timings()
+
+def print_stage_timings():
+    since = time.time() - STATUS_STAGE_TIMING_DAYS * 86400
+    records = [record for record in load_records(METRICS_JSONL_FILE, CHANNEL_NAME) if record.get('ts', 0) >= since]
+    if not records:
+        print(f"Stage timings:        no upload attempts in the last {STATUS_STAGE_TIMING_DAYS} days")
+        return
+    percentiles = stage_percentiles(records)
+    print(f"Stage timings:        {len(records)} attempt(s) in the last {STATUS_STAGE_TIMING_DAYS} days")
+    print(f"  {'stage':<22} {'p50':>8} {'p95':>8}")
+    for stage in sorted(percentiles, key=lambda stage: stage == 'total'):
+        print(f"  {stage:<22} {percentiles[stage][0.5]:>7.1f}s {percentiles[stage][0.95]:>7.1f}s")
+
+def command_plan(args):
+    """Plans (and stores) any missing days in the horizon, then lists the pending slots."""
+    scheduler = get_upload_scheduler().plan()
+    slots = scheduler.pending()
+    if not slots:
+        print("No pending upload slots.")
+    for slot in slots:
+        print(f"{slot.day}  {format_pkt(slot.due_at)}")
+    if args.stats:
+        print_slot_planner_stats()
+
+def print_slot_planner_stats():
+    estimates = get_slot_planner().estimates()
+    print(f"\nHistory: {estimates.total_attempts} attempt(s) in the last {SLOT_PLANNER_HISTORY_DAYS} days, "
+          f"overall failure rate {estimates.overall_failure_prob:.0%}"
+          f"{'' if estimates.total_attempts >= SLOT_PLANNER_MIN_ATTEMPTS else ' (too few; slots are placed uniformly)'}.")
+    print(f"{'hour (PKT)':<11} {'attempts':>8} {'failure':>8} {'duration':>9} {'weight':>7}")
+    for hour in range(UPLOAD_WINDOW_START_HOUR, UPLOAD_WINDOW_END_HOUR + 1):
+        print(f"{hour:02d}:00{'':<6} {estimates.attempts[hour]:>8} {estimates.failure_prob[hour]:>8.0%} "
+              f"{estimates.expected_duration[hour]:>8.0f}s {estimates.weight(hour, SLOT_PLANNER_FAILURE_AVERSION):>7.2f}")
+
+def command_dry_run(args):
+    """Shows which videos would go out next, with their titles and slots, without touching Studio or recording anything."""
+    store = get_state_store()
+    slots = get_upload_scheduler().plan(persist=False).pending()
+    candidates = get_video_index().pending(store.is_uploaded, args.count, is_eligible_for_upload)
+    first_number = get_next_channel_video_number()
+
+    if not candidates:
+        print("No eligible videos to upload.")
+        return
+    reserved = set()
+    for i, entry in enumerate(candidates):
+        slot = f"{format_pkt(slots[i].due_at)}{' (preview)' if slots[i].slot_id is None else ''}" if i < len(slots) else "no slot planned"
+        title, choice = build_video_title(first_number + i, reserved)
+        if choice is not None:
+            reserved.add(choice.title_id)
+        print(f"{slot:<34} {entry.filename:<20} {title}")
+    print(f"\nBackend: {UPLOADER_BACKEND}. Nothing was uploaded or recorded.")
+
+def command_mark_uploaded(args):
+    """Records files as already uploaded (e.g. published by hand) so the scheduler skips them."""
+    store = get_state_store()
+    today = get_pakistan_time().strftime('%Y-%m-%d')
+    for filename in args.filenames:
+        filename = os.path.basename(filename)
+        if store.is_uploaded(filename):
+            print(f"'{filename}' is already recorded as uploaded.")
+            continue
+        store.mark_uploaded(filename, today)
+        print(f"Marked '{filename}' as uploaded.")
+
+def command_unquarantine(args):
+    """Releases quarantined videos so the scheduler tries them again."""
+    for filename in args.filenames:
+        if release_quarantined_video(filename):
+            print(f"Released '{os.path.basename(filename)}' from quarantine.")
+        else:
+            print(f"'{os.path.basename(filename)}' is not quarantined.")
+
+def command_batch(args):
+    """
+    Uploads several videos back to back in one browser session, e.g. to catch up
+    on a backlog. With --schedule each video is set to publish at one of the
+    planned slots (which are then marked done), so a whole day can be queued up
+    front. Each video gets the next channel number and title, as in a regular run.
+    """
+    store = get_state_store()
+    remaining_today = UPLOAD_TIMES_PER_DAY - get_daily_upload_count()
+    if remaining_today <= 0:
+        print(f"The daily upload limit ({UPLOAD_TIMES_PER_DAY}) has been reached for today.")
+        return
+    paused_until = get_circuit_breaker().open_until()
+    if paused_until:
+        print(f"Uploads are paused by the circuit breaker until {format_pkt(paused_until)} (PKT).")
+        return
+
+    count = min(args.count or remaining_today, remaining_today)
+    scheduler = get_upload_scheduler().plan()
+    slots = []
+    if args.schedule:
+        earliest = time.time() + BATCH_MIN_SCHEDULE_LEAD_SECONDS
+        slots = [slot for slot in scheduler.pending() if slot.due_at >= earliest and args.day in (None, slot.day)][:count]
+        if not slots:
+            print("No planned slots far enough ahead to schedule. Run `plan` or pick another --day.")
+            return
+        count = len(slots)
+    candidates = get_video_index().pending(store.is_uploaded, count, is_eligible_for_upload)
+    if not candidates:
+        print("No eligible videos to upload.")
+        return
+
+    uploader = get_uploader(profile_path)
+    breaker = get_circuit_breaker()
+    uploaded = 0
+    logging.info(f"Starting a batch of {len(candidates)} upload(s){' with scheduled publish times' if slots else ''}.")
+    uploader.begin_batch()
+    try:
+        for i, entry in enumerate(candidates):
+            slot = slots[i] if slots else None
+            try:
+                run_upload_attempt(entry.filename, publish_at=slot.due_at if slot else None)
+            except Exception as e:
+                category = classify_failure(e)
+                logging.error(f"Batch upload of '{entry.filename}' failed [{category}]: {e}")
+                if not directory_accessible(video_folder_path):
+                    logging.error(f"Stopping the batch: video folder '{video_folder_path}' is not accessible.")
+                    break
+                if category in breaker.categories:
+                    if breaker.record_failure(category):
+                        notify_channel_paused(category, e)
+                    logging.error("Stopping the batch: this failure would affect every remaining video.")
+                    break
+                continue # Left pending; a regular run retries it under the retry policy
+            breaker.record_success()
+            uploaded += 1
+            if slot is not None:
+                scheduler.complete(slot, 'done')
+    finally:
+        uploader.end_batch()
+        close_studio_session()
+    print(f"Batch finished: {uploaded} of {len(candidates)} video(s) uploaded.")
+
+# --- Daemon Mode ---
+
+def next_local_midnight():
+    """UTC timestamp of the next local (PKT) midnight, when the daily limit resets."""
+    tz = get_timezone()
+    tomorrow = get_pakistan_time().date() + datetime.timedelta(days=1)
+    return datetime.datetime.combine(tomorrow, datetime.time(), tzinfo=tz).timestamp()
+
+def daemon_status(state):
+    """Snapshot of the daemon's progress for the control endpoint."""
+    store = get_state_store()
+    today = get_pakistan_time().strftime('%Y-%m-%d')
+    pending_slots = store.pending_slots()
+    paused_until = get_circuit_breaker().open_until()
+    upload = dict(current_upload) if current_upload else None
+    if upload:
+        upload['running_seconds'] = round(time.time() - upload['started_at'], 1)
+    return {
+        'channel': CHANNEL_NAME,
+        'pid': os.getpid(),
+        'backend': UPLOADER_BACKEND,
+        'activity': state.activity,
+        'paused': state.paused,
+        'stopping': state.stopping,
+        'uptime_seconds': round(time.time() - state.started_at),
+        'current_upload': upload,
+        'uploaded_today': store.daily_count(today),
+        'daily_limit': UPLOAD_TIMES_PER_DAY,
+        'uploaded_total': store.uploaded_count(),
+        'next_slot': format_pkt(pending_slots[0][2]) if pending_slots else None,
+        'circuit_breaker_open_until': format_pkt(paused_until) if paused_until else None,
+        'quarantined': [
+            {'filename': filename, 'category': category, 'reason': reason, 'quarantined_at': quarantined_at}
+            for filename, category, reason, quarantined_at in store.quarantined_videos()
+        ],
+        'unsent_notifications': len(store.pending_notifications()),
+    }
+
+def daemon_queue(count=None):
+    """Pending slots and the videos (with titles) that would fill them, for the control endpoint."""
+    store = get_state_store()
+    slots = [{'day': day, 'due_at': format_pkt(due_at)} for _, day, due_at in store.pending_slots()]
+    entries = get_video_index().pending(store.is_uploaded, count or max(len(slots), UPLOAD_TIMES_PER_DAY), is_eligible_for_upload)
+    first_number = get_next_channel_video_number()
+    videos, reserved = [], set()
+    for i, entry in enumerate(entries):
+        title, choice = build_video_title(first_number + i, reserved)
+        if choice is not None:
+            reserved.add(choice.title_id)
+        videos.append({'filename': entry.filename, 'title': title})
+    return {'slots': slots, 'videos': videos}
+
+def reload_daemon_config(config_path, channel_name):
+    """
+    Re-reads the channel's entry from `config_path` (when running with --channel),
+    then rebuilds all per-channel state so new settings and new files take effect.
+    Slots already planned for a day keep their times.
+    """
+    if channel_name:
+        from supervisor import load_channel_config
+        try:
+            config = load_channel_config(config_path)
+        except (OSError, ValueError) as e:
+            logging.error(f"Config reload failed, keeping the current settings: {e}")
+            return False
+        channel = next((entry for entry in config['channels'] if entry['name'] == channel_name), None)
+        if channel is None:
+            logging.error(f"Config reload failed: channel '{channel_name}' is not in '{config_path}'. Keeping the current settings.")
+            return False
+        apply_channel_config(channel)
+    reset_channel_state()
+    logging.info(f"Reloaded configuration for channel '{CHANNEL_NAME}'.")
+    return True
+
+def command_daemon(args):
+    """
+    Runs the scheduler continuously across days in one process, keeping the
+    state store, folder index and browser session warm between days.
+
+    SIGHUP reloads the config; SIGTERM/SIGINT stop after the upload in progress.
+    The control endpoint on the channel's DAEMON_SOCKET_PATH serves status and
+    queue contents and accepts pause, resume, upload-now, reload and stop. A
+    second daemon for the same socket refuses to start.
+    """
+    import signal
+    from daemon_control import ControlServer, DaemonAlreadyRunning, DaemonState
+
+    state = DaemonState()
+    if args.channel:
+        reload_daemon_config(args.config, args.channel)
+
+    def handle_stop(signum, frame):
+        logging.info(f"Received signal {signum}. Stopping after the current upload.")
+        stop_daemon()
+
+    def handle_reload(signum, frame):
+        logging.info("Received SIGHUP. Reloading configuration at the next wait.")
+        state.request_reload()
+
+    def stop_daemon():
+        if upload_scheduler is not None:
+            upload_scheduler.wake_requested = False
+        state.request_stop()
+        return {'stopping': True}
+
+    def pause_daemon():
+        if upload_scheduler is not None:
+            upload_scheduler.wake_requested = False
+        state.pause()
+        logging.info("Uploads paused from the control endpoint.")
+        return {'paused': True, 'current_upload': current_upload}
+
+    def resume_daemon():
+        state.resume()
+        logging.info("Uploads resumed from the control endpoint.")
+        return {'paused': False}
+
+    def reload_daemon():
+        state.request_reload()
+        return {'reload_requested': True}
+
+    def unquarantine(filenames=()):
+        if not filenames:
+            raise ValueError("Name the file(s) to release from quarantine.")
+        released = [os.path.basename(name) for name in filenames if release_quarantined_video(name)]
+        return {'released': released, 'not_quarantined': [os.path.basename(name) for name in filenames if os.path.basename(name) not in released]}
+
+    def upload_now():
+        if state.stopping:
+            raise ValueError("The daemon is shutting down.")
+        if state.paused:
+            raise ValueError("Uploads are paused; resume first.")
+        if get_daily_upload_count() >= UPLOAD_TIMES_PER_DAY:
+            raise ValueError(f"The daily upload limit ({UPLOAD_TIMES_PER_DAY}) has been reached.")
+        if current_upload:
+            raise ValueError(f"An upload of '{current_upload['filename']}' is already running.")
+        get_upload_scheduler().wake_requested = True
+        state.interrupt.set()
+        logging.info("Upload requested from the control endpoint; running the next slot now.")
+        return {'upload_requested': True}
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+    signal.signal(signal.SIGHUP, handle_reload)
+
+    socket_path = args.socket or daemon_socket_path(CHANNEL_NAME)
+    try:
+        server = ControlServer({
+            'status': lambda: daemon_status(state),
+            'queue': daemon_queue,
+            'pause': pause_daemon,
+            'resume': resume_daemon,
+            'upload-now': upload_now,
+            'reload': reload_daemon,
+            'stop': stop_daemon,
+            'unquarantine': unquarantine,
+        }, socket_path=socket_path, tcp_port=args.port).start()
+    except DaemonAlreadyRunning as e:
+        logging.error(f"{e} Not starting a second daemon for channel '{CHANNEL_NAME}'.")
+        sys.exit(1)
+    logging.info(f"Daemon started for channel '{CHANNEL_NAME}' (pid {os.getpid()}); control socket '{socket_path}'.")
+
+    try:
+        while not state.stopping:
+            if state.take_reload_request():
+                reload_daemon_config(args.config, args.channel)
+            if state.paused:
+                state.activity = 'paused'
+                state.wait()
+                continue
+
+            if not can_upload_today(UPLOAD_TIMES_PER_DAY):
+                # Checked here rather than in schedule_daily_uploads so the limit email isn't re-sent on every pass.
+                state.activity = 'idle until the daily limit resets'
+                state.wait(max(0, next_local_midnight() - time.time()))
+                continue
+
+            state.activity = 'running upload slots'
+            if get_upload_scheduler().wake_requested:
+                state.interrupt.set() # An "upload now" that arrived while idle ends the first slot wait
+            schedule_daily_uploads(stop_event=state.interrupt)
+            if state.stopping or state.interrupt.is_set():
+                state.wait(0)
+                continue
+
+            # The day's slots are done or there is nothing to upload: idle until new videos may have
+            # arrived or the day rolls over, whichever comes first.
+            state.activity = 'idle'
+            state.wait(max(0, min(next_local_midnight(), time.time() + DAEMON_IDLE_RECHECK_SECONDS) - time.time()))
+    finally:
+        state.activity = 'stopped'
+        server.stop()
+        close_studio_session()
+        logging.info("Daemon stopped.")
+
+def daemon_socket_path(channel_name):
+    return DAEMON_SOCKET_PATH.format(channel=channel_name)
+
+def command_control(args):
+    """Sends a command to a running daemon and prints its JSON reply."""
+    import json
+    from daemon_control import send_control_command
+
+    try:
+        payload = {'filenames': args.filenames} if args.filenames else None
+        socket_path = args.socket or daemon_socket_path(args.channel or CHANNEL_NAME)
+        status, reply = send_control_command(args.action, socket_path=None if args.port else socket_path, tcp_port=args.port, payload=payload)
+    except OSError as e:
+        print(f"Could not reach the daemon on '{socket_path if not args.port else args.port}': {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(reply, indent=2))
+    if status != 200:
+        sys.exit(1)
+
+def run_cli(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Daily YouTube Shorts scheduler.")
+    subcommands = parser.add_subparsers(dest='command')
+    subcommands.add_parser('run', help="Run today's upload slots (the default).").set_defaults(handler=command_run)
+
+    status = subcommands.add_parser('status', help="Show today's progress and the next planned slots.")
+    status.add_argument('--limit', type=int, default=10, help="Pending slots to list.")
+    status.set_defaults(handler=command_status)
+
+    plan = subcommands.add_parser('plan', help="Plan missing days and list pending slots.")
+    plan.add_argument('--stats', action='store_true', help="Also show the per-hour failure rates and durations slots are weighted by.")
+    plan.set_defaults(handler=command_plan)
+
+    dry_run = subcommands.add_parser('dry-run', help="Show the next videos, titles and slots without uploading.")
+    dry_run.add_argument('-n', '--count', type=int, default=UPLOAD_TIMES_PER_DAY, help="Videos to show.")
+    dry_run.set_defaults(handler=command_dry_run)
+
+    mark_uploaded = subcommands.add_parser('mark-uploaded', help="Record videos as already uploaded.")
+    mark_uploaded.add_argument('filenames', nargs='+')
+    mark_uploaded.set_defaults(handler=command_mark_uploaded)
+
+    unquarantine = subcommands.add_parser('unquarantine', help="Release quarantined videos so they are uploaded again.")
+    unquarantine.add_argument('filenames', nargs='+')
+    unquarantine.set_defaults(handler=command_unquarantine)
+
+    batch = subcommands.add_parser('batch', help="Upload several videos in one browser session.")
+    batch.add_argument('-n', '--count', type=int, default=None, help="Videos to upload (default: the rest of today's limit).")
+    batch.add_argument('--schedule', action='store_true', help="Schedule each video to publish at a planned slot instead of now.")
+    batch.add_argument('--day', default=None, help="With --schedule, only use slots of this day (YYYY-MM-DD).")
+    batch.set_defaults(handler=command_batch)
+
+    daemon = subcommands.add_parser('daemon', help="Run continuously across days with a local control endpoint.")
+    daemon.add_argument('--socket', default=None, help="Unix socket for the control endpoint (default: the channel's DAEMON_SOCKET_PATH).")
+    daemon.add_argument('--port', type=int, default=DAEMON_CONTROL_PORT, help="Also serve the control endpoint on this localhost port.")
+    daemon.add_argument('--channel', help="Channel name from the channels config; re-read on SIGHUP.")
+    daemon.add_argument('--config', default=CHANNELS_CONFIG_FILE, help="Channels config file used with --channel.")
+    daemon.set_defaults(handler=command_daemon)
+
+    control = subcommands.add_parser('control', help="Query or steer a running daemon.")
+    control.add_argument('action', choices=('status', 'queue', 'pause', 'resume', 'upload-now', 'reload', 'stop', 'unquarantine'))
+    control.add_argument('filenames', nargs='*', help="For unquarantine: the files to release.")
+    control.add_argument('--channel', help="Channel whose daemon to reach (default: the channel set in main.py).")
+    control.add_argument('--socket', default=None, help="The daemon's control socket (overrides --channel).")
+    control.add_argument('--port', type=int, default=None, help="Use the daemon's localhost TCP port instead of the socket.")
+    control.set_defaults(handler=command_control)
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        args.handler = command_run
+    if args.command in (None, 'run', 'daemon', 'batch'):
+        setup_logging(automation_log_file, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT, compress=LOG_COMPRESS_BACKUPS)
+    else:
+        # The other commands print their own output and don't touch the log file.
+        setup_console_logging(logging.WARNING)
+    args.handler(args)
+
 if __name__ == "__main__":
-    schedule_daily_uploads()
\ No newline at end of file
+    run_cli()
\ No newline at end of file
@@ -0,0 +1,201 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implied.
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+class UploadTrace:
+    """
+    Timing record for one upload attempt. Each stage is wrapped in `span(name)`;
+    `finish` stamps the outcome and hands the record to the metrics sink.
+    """
+
+    def __init__(self, channel, filename=None, attempt=1):
+        self.channel = channel
+        self.filename = filename
+        self.attempt = attempt
+        self.file_size = None
+        self.started_at = time.time()
+        self.start_monotonic = time.monotonic()
+        self.stages = {}
+        self.outcome = None
+        self.failure_class = None
+        self.total_seconds = None
+
+    @contextmanager
+    def span(self, stage):
+        """Times the enclosed block as `stage`. Failed stages are recorded too, up to the point they raised."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(stage, time.monotonic() - start)
+
+    def add(self, stage, seconds):
+        """Records a stage timed elsewhere. Repeated stages accumulate."""
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def finish(self, outcome, failure_class=None):
+        self.outcome = outcome
+        self.failure_class = failure_class
+        self.total_seconds = time.monotonic() - self.start_monotonic
+
+    def to_record(self):
+        return {
+            'ts': round(self.started_at, 3),
+            'channel': self.channel,
+            'filename': self.filename,
+            'attempt': self.attempt,
+            'file_size': self.file_size,
+            'outcome': self.outcome,
+            'failure_class': self.failure_class,
+            'total_seconds': round(self.total_seconds, 3) if self.total_seconds is not None else None,
+            'stages': {stage: round(seconds, 3) for stage, seconds in self.stages.items()},
+        }
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus sense."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+
+class UploadMetrics:
+    """
+    Sink for finished UploadTraces.
+
+    Every trace is appended as one JSON line to `jsonl_path`, and per-stage
+    latency histograms plus outcome counters are rewritten to `textfile_path`
+    in Prometheus text exposition format (for node_exporter's textfile
+    collector). Either path may be None to disable that output. Histograms are
+    labelled by channel, so each channel worker should write its own textfile.
+    """
+
+    def __init__(self, channel, jsonl_path=None, textfile_path=None, buckets=DEFAULT_BUCKETS):
+        self.channel = channel
+        self.jsonl_path = jsonl_path
+        self.textfile_path = textfile_path
+        self.buckets = tuple(buckets)
+        self.histograms = {}
+        self.outcomes = {}
+        self.lock = threading.Lock()
+
+    def trace(self, filename=None, attempt=1):
+        return UploadTrace(self.channel, filename, attempt)
+
+    def record(self, trace):
+        """Writes a finished trace to the sinks. Never raises."""
+        record = trace.to_record()
+        with self.lock:
+            for stage, seconds in trace.stages.items():
+                self._histogram(stage).observe(seconds)
+            if trace.total_seconds is not None:
+                self._histogram('total').observe(trace.total_seconds)
+            key = (trace.outcome, trace.failure_class or '')
+            self.outcomes[key] = self.outcomes.get(key, 0) + 1
+            try:
+                if self.jsonl_path:
+                    self._append_jsonl(record)
+                if self.textfile_path:
+                    self._write_textfile()
+            except OSError as e:
+                logging.error(f"Could not write upload metrics: {e}")
+
+    def _histogram(self, stage):
+        if stage not in self.histograms:
+            self.histograms[stage] = Histogram(self.buckets)
+        return self.histograms[stage]
+
+    def _append_jsonl(self, record):
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        # One O_APPEND write per record keeps lines intact when several channel workers share the file.
+        fd = os.open(self.jsonl_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode())
+        finally:
+            os.close(fd)
+
+    def render_textfile(self):
+        channel = _escape_label(self.channel)
+        lines = [
+            "# HELP youtube_upload_stage_seconds Duration of each upload stage.",
+            "# TYPE youtube_upload_stage_seconds histogram",
+        ]
+        for stage in sorted(self.histograms):
+            hist = self.histograms[stage]
+            labels = f'channel="{channel}",stage="{_escape_label(stage)}"'
+            for upper, count in zip(hist.buckets, hist.counts):
+                lines.append(f'youtube_upload_stage_seconds_bucket{{{labels},le="{upper:g}"}} {count}')
+            lines.append(f'youtube_upload_stage_seconds_bucket{{{labels},le="+Inf"}} {hist.count}')
+            lines.append(f'youtube_upload_stage_seconds_sum{{{labels}}} {hist.sum:.6f}')
+            lines.append(f'youtube_upload_stage_seconds_count{{{labels}}} {hist.count}')
+
+        lines.append("# HELP youtube_upload_attempts_total Upload attempts by outcome and failure class.")
+        lines.append("# TYPE youtube_upload_attempts_total counter")
+        for (outcome, failure_class), count in sorted(self.outcomes.items()):
+            lines.append(
+                f'youtube_upload_attempts_total{{channel="{channel}",outcome="{_escape_label(outcome or "")}",'
+                f'failure_class="{_escape_label(failure_class)}"}} {count}'
+            )
+        return '\n'.join(lines) + '\n'
+
+    def _write_textfile(self):
+        # Write-then-rename so the collector never reads a half-written file.
+        tmp_path = f"{self.textfile_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.render_textfile())
+        os.replace(tmp_path, self.textfile_path)
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def load_records(jsonl_path, channel=None):
+    """Reads trace records back from a JSONL sink, skipping malformed lines."""
+    records = []
+    try:
+        with open(jsonl_path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if channel is None or record.get('channel') == channel:
+                    records.append(record)
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def stage_percentiles(records, quantiles=(0.5, 0.95)):
+    """Returns {stage: {quantile: seconds}} over the stage durations in `records` (nearest-rank)."""
+    durations = {}
+    for record in records:
+        for stage, seconds in record.get('stages', {}).items():
+            durations.setdefault(stage, []).append(seconds)
+        if record.get('total_seconds') is not None:
+            durations.setdefault('total', []).append(record['total_seconds'])
+
+    result = {}
+    for stage, values in durations.items():
+        values.sort()
+        result[stage] = {q: values[max(0, math.ceil(q * len(values)) - 1)] for q in quantiles}
+    return result
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the YouTube resumable-upload API and Google's OAuth token
+endpoint, for exercising the "resumable" uploader backend without an account.
+
+    python3 mock_upload_server.py --port 8765 --error-rate 0.1 --drop-rate 0.1
+
+Then point `youtube_oauth.json`'s token_uri at http://127.0.0.1:8765/token and
+RESUMABLE_UPLOAD_URL at http://127.0.0.1:8765/upload/youtube/v3/videos?uploadType=resumable.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_RANGE_PATTERN = re.compile(r'bytes (?:(\d+)-(\d+)|\*)/(\d+)')
+
+
+class UploadSession:
+    def __init__(self, metadata, total_size):
+        self.metadata = metadata
+        self.total_size = total_size
+        self.data = bytearray()
+        self.video_id = None
+
+
+class MockUploadServer:
+    """
+    Implements the parts of the resumable-upload protocol the uploader uses:
+    session start (POST, answered with a Location header), chunk PUTs with
+    Content-Range, 308 Resume Incomplete with a Range header, status queries
+    (`bytes */total`) and the final 200 with the video resource.
+
+    Faults are injected per chunk: with `error_rate` the chunk is answered
+    with 503 and discarded, with `drop_rate` only part of it is stored and the
+    connection is closed without a response.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, error_rate=0.0, drop_rate=0.0, token_lifetime=3600, seed=None):
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.token_lifetime = token_lifetime
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens = set()
+        self.sessions = {}
+        self.completed = {} # video id -> {'title', 'publish_at', 'size', 'sha256'}
+        self.stats = {'chunks': 0, 'errors_injected': 0, 'drops_injected': 0, 'status_queries': 0}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def token_uri(self):
+        return f"{self.base_url}/token"
+
+    @property
+    def upload_url(self):
+        return f"{self.base_url}/upload/youtube/v3/videos?uploadType=resumable&part=snippet,status"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="mock-upload-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = self._read_body()
+                if self.path == '/token':
+                    token = f"mock-token-{uuid.uuid4().hex}"
+                    with server.lock:
+                        server.tokens.add(token)
+                    self._send_json(200, {'access_token': token, 'expires_in': server.token_lifetime, 'token_type': 'Bearer'})
+                    return
+                if not self.path.startswith('/upload/youtube/v3/videos'):
+                    self._send_json(404, {'error': 'not found'})
+                    return
+                if not self._authorized():
+                    return
+                total = int(self.headers.get('X-Upload-Content-Length', '0'))
+                session_id = uuid.uuid4().hex
+                with server.lock:
+                    server.sessions[session_id] = UploadSession(json.loads(body or b'{}'), total)
+                self.send_response(200)
+                self.send_header('Location', f"/upload/session/{session_id}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def do_PUT(self):
+                session = server.sessions.get(self.path.rsplit('/', 1)[-1]) if self.path.startswith('/upload/session/') else None
+                if session is None:
+                    self._read_body()
+                    self._send_json(404, {'error': 'upload session not found'})
+                    return
+                if not self._authorized(drain=True):
+                    return
+                match = CONTENT_RANGE_PATTERN.fullmatch(self.headers.get('Content-Range', ''))
+                if match is None:
+                    self._read_body()
+                    self._send_json(400, {'error': 'missing or malformed Content-Range'})
+                    return
+
+                if match.group(1) is None:
+                    self._read_body()
+                    with server.lock:
+                        server.stats['status_queries'] += 1
+                    self._send_progress(session)
+                    return
+
+                start = int(match.group(1))
+                length = int(self.headers.get('Content-Length', '0'))
+                with server.lock:
+                    server.stats['chunks'] += 1
+                    roll = server.rng.random()
+                if roll < server.drop_rate:
+                    # Keep part of the chunk, then vanish mid-request as a dropped connection would.
+                    partial = self.rfile.read(length // 2)
+                    with server.lock:
+                        server.stats['drops_injected'] += 1
+                        if start == len(session.data):
+                            session.data.extend(partial)
+                    self.close_connection = True
+                    self.connection.shutdown(2)
+                    return
+                body = self._read_body()
+                if roll < server.drop_rate + server.error_rate:
+                    with server.lock:
+                        server.stats['errors_injected'] += 1
+                    self._send_json(503, {'error': 'backend error (injected)'})
+                    return
+                with server.lock:
+                    # Bytes that don't continue exactly where the stored data ends are ignored, like the real API.
+                    if start == len(session.data):
+                        session.data.extend(body)
+                self._send_progress(session)
+
+            def _send_progress(self, session):
+                if len(session.data) >= session.total_size:
+                    with server.lock:
+                        if session.video_id is None:
+                            session.video_id = uuid.uuid4().hex[:11]
+                            server.completed[session.video_id] = {
+                                'title': session.metadata.get('snippet', {}).get('title'),
+                                'publish_at': session.metadata.get('status', {}).get('publishAt'),
+                                'size': len(session.data),
+                                'sha256': hashlib.sha256(session.data).hexdigest(),
+                            }
+                    self._send_json(200, {'id': session.video_id, 'snippet': session.metadata.get('snippet', {})})
+                    return
+                self.send_response(308)
+                if session.data:
+                    self.send_header('Range', f"bytes=0-{len(session.data) - 1}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def _authorized(self, drain=False):
+                token = self.headers.get('Authorization', '').removeprefix('Bearer ')
+                if token in server.tokens:
+                    return True
+                if drain:
+                    self._read_body()
+                self._send_json(401, {'error': 'invalid credentials'})
+                return False
+
+            def _read_body(self):
+                return self.rfile.read(int(self.headers.get('Content-Length', '0')))
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock YouTube resumable-upload server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of chunks answered with 503.")
+    parser.add_argument('--drop-rate', type=float, default=0.0, help="Fraction of chunks cut off mid-transfer.")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    server = MockUploadServer(args.host, args.port, args.error_rate, args.drop_rate, seed=args.seed)
+    print(f"Token URI:  {server.token_uri}")
+    print(f"Upload URL: {server.upload_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps({'stats': server.stats, 'completed': server.completed}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
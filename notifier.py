@@ -0,0 +1,193 @@
+import logging
+import smtplib
+import ssl
+import threading
+import time
+from email.message import EmailMessage
+
+
+class NotificationQueue:
+    """
+    Background email notifier that never blocks the upload path.
+
+    `enqueue` only writes the message to the state store; a worker thread sends
+    it over one reused, authenticated SMTP connection. Messages that share a
+    `digest_key` (e.g. repeated failures of the same video) are held for up to
+    `digest_window` seconds and sent as a single digest. Unsent messages survive
+    restarts because they live in the store until delivered.
+    """
+
+    def __init__(self, store, sender, recipient, password, smtp_host='smtp.gmail.com', smtp_port=465,
+                 use_ssl=True, starttls=False, digest_window=1800, idle_disconnect=120, retry_delay=60):
+        """
+        Args:
+            store (StateStore): Persists queued messages until they are delivered.
+            sender (str): From address, also used as the SMTP login.
+            recipient (str): To address.
+            password (str): SMTP password. Login is skipped when empty (local test servers).
+            smtp_host (str), smtp_port (int): SMTP server to deliver through.
+            use_ssl (bool): Connect with implicit TLS (SMTP_SSL).
+            starttls (bool): Upgrade a plain connection with STARTTLS.
+            digest_window (int): Seconds to coalesce messages sharing a digest key.
+            idle_disconnect (int): Close the pooled connection after this long without traffic.
+            retry_delay (int): Base delay before retrying a failed delivery (doubles per attempt).
+        """
+        self.store = store
+        self.sender = sender
+        self.recipient = recipient
+        self.password = password
+        self.smtp_host = smtp_host
+        self.smtp_port = smtp_port
+        self.use_ssl = use_ssl
+        self.starttls = starttls
+        self.digest_window = digest_window
+        self.idle_disconnect = idle_disconnect
+        self.retry_delay = retry_delay
+        self.smtp = None
+        self.last_used = 0.0
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    # --- Producer side ---
+
+    def enqueue(self, subject, body, digest_key=None):
+        """Queues a message for delivery. Never raises."""
+        try:
+            self.store.enqueue_notification(subject, body, digest_key, time.time())
+            self.wakeup.set()
+        except Exception as e:
+            logging.error(f"Could not queue email notification '{subject}': {e}")
+
+    def start(self):
+        if self.thread is None:
+            self.stopping.clear()
+            self.thread = threading.Thread(target=self._run, name="email-notifier", daemon=True)
+            self.thread.start()
+
+    def stop(self, timeout=30):
+        """Flushes everything pending (digests included) and stops the worker."""
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.wakeup.set()
+        self.thread.join(timeout)
+        self.thread = None
+
+    # --- Worker side ---
+
+    def _run(self):
+        while True:
+            flush_all = self.stopping.is_set()
+            try:
+                next_due = self._deliver_due(flush_all)
+            except Exception as e:
+                logging.error(f"Email notifier error: {e}")
+                next_due = time.time() + self.retry_delay
+            if flush_all:
+                self._disconnect()
+                return
+
+            if self.smtp is not None and time.time() - self.last_used > self.idle_disconnect:
+                self._disconnect()
+            timeout = self.idle_disconnect if next_due is None else max(0.0, next_due - time.time())
+            self.wakeup.wait(min(timeout, self.idle_disconnect))
+            self.wakeup.clear()
+
+    def _deliver_due(self, flush_all):
+        """
+        Sends every message that is due. Returns the time the next held message
+        becomes due, or None if nothing is waiting.
+        """
+        now = time.time()
+        pending = self.store.pending_notifications()
+        if not pending:
+            return None
+
+        groups = {}
+        for row in pending:
+            key = row['digest_key'] or f"single:{row['id']}"
+            groups.setdefault(key, []).append(row)
+
+        # Anything not held for a digest forces held digests out with it, so one
+        # connection carries them all and they arrive in order.
+        immediate = any(row['digest_key'] is None and row['next_attempt_at'] <= now for row in pending)
+        next_due = None
+        for key, rows in sorted(groups.items(), key=lambda item: item[1][0]['id']):
+            retry_at = max(row['next_attempt_at'] for row in rows)
+            if rows[0]['digest_key'] is None:
+                due_at = retry_at
+            else:
+                due_at = max(rows[0]['created_at'] + self.digest_window, retry_at)
+                if immediate and retry_at <= now:
+                    due_at = now
+            if not flush_all and due_at > now:
+                next_due = due_at if next_due is None else min(next_due, due_at)
+                continue
+
+            ids = [row['id'] for row in rows]
+            subject, body = self._compose(rows)
+            try:
+                self._send(subject, body)
+            except Exception as e:
+                attempts = max(row['attempts'] for row in rows) + 1
+                retry_at = now + min(self.retry_delay * 2 ** (attempts - 1), 3600)
+                self.store.defer_notifications(ids, attempts, retry_at)
+                self._disconnect()
+                logging.error(f"Failed to send email notification '{subject}' (attempt {attempts}): {e}")
+                logging.error("Please check your email configuration (sender email, password, recipient, SMTP server/port).")
+                next_due = retry_at if next_due is None else min(next_due, retry_at)
+                if flush_all:
+                    return next_due
+                continue
+            self.store.delete_notifications(ids)
+            logging.info(f"Email notification sent successfully to {self.recipient}: '{subject}'.")
+        return next_due
+
+    def _compose(self, rows):
+        if len(rows) == 1:
+            return rows[0]['subject'], rows[0]['body']
+        subject = f"{rows[-1]['subject']} ({len(rows)} notifications)"
+        parts = []
+        for row in rows:
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(row['created_at']))
+            parts.append(f"--- {stamp} ---\n{row['body']}")
+        return subject, f"{len(rows)} notifications were combined into this digest.\n\n" + "\n\n".join(parts)
+
+    # --- SMTP connection pooling ---
+
+    def _connect(self):
+        if self.use_ssl:
+            smtp = smtplib.SMTP_SSL(self.smtp_host, self.smtp_port, context=ssl.create_default_context(), timeout=30)
+        else:
+            smtp = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=30)
+            if self.starttls:
+                smtp.starttls(context=ssl.create_default_context())
+        if self.password:
+            smtp.login(self.sender, self.password)
+        return smtp
+
+    def _send(self, subject, body):
+        em = EmailMessage()
+        em['From'] = self.sender
+        em['To'] = self.recipient
+        em['Subject'] = subject
+        em.set_content(body)
+
+        if self.smtp is not None:
+            try:
+                self.smtp.noop()
+            except (smtplib.SMTPException, OSError):
+                self._disconnect()
+        if self.smtp is None:
+            self.smtp = self._connect()
+        self.smtp.send_message(em)
+        self.last_used = time.time()
+
+    def _disconnect(self):
+        smtp, self.smtp = self.smtp, None
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except Exception:
+                pass
@@ -0,0 +1,299 @@
+import fcntl
+import fnmatch
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+
+# What YouTube Studio needs to find the account signed in. Everything else in a
+# profile (HTTP cache, history, favicons, extensions, crash reports) is left out.
+SNAPSHOT_SQLITE_FILES = ('cookies.sqlite', 'webappsstore.sqlite', 'permissions.sqlite', 'cert9.db', 'key4.db')
+SNAPSHOT_PLAIN_FILES = (
+    'prefs.js', 'user.js', 'compatibility.ini', 'times.json', 'containers.json',
+    'sessionstore.jsonlz4', 'sessionstore-backups/recovery.jsonlz4',
+)
+SNAPSHOT_STORAGE_ORIGINS = ('https+++*youtube.com*', 'https+++*google.com*') # Per-origin localStorage/IndexedDB under storage/default
+COOKIE_DB = 'cookies.sqlite'
+
+
+def default_snapshot_root():
+    """/dev/shm when it is available (tmpfs on Linux), else the system temp dir."""
+    base = '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else tempfile.gettempdir()
+    return os.path.join(base, 'yt-shorts-profiles')
+
+
+def copy_sqlite(source, destination):
+    """
+    Copies a SQLite database consistently with the online backup API, so a
+    database open in a running browser (with a WAL) is still copied whole.
+    Falls back to copying the file and its WAL if the source can't be opened.
+    """
+    tmp_path = f"{destination}.tmp-{os.getpid()}"
+    try:
+        src = sqlite3.connect(f"file:{source}?mode=ro", uri=True, timeout=5)
+        try:
+            dst = sqlite3.connect(tmp_path)
+            try:
+                src.backup(dst)
+            finally:
+                dst.close()
+        finally:
+            src.close()
+        os.replace(tmp_path, destination)
+    except sqlite3.Error as e:
+        logging.debug(f"SQLite backup of '{source}' failed ({e}); copying the files instead.")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        shutil.copy2(source, destination)
+        if os.path.exists(f"{source}-wal"):
+            shutil.copy2(f"{source}-wal", f"{destination}-wal")
+
+
+def backup_sqlite_into(source, destination):
+    """
+    Overwrites the database at `destination` in place through SQLite, so its
+    WAL and locks are honoured (unlike replacing the file underneath them).
+    """
+    src = sqlite3.connect(f"file:{source}?mode=ro", uri=True, timeout=5)
+    try:
+        dst = sqlite3.connect(destination, timeout=5)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ProfileSnapshot:
+    """
+    Trimmed copy of a Firefox profile kept on tmpfs, handed out as one private
+    copy per worker process.
+
+    Launching on the full profile is slow (large caches and history databases)
+    and only one browser can hold a profile's lock at a time. Instead, the
+    files Studio needs for auth are copied into a master snapshot under
+    `root`, which is rebuilt whenever any of those files change in the source
+    profile. Each process launches Firefox on its own copy of the master.
+
+    When a browser is closed, its cookies go back into the master, so rotated
+    Google session cookies carry over to the next launch. The source profile
+    is only read, unless `write_back` is set: then the cookies are also written
+    into it, through SQLite and only while holding the profile's lock (so never
+    while a Firefox has it open) and if it hasn't changed since the snapshot.
+    Snapshot work across processes is serialised by an flock in the snapshot
+    directory.
+    """
+
+    def __init__(self, source_profile, root=None, write_back=False):
+        """
+        Args:
+            source_profile (str): The real Firefox profile directory.
+            root (str): Parent directory for snapshots (default_snapshot_root() if None).
+            write_back (bool): Also write rotated cookies back into the source profile.
+        """
+        self.source_profile = os.path.abspath(os.path.expanduser(source_profile))
+        self.write_back = write_back
+        profile_key = hashlib.sha1(self.source_profile.encode()).hexdigest()[:10]
+        self.directory = os.path.join(root or default_snapshot_root(), f"{os.path.basename(self.source_profile)}-{profile_key}")
+        self.master_dir = os.path.join(self.directory, 'master')
+        self.worker_dir = os.path.join(self.directory, f"worker-{os.getpid()}")
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+
+    # --- Source profile ---
+
+    def source_files(self):
+        """Relative paths of the snapshot's files that exist in the source profile."""
+        paths = [name for name in SNAPSHOT_SQLITE_FILES + SNAPSHOT_PLAIN_FILES
+                 if os.path.isfile(os.path.join(self.source_profile, name))]
+        storage_root = os.path.join(self.source_profile, 'storage', 'default')
+        if os.path.isdir(storage_root):
+            for origin in sorted(os.listdir(storage_root)):
+                if not any(fnmatch.fnmatch(origin, pattern) for pattern in SNAPSHOT_STORAGE_ORIGINS):
+                    continue
+                for dirpath, _, filenames in os.walk(os.path.join(storage_root, origin)):
+                    for filename in sorted(filenames):
+                        paths.append(os.path.relpath(os.path.join(dirpath, filename), self.source_profile))
+        return paths
+
+    def source_signature(self):
+        """Digest of the size and mtime of every snapshot file (and SQLite WAL) in the source profile."""
+        h = hashlib.sha1()
+        for relpath in self.source_files():
+            for path in (os.path.join(self.source_profile, relpath), os.path.join(self.source_profile, f"{relpath}-wal")):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                h.update(f"{os.path.relpath(path, self.source_profile)}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+        return h.hexdigest()
+
+    def source_in_use(self):
+        """True if a running Firefox holds the source profile's lock."""
+        lock_path = os.path.join(self.source_profile, 'lock')
+        try:
+            target = os.readlink(lock_path) # Firefox on Linux: a symlink to "<ip>:+<pid>"
+        except OSError:
+            return False
+        try:
+            return pid_alive(int(target.rsplit('+', 1)[-1]))
+        except ValueError:
+            return True
+
+    @contextmanager
+    def source_locked(self):
+        """
+        Holds the source profile's lock the way Firefox does (a POSIX lock on
+        .parentlock). Yields False, without waiting, if a Firefox or another
+        worker holds the profile.
+        """
+        fd = os.open(os.path.join(self.source_profile, '.parentlock'), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+            try:
+                yield not self.source_in_use()
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    # --- Snapshots ---
+
+    @contextmanager
+    def locked(self):
+        fd = os.open(os.path.join(self.directory, '.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _read_marker(self, directory, name):
+        try:
+            with open(os.path.join(directory, name), 'r') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _write_marker(self, directory, name, value):
+        with open(os.path.join(directory, name), 'w') as f:
+            f.write(value)
+
+    def refresh(self):
+        """Rebuilds the master snapshot if the source profile changed since it was taken. Returns True if rebuilt."""
+        with self.locked():
+            return self._refresh()
+
+    def _refresh(self):
+        signature = self.source_signature()
+        if os.path.isdir(self.master_dir) and self._read_marker(self.master_dir, '.source-signature') == signature:
+            return False
+
+        start = time.monotonic()
+        building = f"{self.master_dir}.building"
+        shutil.rmtree(building, ignore_errors=True)
+        os.makedirs(building, mode=0o700)
+        copied = 0
+        for relpath in self.source_files():
+            source = os.path.join(self.source_profile, relpath)
+            destination = os.path.join(building, relpath)
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            try:
+                if relpath in SNAPSHOT_SQLITE_FILES:
+                    copy_sqlite(source, destination)
+                else:
+                    shutil.copy2(source, destination)
+                copied += 1
+            except OSError as e:
+                logging.warning(f"Could not copy '{relpath}' into the profile snapshot: {e}")
+        self._write_marker(building, '.source-signature', signature)
+        self._write_marker(building, '.generation', str(time.time_ns()))
+
+        shutil.rmtree(self.master_dir, ignore_errors=True)
+        os.rename(building, self.master_dir)
+        logging.info(f"Profile snapshot of '{self.source_profile}' rebuilt in {self.directory} "
+                     f"({copied} files, {time.monotonic() - start:.2f}s).")
+        return True
+
+    def checkout(self):
+        """
+        Returns this process's private profile copy, refreshing the master from
+        the source first. An existing copy is kept (with whatever the browser
+        stored in it) unless the master has been rebuilt or updated since.
+        """
+        with self.locked():
+            self._refresh()
+            self._remove_stale_workers()
+            generation = self._read_marker(self.master_dir, '.generation')
+            if self._read_marker(self.worker_dir, '.generation') != generation:
+                shutil.rmtree(self.worker_dir, ignore_errors=True)
+                shutil.copytree(self.master_dir, self.worker_dir)
+        return self.worker_dir
+
+    def checkin(self):
+        """
+        Called after the browser using this process's copy has quit: carries
+        its cookies back into the master and, with `write_back`, the source.
+        """
+        worker_cookies = os.path.join(self.worker_dir, COOKIE_DB)
+        if not os.path.isfile(worker_cookies):
+            return
+        with self.locked():
+            try:
+                copy_sqlite(worker_cookies, os.path.join(self.master_dir, COOKIE_DB))
+            except OSError as e:
+                logging.warning(f"Could not carry browser cookies back into the profile snapshot: {e}")
+                return
+            if self.write_back:
+                self._write_back_source(worker_cookies)
+            generation = str(time.time_ns())
+            self._write_marker(self.master_dir, '.generation', generation)
+            self._write_marker(self.worker_dir, '.generation', generation)
+
+    def _write_back_source(self, worker_cookies):
+        if self.source_signature() != self._read_marker(self.master_dir, '.source-signature'):
+            logging.info("Source Firefox profile changed while the snapshot was in use; its cookies were left as they are.")
+            return
+        with self.source_locked() as free:
+            if not free:
+                logging.info("Source Firefox profile is in use; its cookies were left as they are.")
+                return
+            try:
+                backup_sqlite_into(worker_cookies, os.path.join(self.source_profile, COOKIE_DB))
+            except sqlite3.Error as e:
+                logging.warning(f"Could not write browser cookies back into the source profile: {e}")
+                return
+        self._write_marker(self.master_dir, '.source-signature', self.source_signature())
+
+    def _remove_stale_workers(self):
+        for name in os.listdir(self.directory):
+            if name.startswith('worker-'):
+                try:
+                    pid = int(name[len('worker-'):])
+                except ValueError:
+                    continue
+                if pid != os.getpid() and not pid_alive(pid):
+                    shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def discard(self):
+        """Deletes this process's copy (e.g. at exit); the master is kept for the next run."""
+        shutil.rmtree(self.worker_dir, ignore_errors=True)
@@ -0,0 +1,324 @@
+import datetime
+import hashlib
+import http.client
+import json
+import logging
+import os
+import time
+import urllib.parse
+
+from retry_policy import FAILURE_AUTH, FAILURE_BAD_FILE, FAILURE_TRANSIENT, UploadFailure
+from uploader import UploaderBackend
+
+YOUTUBE_RESUMABLE_UPLOAD_URL = "https://www.googleapis.com/upload/youtube/v3/videos?uploadType=resumable&part=snippet,status"
+GOOGLE_TOKEN_URI = "https://oauth2.googleapis.com/token"
+CHUNK_GRANULARITY = 256 * 1024 # Resumable chunks must be multiples of this, except the last one
+SEND_BLOCK_SIZE = 64 * 1024 # Bytes read from disk per socket write while streaming a chunk
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+def open_connection(url, timeout):
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme == 'https':
+        return http.client.HTTPSConnection(parts.netloc, timeout=timeout)
+    return http.client.HTTPConnection(parts.netloc, timeout=timeout)
+
+
+def request_target(url):
+    parts = urllib.parse.urlsplit(url)
+    return urllib.parse.urlunsplit(('', '', parts.path or '/', parts.query, ''))
+
+
+def parse_range_header(value):
+    """Returns the next byte offset from a 308 `Range: bytes=0-N` header (0 if nothing was stored)."""
+    if not value or not value.startswith('bytes='):
+        return 0
+    return int(value.split('-', 1)[1]) + 1
+
+
+class OAuthCredentials:
+    """
+    OAuth 2.0 refresh-token credentials. The access token is refreshed on first
+    use, shortly before it expires, and whenever the server rejects it.
+    """
+
+    def __init__(self, client_id, client_secret, refresh_token, token_uri=GOOGLE_TOKEN_URI, timeout=30):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.refresh_token = refresh_token
+        self.token_uri = token_uri
+        self.timeout = timeout
+        self.token = None
+        self.expires_at = 0.0
+
+    @classmethod
+    def from_file(cls, path):
+        """Loads client_id, client_secret, refresh_token and optionally token_uri from a JSON file."""
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return cls(data['client_id'], data['client_secret'], data['refresh_token'],
+                   data.get('token_uri', GOOGLE_TOKEN_URI))
+
+    def access_token(self):
+        if self.token is None or time.time() > self.expires_at - 60:
+            self.refresh()
+        return self.token
+
+    def refresh(self):
+        body = urllib.parse.urlencode({
+            'grant_type': 'refresh_token',
+            'client_id': self.client_id,
+            'client_secret': self.client_secret,
+            'refresh_token': self.refresh_token,
+        })
+        conn = open_connection(self.token_uri, self.timeout)
+        try:
+            conn.request('POST', request_target(self.token_uri), body=body,
+                         headers={'Content-Type': 'application/x-www-form-urlencoded'})
+            response = conn.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            raise UploadFailure(FAILURE_TRANSIENT, f"Could not reach the OAuth token endpoint: {e}") from e
+        finally:
+            conn.close()
+
+        if response.status in RETRYABLE_STATUSES:
+            raise UploadFailure(FAILURE_TRANSIENT, f"OAuth token endpoint returned HTTP {response.status}.")
+        if response.status != 200:
+            raise UploadFailure(FAILURE_AUTH, f"OAuth token refresh was rejected (HTTP {response.status}): {payload[:200]!r}")
+        data = json.loads(payload)
+        self.token = data['access_token']
+        self.expires_at = time.time() + data.get('expires_in', 3600)
+        logging.info("Refreshed OAuth access token.")
+
+
+class ResumableUploader(UploaderBackend):
+    """
+    Uploads through the YouTube Data API resumable-upload protocol instead of
+    a browser.
+
+    The file is streamed from disk in `chunk_size` pieces, each sent as one PUT
+    with a Content-Range header. After a dropped connection or a 5xx the server
+    is asked how many bytes it has (`Content-Range: bytes */total`), and the
+    upload continues from the last acknowledged byte. Session URIs are kept in
+    the state store, so a later retry of the same file resumes the same session
+    instead of starting over.
+    """
+
+    name = 'resumable'
+
+    def __init__(self, credentials, upload_url=YOUTUBE_RESUMABLE_UPLOAD_URL, store=None, chunk_size=8 * 1024 * 1024,
+                 privacy_status='public', category_id='22', max_stalled_retries=5, retry_delay=2.0, timeout=60):
+        """
+        Args:
+            credentials (OAuthCredentials): Source of bearer tokens.
+            upload_url (str): Endpoint that starts a resumable session.
+            store (StateStore): Optional; persists session URIs for resuming across attempts.
+            chunk_size (int): Bytes per PUT, rounded down to a multiple of 256 KiB.
+            privacy_status (str): 'public', 'unlisted' or 'private'.
+            category_id (str): YouTube video category.
+            max_stalled_retries (int): Consecutive failed chunks without progress before giving up.
+            retry_delay (float): Base delay between chunk retries (doubles per stalled retry).
+            timeout (float): Socket timeout in seconds.
+        """
+        self.credentials = credentials
+        self.upload_url = upload_url
+        self.store = store
+        self.chunk_size = max(CHUNK_GRANULARITY, chunk_size // CHUNK_GRANULARITY * CHUNK_GRANULARITY)
+        self.privacy_status = privacy_status
+        self.category_id = category_id
+        self.max_stalled_retries = max_stalled_retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.conn = None
+        self.last_video_id = None
+
+    # --- UploaderBackend ---
+
+    def upload(self, video_path, title, trace, publish_at=None):
+        st = os.stat(video_path)
+        channel = self.store.channel if self.store is not None else ''
+        # The metadata is part of the key: a session started with a different title or publish time must not be resumed.
+        title_hash = hashlib.sha1(f"{title}|{publish_at}".encode()).hexdigest()[:12]
+        session_key = f"resumable_session:{channel}:{os.path.basename(video_path)}:{st.st_size}:{int(st.st_mtime)}:{title_hash}"
+
+        with trace.span('session_start'):
+            session_uri = self._load_session(session_key)
+            if session_uri is None:
+                session_uri = self._start_session(title, st.st_size, publish_at)
+                self._save_session(session_key, session_uri)
+            else:
+                logging.info("Resuming a previously started upload session.")
+
+        with trace.span('file_transfer'):
+            try:
+                self.last_video_id = self._transfer(session_uri, video_path, st.st_size)
+            except SessionExpired:
+                logging.warning("Upload session expired. Starting a new one.")
+                session_uri = self._start_session(title, st.st_size, publish_at)
+                self._save_session(session_key, session_uri)
+                self.last_video_id = self._transfer(session_uri, video_path, st.st_size)
+        self._forget_session(session_key)
+        logging.info(f"Resumable upload complete. Video id: {self.last_video_id}")
+
+    def release(self, upload_successful):
+        self._disconnect()
+
+    def close(self):
+        self._disconnect()
+
+    # --- Protocol ---
+
+    def _start_session(self, title, size, publish_at=None):
+        status = {'privacyStatus': self.privacy_status, 'selfDeclaredMadeForKids': False}
+        if publish_at is not None:
+            # The API only accepts a publish time on private videos; YouTube makes them public at that time.
+            status['privacyStatus'] = 'private'
+            status['publishAt'] = datetime.datetime.fromtimestamp(publish_at, datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        metadata = json.dumps({
+            'snippet': {'title': title, 'categoryId': self.category_id},
+            'status': status,
+        })
+        response, payload = self._request('POST', self.upload_url, metadata, {
+            'Content-Type': 'application/json; charset=UTF-8',
+            'X-Upload-Content-Length': str(size),
+            'X-Upload-Content-Type': 'video/*',
+        })
+        if response.status != 200 or not response.getheader('Location'):
+            self._raise_for_status(response, payload, "Starting the upload session")
+        return urllib.parse.urljoin(self.upload_url, response.getheader('Location'))
+
+    def _transfer(self, session_uri, video_path, size):
+        """Streams the file from the server's current offset. Returns the created video id."""
+        offset = self._query_offset(session_uri, size)
+        stalled = 0
+        with open(video_path, 'rb') as f:
+            while True:
+                end = min(offset + self.chunk_size, size) - 1
+                try:
+                    response, payload = self._put_chunk(session_uri, f, offset, end, size)
+                except (OSError, http.client.HTTPException) as e:
+                    response, payload = None, str(e)
+
+                if response is not None and response.status in (200, 201):
+                    return json.loads(payload or b'{}').get('id')
+                if response is not None and response.status == 308:
+                    offset = parse_range_header(response.getheader('Range'))
+                    stalled = 0
+                    continue
+                if response is not None and response.status == 401 and stalled == 0:
+                    # Token expired mid-upload; refresh it and re-sync the offset once before treating it as fatal.
+                    self.credentials.refresh()
+                    stalled += 1
+                    offset = self._query_offset(session_uri, size)
+                    continue
+                if response is not None and response.status not in RETRYABLE_STATUSES:
+                    self._raise_for_status(response, payload, "Uploading a chunk")
+
+                stalled += 1
+                if stalled > self.max_stalled_retries:
+                    raise UploadFailure(FAILURE_TRANSIENT, f"Upload stalled at byte {offset} of {size} after {stalled - 1} retries: {payload}")
+                delay = self.retry_delay * 2 ** (stalled - 1)
+                logging.warning(f"Chunk at byte {offset} failed ({response.status if response is not None else payload}). Resuming in {delay:.0f}s...")
+                time.sleep(delay)
+                self._disconnect()
+                acknowledged = self._query_offset(session_uri, size)
+                if acknowledged > offset:
+                    # Part of the failed chunk was stored; that counts as progress.
+                    stalled = 0
+                offset = acknowledged
+
+    def _query_offset(self, session_uri, size):
+        """Asks the server how many bytes of the session it has stored."""
+        try:
+            response, payload = self._request('PUT', session_uri, b'', {'Content-Range': f"bytes */{size}"})
+        except (OSError, http.client.HTTPException) as e:
+            raise UploadFailure(FAILURE_TRANSIENT, f"Could not query the upload session: {e}") from e
+        if response.status == 308:
+            return parse_range_header(response.getheader('Range'))
+        if response.status in (200, 201):
+            return size
+        self._raise_for_status(response, payload, "Querying the upload session")
+
+    def _put_chunk(self, session_uri, f, start, end, size):
+        length = end - start + 1
+        conn = self._connection(session_uri)
+        conn.putrequest('PUT', request_target(session_uri))
+        conn.putheader('Authorization', f"Bearer {self.credentials.access_token()}")
+        conn.putheader('Content-Length', str(length))
+        conn.putheader('Content-Range', f"bytes {start}-{end}/{size}")
+        conn.endheaders()
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            block = f.read(min(SEND_BLOCK_SIZE, remaining))
+            if not block:
+                raise UploadFailure(FAILURE_BAD_FILE, "Video file shrank while it was being uploaded.")
+            conn.send(block)
+            remaining -= len(block)
+        return self._read_response(conn)
+
+    def _request(self, method, url, body, headers, retry_auth=True):
+        conn = self._connection(url)
+        headers = dict(headers, Authorization=f"Bearer {self.credentials.access_token()}")
+        try:
+            conn.request(method, request_target(url), body=body, headers=headers)
+            response, payload = self._read_response(conn)
+        except (OSError, http.client.HTTPException):
+            self._disconnect()
+            raise
+        if response.status == 401 and retry_auth:
+            self.credentials.refresh()
+            return self._request(method, url, body, headers, retry_auth=False)
+        return response, payload
+
+    def _read_response(self, conn):
+        response = conn.getresponse()
+        payload = response.read()
+        if response.getheader('Connection', '').lower() == 'close':
+            self._disconnect()
+        return response, payload
+
+    def _raise_for_status(self, response, payload, action):
+        message = f"{action} failed with HTTP {response.status}: {payload[:300]!r}"
+        if response.status in (404, 410):
+            raise SessionExpired(message)
+        if response.status in (401, 403) and b'quota' not in payload.lower():
+            raise UploadFailure(FAILURE_AUTH, message)
+        if response.status in RETRYABLE_STATUSES or response.status == 403:
+            raise UploadFailure(FAILURE_TRANSIENT, message)
+        raise UploadFailure(FAILURE_BAD_FILE, message)
+
+    # --- Connection and session bookkeeping ---
+
+    def _connection(self, url):
+        netloc = urllib.parse.urlsplit(url).netloc
+        if self.conn is not None and self.conn.host_netloc != netloc:
+            self._disconnect()
+        if self.conn is None:
+            self.conn = open_connection(url, self.timeout)
+            self.conn.host_netloc = netloc
+        return self.conn
+
+    def _disconnect(self):
+        conn, self.conn = self.conn, None
+        if conn is not None:
+            conn.close()
+
+    def _load_session(self, key):
+        return self.store.get_meta(key) if self.store is not None else None
+
+    def _save_session(self, key, session_uri):
+        if self.store is not None:
+            self.store.set_meta(key, session_uri)
+
+    def _forget_session(self, key):
+        if self.store is not None:
+            self.store.delete_meta(key)
+
+
+class SessionExpired(UploadFailure):
+    """The server no longer knows the upload session (HTTP 404/410); a new one has to be started."""
+
+    def __init__(self, message):
+        super().__init__(FAILURE_TRANSIENT, message)
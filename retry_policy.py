@@ -0,0 +1,126 @@
+import logging
+import os
+import random
+import time
+
+# Failure classes for upload attempts.
+FAILURE_TRANSIENT = 'transient'   # Network hiccups, stalled transfers, crashed browser sessions
+FAILURE_LAYOUT = 'layout'         # Studio markup changed: selectors missing or not interactable
+FAILURE_AUTH = 'auth'             # Profile is logged out or Google wants re-verification
+FAILURE_BAD_FILE = 'bad_file'     # The video itself is missing, unreadable or rejected by Studio (its folder is fine)
+FAILURE_CATEGORIES = (FAILURE_TRANSIENT, FAILURE_LAYOUT, FAILURE_AUTH, FAILURE_BAD_FILE)
+
+# Selenium exception class names, matched by name so this module doesn't need Selenium installed.
+LAYOUT_EXCEPTIONS = {
+    'NoSuchElementException', 'ElementNotInteractableException', 'ElementClickInterceptedException',
+    'StaleElementReferenceException', 'InvalidSelectorException', 'TimeoutException',
+}
+TRANSIENT_MESSAGE_MARKERS = ('stalled', 'did not complete within', 'neterror', 'ns_error', 'connection', 'timed out', 'daily upload limit')
+AUTH_URL_MARKERS = ('accounts.google.com', 'ServiceLogin', '/signin')
+BAD_FILE_MESSAGE_MARKERS = ('upload failed', 'processing abandoned', 'pre-flight')
+
+
+class UploadFailure(Exception):
+    """An upload attempt failed with a known failure class."""
+
+    def __init__(self, category, message):
+        super().__init__(message)
+        self.category = category
+
+
+def classify_failure(exc):
+    """Maps an exception raised by an upload attempt to one of FAILURE_CATEGORIES."""
+    if isinstance(exc, UploadFailure):
+        return exc.category
+    if isinstance(exc, (FileNotFoundError, IsADirectoryError, PermissionError)):
+        # An unmounted or unreadable video folder fails every file the same way and is usually temporary.
+        if not exc.filename or not directory_accessible(os.path.dirname(os.path.abspath(exc.filename))):
+            return FAILURE_TRANSIENT
+        return FAILURE_BAD_FILE
+
+    message = str(exc).lower()
+    if any(marker.lower() in message for marker in AUTH_URL_MARKERS):
+        return FAILURE_AUTH
+    if any(marker in message for marker in BAD_FILE_MESSAGE_MARKERS):
+        return FAILURE_BAD_FILE
+    if any(marker in message for marker in TRANSIENT_MESSAGE_MARKERS):
+        return FAILURE_TRANSIENT
+
+    if {cls.__name__ for cls in type(exc).__mro__} & LAYOUT_EXCEPTIONS:
+        return FAILURE_LAYOUT
+    # Anything else (driver/session errors, dropped connections, unknown errors) is worth retrying.
+    return FAILURE_TRANSIENT
+
+
+def directory_accessible(path):
+    """True if `path` is a directory this process can list and open files in."""
+    return os.path.isdir(path) and os.access(path, os.R_OK | os.X_OK)
+
+
+class RetryPolicy:
+    """Per-failure-class exponential backoff with jitter and an attempt budget."""
+
+    def __init__(self, policies, jitter=0.2, rng=random):
+        """
+        Args:
+            policies (dict): category -> {'base_delay', 'max_delay', 'max_attempts'}.
+            jitter (float): Relative +/- randomisation applied to every delay.
+        """
+        self.policies = policies
+        self.jitter = jitter
+        self.rng = rng
+
+    def delay(self, category, attempt):
+        """Seconds to wait before retry number `attempt` (1-based) after a `category` failure."""
+        policy = self.policies[category]
+        delay = min(policy['base_delay'] * 2 ** (attempt - 1), policy['max_delay'])
+        return delay * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def exhausted(self, category, attempts):
+        """True once `attempts` failures of `category` have used up its budget."""
+        return attempts >= self.policies[category]['max_attempts']
+
+
+class CircuitBreaker:
+    """
+    Pauses a channel after repeated auth or layout failures, which no amount of
+    retrying will fix until someone logs in again or updates the selectors.
+
+    Consecutive tripping failures and the open-until time are kept in the state
+    store, so the pause survives restarts.
+    """
+
+    FAILURES_COUNTER = "breaker_consecutive_failures"
+    OPEN_UNTIL_COUNTER = "breaker_open_until"
+
+    def __init__(self, store, threshold=3, cooldown_seconds=7200, categories=(FAILURE_AUTH, FAILURE_LAYOUT)):
+        self.store = store
+        self.threshold = threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.categories = categories
+
+    def open_until(self):
+        """Returns the epoch time the breaker closes again, or None if it is closed."""
+        until = self.store.get_counter(self.OPEN_UNTIL_COUNTER, 0)
+        return until if until > time.time() else None
+
+    def record_success(self):
+        if self.store.get_counter(self.FAILURES_COUNTER, 0):
+            self.store.set_counter(self.FAILURES_COUNTER, 0)
+
+    def record_failure(self, category):
+        """Counts a failure. Returns True if this failure opened the breaker."""
+        if category not in self.categories:
+            return False
+        failures = self.store.get_counter(self.FAILURES_COUNTER, 0) + 1
+        self.store.set_counter(self.FAILURES_COUNTER, failures)
+        if failures >= self.threshold:
+            self.trip(f"{failures} consecutive {category} failures")
+            return True
+        return False
+
+    def trip(self, reason):
+        until = int(time.time() + self.cooldown_seconds)
+        self.store.set_counter(self.OPEN_UNTIL_COUNTER, until)
+        self.store.set_counter(self.FAILURES_COUNTER, 0)
+        logging.error(f"Circuit breaker opened ({reason}). Uploads paused for {self.cooldown_seconds}s.")
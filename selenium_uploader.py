@@ -0,0 +1,160 @@
+import datetime
+import logging
+import os
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+import studio_waits
+from retry_policy import AUTH_URL_MARKERS, FAILURE_AUTH, FAILURE_TRANSIENT, UploadFailure
+from uploader import UploaderBackend
+
+UPLOAD_ICON_XPATH = '//*[@id="upload-icon"]'
+NEXT_BUTTON_XPATH = "/html/body/ytcp-uploads-dialog/tp-yt-paper-dialog/div/ytcp-animatable[2]/div/div[2]/ytcp-button[2]/ytcp-button-shape/button"
+PUBLISH_BUTTON_XPATH = "/html/body/ytcp-uploads-dialog/tp-yt-paper-dialog/div/ytcp-animatable[2]/div/div[2]/ytcp-button[3]/ytcp-button-shape/button"
+# Visibility step: the "Schedule" section and its date/time fields. The final button then reads "Schedule".
+SCHEDULE_EXPAND_XPATH = '//*[@id="second-container-expand-button"]'
+SCHEDULE_DATE_TRIGGER_XPATH = '//ytcp-date-picker//ytcp-dropdown-trigger'
+SCHEDULE_DATE_INPUT_XPATH = '//ytcp-date-picker//tp-yt-paper-dialog//input'
+SCHEDULE_TIME_INPUT_XPATH = '//*[@id="time-of-day-container"]//input'
+SCHEDULE_DATE_FORMAT = '%b %d, %Y' # As Studio's English UI shows it, e.g. "Oct 18, 2026"
+
+
+class SeleniumUploader(UploaderBackend):
+    """
+    Uploads through the real YouTube Studio UI using a warm StudioSession.
+
+    Within a batch, an upload that follows a successful one continues on the
+    same Studio page: the "published" dialog is closed and the next file goes
+    into a new upload dialog, without navigating or health-checking again.
+    """
+
+    name = 'selenium'
+
+    def __init__(self, session, stage_timeouts, timezone=None):
+        """
+        Args:
+            session (StudioSession): Warm browser session the upload runs in.
+            stage_timeouts (dict): Per-stage timeouts in seconds (see STAGE_TIMEOUTS in main.py).
+            timezone (tzinfo): Zone scheduled publish times are entered in; should match the
+                channel's Studio time zone. UTC if None.
+        """
+        self.session = session
+        self.stage_timeouts = stage_timeouts
+        self.timezone = timezone or datetime.timezone.utc
+        self.driver = None
+        self.in_batch = False
+        self.continue_on_page = False
+
+    def begin_batch(self):
+        self.in_batch = True
+        self.continue_on_page = False
+
+    def end_batch(self):
+        self.in_batch = False
+        self.continue_on_page = False
+
+    def upload(self, video_path, title, trace, publish_at=None):
+        continuing = self.continue_on_page
+        self.continue_on_page = False
+        try:
+            self.driver = driver = self.session.acquire(navigate=not continuing)
+        finally:
+            for stage, seconds in self.session.last_timings.items():
+                trace.add(stage, seconds)
+        if not driver:
+            raise UploadFailure(FAILURE_TRANSIENT, "Failed to open Firefox profile. Aborting upload.")
+        if continuing:
+            with trace.span('studio_navigation'):
+                if not studio_waits.dismiss_publish_confirmation(driver, self.stage_timeouts['step_change']):
+                    logging.info("Studio is not where the previous upload left it. Navigating afresh.")
+                    driver.get(self.session.studio_url)
+
+        if any(marker in driver.current_url for marker in AUTH_URL_MARKERS):
+            raise UploadFailure(FAILURE_AUTH, f"YouTube Studio redirected to a sign-in page ({driver.current_url}). The Firefox profile needs to be logged in again.")
+        logging.info("Navigated to YouTube Studio. You should see your specific profile logged in.")
+
+        timeouts = self.stage_timeouts
+        with trace.span('open_dialog'):
+            logging.info("Attempting to click the upload icon...")
+            upload_icon = WebDriverWait(driver, timeouts['upload_icon']).until(
+                EC.element_to_be_clickable((By.XPATH, UPLOAD_ICON_XPATH))
+            )
+            upload_icon.click()
+            logging.info("Successfully clicked the upload icon.")
+
+            logging.info(f"Attempting to upload video file: {video_path}")
+            file_input_element = studio_waits.wait_for_upload_dialog(driver, timeouts['dialog_ready'])
+
+        with trace.span('file_select'):
+            file_input_element.send_keys(os.path.abspath(video_path))
+            logging.info("Successfully sent video file path to the upload input. Upload should now be in progress.")
+
+        with trace.span('title_entry'):
+            logging.info(f"Attempting to update video title...")
+            title_element = studio_waits.wait_for_details_form(driver, timeouts['details_ready'])
+            title_element.clear()
+            title_element.send_keys(title)
+            logging.info(f"Successfully updated title to: '{title}'")
+
+        with trace.span('file_transfer'):
+            logging.info("Waiting for the video file transfer to complete...")
+            studio_waits.wait_for_upload_progress(driver, timeouts['upload_stall'], timeouts['upload_total'])
+
+        with trace.span('next_steps'):
+            for i in range(3):
+                logging.info(f"Attempting to click 'Next' button (attempt {i+1}/3)...")
+                next_button = WebDriverWait(driver, timeouts['step_change']).until(
+                    EC.element_to_be_clickable((By.XPATH, NEXT_BUTTON_XPATH))
+                )
+                next_button.click()
+                studio_waits.wait_for_step(driver, i, timeouts['step_change'])
+                logging.info(f"Successfully clicked 'Next' button (attempt {i+1}/3).")
+
+        if timeouts['checks_complete'] > 0:
+            with trace.span('checks'):
+                logging.info("Waiting for YouTube Studio checks to complete...")
+                studio_waits.wait_for_checks_complete(driver, timeouts['checks_complete'])
+
+        if publish_at is not None:
+            with trace.span('schedule'):
+                self._set_publish_time(driver, publish_at)
+
+        with trace.span('publish'):
+            logging.info(f"Attempting to click the final button with XPath: {PUBLISH_BUTTON_XPATH}...")
+            final_button = WebDriverWait(driver, timeouts['step_change']).until(
+                EC.element_to_be_clickable((By.XPATH, PUBLISH_BUTTON_XPATH))
+            )
+            final_button.click()
+            studio_waits.wait_for_publish_confirmation(driver, timeouts['publish_confirmation'])
+            logging.info("Successfully clicked the final button. YouTube Studio confirmed the publish.")
+
+    def _set_publish_time(self, driver, publish_at):
+        """Opens the Visibility step's Schedule section and enters `publish_at` as local date and time."""
+        local = datetime.datetime.fromtimestamp(publish_at, self.timezone)
+        date_text = local.strftime(SCHEDULE_DATE_FORMAT)
+        time_text = local.strftime('%I:%M %p').lstrip('0')
+        logging.info(f"Scheduling the video to publish at {date_text} {time_text}.")
+        timeout = self.stage_timeouts['step_change']
+
+        WebDriverWait(driver, timeout).until(EC.element_to_be_clickable((By.XPATH, SCHEDULE_EXPAND_XPATH))).click()
+        WebDriverWait(driver, timeout).until(EC.element_to_be_clickable((By.XPATH, SCHEDULE_DATE_TRIGGER_XPATH))).click()
+        date_input = WebDriverWait(driver, timeout).until(EC.element_to_be_clickable((By.XPATH, SCHEDULE_DATE_INPUT_XPATH)))
+        date_input.clear()
+        date_input.send_keys(date_text + Keys.ENTER)
+        time_input = WebDriverWait(driver, timeout).until(EC.element_to_be_clickable((By.XPATH, SCHEDULE_TIME_INPUT_XPATH)))
+        time_input.clear()
+        time_input.send_keys(time_text + Keys.ENTER)
+
+    def release(self, upload_successful):
+        if self.driver is not None:
+            self.driver = None
+            self.session.release(upload_successful)
+            # The next upload of a batch picks up on this page, unless the browser was just recycled.
+            self.continue_on_page = self.in_batch and upload_successful and self.session.driver is not None
+
+    def close(self):
+        self.driver = None
+        self.session.close()
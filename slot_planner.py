@@ -0,0 +1,293 @@
+import datetime
+import gzip
+import logging
+import math
+import os
+import re
+import time
+from collections import namedtuple
+
+from logging_setup import rotated_segments
+from metrics import load_records
+from slot_scheduler import generate_spaced_times
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# One historical upload attempt. `duration` is None when only the completion is known (upload history).
+Outcome = namedtuple('Outcome', ['started_at', 'duration', 'failed', 'filename', 'attempt'])
+
+LOG_LINE = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d+ - \w+ - (?:\[([^\]]+)\] )?(.*)$')
+# Current and older wordings of the scheduler's attempt start / end messages.
+LOG_ATTEMPT_START = re.compile(r"--- Starting upload attempt (\d+) for (?:video '([^']+)'|scheduled time)")
+LOG_ATTEMPT_SUCCESS = re.compile(r"Upload process completed successfully for (?:'([^']+)'|this scheduled slot)")
+LOG_ATTEMPT_FAILURE = re.compile(r"Upload attempt \d+ for '[^']+' failed \[(\w+)\]|Upload process failed for this scheduled slot")
+# Failures that say nothing about the time of day (the file itself was rejected).
+TIME_INDEPENDENT_FAILURES = ('bad_file',)
+SLOT_GRID_SECONDS = 60 # Resolution of candidate slot start times
+
+segment_cache = {} # (path, size, mtime_ns, channel) -> outcomes; rotated segments never change
+
+
+def _read_log_lines(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+
+def parse_log_outcomes(path, channel=None):
+    """
+    Pairs the scheduler's "Starting upload attempt" lines with the success or
+    failure line that ends them. Lines prefixed with another channel's
+    "[name]" are ignored; unprefixed lines (single-channel runs) are kept.
+    Log timestamps are in the local time of the machine that wrote them.
+    """
+    outcomes, open_attempts = [], {}
+    with _read_log_lines(path) as f:
+        for line in f:
+            if 'pload ' not in line: # Cheap filter: every line of interest mentions an upload
+                continue
+            match = LOG_LINE.match(line)
+            if not match:
+                continue
+            stamp, prefix, message = match.groups()
+            if prefix is not None and channel is not None and prefix != channel:
+                continue
+            start = LOG_ATTEMPT_START.search(message)
+            if start:
+                ts = datetime.datetime.strptime(stamp, '%Y-%m-%d %H:%M:%S').timestamp()
+                open_attempts[prefix] = (ts, start.group(2), int(start.group(1)))
+                continue
+            success = LOG_ATTEMPT_SUCCESS.search(message)
+            failure = None if success else LOG_ATTEMPT_FAILURE.search(message)
+            if (success or failure) and prefix in open_attempts:
+                started_at, filename, attempt = open_attempts.pop(prefix)
+                if failure and failure.group(1) in TIME_INDEPENDENT_FAILURES:
+                    continue
+                ended_at = datetime.datetime.strptime(stamp, '%Y-%m-%d %H:%M:%S').timestamp()
+                outcomes.append(Outcome(started_at, max(0.0, ended_at - started_at), bool(failure), filename, attempt))
+    return outcomes
+
+
+def log_outcomes(log_file, channel=None, since=None):
+    """Outcomes from `log_file` and its rotated (possibly gzipped) segments; segments older than `since` are skipped."""
+    outcomes = []
+    try:
+        paths = rotated_segments(log_file)
+    except OSError:
+        paths = []
+    if os.path.exists(log_file):
+        paths.append(log_file)
+    for path in paths:
+        try:
+            st = os.stat(path)
+            if since is not None and st.st_mtime < since:
+                continue
+            if path == log_file:
+                outcomes.extend(parse_log_outcomes(path, channel))
+                continue
+            key = (path, st.st_size, st.st_mtime_ns, channel)
+            if key not in segment_cache:
+                segment_cache[key] = parse_log_outcomes(path, channel)
+            outcomes.extend(segment_cache[key])
+        except (OSError, EOFError, ValueError) as e:
+            logging.warning(f"Could not read upload history from log '{path}': {e}")
+    return outcomes
+
+
+def collect_outcomes(log_file, metrics_file, store, channel, since):
+    """
+    Merges upload attempts from the metrics JSONL, the automation log and the
+    state store's upload history since `since`. Log attempts already present in
+    the metrics file, and recorded uploads whose success was already seen, are
+    counted only once.
+    """
+    outcomes, seen = [], {}
+    if metrics_file:
+        for record in load_records(metrics_file, channel):
+            if record.get('ts', 0) < since or record.get('failure_class') in TIME_INDEPENDENT_FAILURES:
+                continue
+            outcome = Outcome(record['ts'], record.get('total_seconds'), record.get('outcome') != 'success',
+                              record.get('filename'), record.get('attempt'))
+            outcomes.append(outcome)
+            seen.setdefault((outcome.filename, outcome.attempt), []).append(outcome.started_at)
+
+    if log_file:
+        for outcome in log_outcomes(log_file, channel, since):
+            if outcome.started_at < since:
+                continue
+            times = seen.get((outcome.filename, outcome.attempt), ()) if outcome.filename else ()
+            if any(abs(ts - outcome.started_at) < 600 for ts in times):
+                continue
+            outcomes.append(outcome)
+
+    succeeded = {outcome.filename for outcome in outcomes if not outcome.failed and outcome.filename}
+    for filename, uploaded_at in store.upload_times():
+        if uploaded_at >= since and filename not in succeeded:
+            outcomes.append(Outcome(uploaded_at, None, False, filename, None))
+    return outcomes
+
+
+def hourly_totals(hours, failed, durations):
+    """
+    Per-hour (0-23) attempt counts, failure counts, and the sum and count of
+    known durations. Uses numpy's bincount when numpy is installed.
+    """
+    if numpy is not None:
+        hours = numpy.asarray(hours, dtype=numpy.intp)
+        durations = numpy.asarray([math.nan if d is None else d for d in durations], dtype=float)
+        known = ~numpy.isnan(durations)
+        return (
+            numpy.bincount(hours, minlength=24).tolist(),
+            numpy.bincount(hours, weights=numpy.asarray(failed, dtype=float), minlength=24).tolist(),
+            numpy.bincount(hours[known], weights=durations[known], minlength=24).tolist(),
+            numpy.bincount(hours[known], minlength=24).tolist(),
+        )
+    attempts, failures, duration_sum, duration_count = [0] * 24, [0.0] * 24, [0.0] * 24, [0] * 24
+    for hour, was_failed, duration in zip(hours, failed, durations):
+        attempts[hour] += 1
+        failures[hour] += was_failed
+        if duration is not None:
+            duration_sum[hour] += duration
+            duration_count[hour] += 1
+    return attempts, failures, duration_sum, duration_count
+
+
+class HourlyEstimates:
+    """
+    Per local hour: attempts seen, failure probability and expected attempt
+    duration. Each hour's figures are shrunk towards the overall ones with
+    `prior_weight` pseudo-attempts, so sparse hours don't swing the plan.
+    """
+
+    def __init__(self, outcomes, tz, prior_weight=5, retry_delay=300):
+        self.retry_delay = retry_delay
+        hours = [datetime.datetime.fromtimestamp(outcome.started_at, tz).hour for outcome in outcomes]
+        attempts, failures, duration_sum, duration_count = hourly_totals(
+            hours, [outcome.failed for outcome in outcomes], [outcome.duration for outcome in outcomes]
+        )
+        self.attempts = attempts
+        self.total_attempts = sum(attempts)
+        self.overall_failure_prob = sum(failures) / self.total_attempts if self.total_attempts else 0.0
+        self.overall_duration = sum(duration_sum) / sum(duration_count) if sum(duration_count) else None
+        self.failure_prob = [
+            (failures[h] + prior_weight * self.overall_failure_prob) / (attempts[h] + prior_weight) for h in range(24)
+        ]
+        if self.overall_duration is None:
+            self.expected_duration = [0.0] * 24
+        else:
+            self.expected_duration = [
+                (duration_sum[h] + prior_weight * self.overall_duration) / (duration_count[h] + prior_weight) for h in range(24)
+            ]
+
+    def expected_busy(self, hour):
+        """Expected seconds an upload started in `hour` takes to finish, including one retry when it fails."""
+        p = self.failure_prob[hour]
+        return self.expected_duration[hour] + p * (self.retry_delay + self.expected_duration[hour])
+
+    def weight(self, hour, failure_aversion):
+        """Relative preference for starting an upload in `hour`: success odds, scaled by how quick uploads are then."""
+        weight = (1.0 - self.failure_prob[hour]) ** failure_aversion
+        if self.overall_duration and self.expected_duration[hour] > 0:
+            weight *= self.overall_duration / self.expected_duration[hour]
+        return weight
+
+
+class SlotPlanner:
+    """
+    Places a day's upload slots using each local hour's historical failure rate
+    and upload duration, from the metrics JSONL, the automation log (including
+    rotated segments) and the state store's upload history.
+
+    Slots are drawn at random, one by one, from one-minute candidates weighted
+    by `HourlyEstimates.weight`, with candidates within `min_gap` of a chosen
+    slot excluded. Candidates whose expected upload (and one retry) would run
+    past the end of the window are excluded. With fewer than `min_attempts`
+    attempts of history it falls back to `generate_spaced_times`.
+    """
+
+    def __init__(self, store, tz, log_file=None, metrics_file=None, channel=None, history_days=60,
+                 min_attempts=10, failure_aversion=3.0, prior_weight=5, retry_delay=300, refresh_seconds=3600):
+        self.store = store
+        self.tz = tz
+        self.log_file = log_file
+        self.metrics_file = metrics_file
+        self.channel = channel
+        self.history_days = history_days
+        self.min_attempts = min_attempts
+        self.failure_aversion = failure_aversion
+        self.prior_weight = prior_weight
+        self.retry_delay = retry_delay
+        self.refresh_seconds = refresh_seconds
+        self.cached = None
+        self.cached_at = 0.0
+
+    def estimates(self):
+        """Returns the current HourlyEstimates, re-reading the history at most every `refresh_seconds`."""
+        now = time.time()
+        if self.cached is None or now - self.cached_at >= self.refresh_seconds:
+            start = time.monotonic()
+            since = now - self.history_days * 86400
+            outcomes = collect_outcomes(self.log_file, self.metrics_file, self.store, self.channel, since)
+            self.cached = HourlyEstimates(outcomes, self.tz, self.prior_weight, self.retry_delay)
+            self.cached_at = now
+            logging.info(f"Slot planner read {self.cached.total_attempts} upload attempt(s) from the last {self.history_days} days "
+                         f"in {time.monotonic() - start:.2f}s (overall failure rate {self.cached.overall_failure_prob:.0%}).")
+        return self.cached
+
+    def place(self, start_ts, end_ts, count, min_gap, rng):
+        """Drop-in for generate_spaced_times: up to `count` sorted timestamps in [start_ts, end_ts], `min_gap` apart."""
+        if end_ts < start_ts or count <= 0:
+            return []
+        estimates = self.estimates()
+        if estimates.total_attempts < self.min_attempts:
+            return generate_spaced_times(start_ts, end_ts, count, min_gap, rng)
+
+        candidates, weights = [], []
+        ts = start_ts
+        while ts <= end_ts:
+            hour = datetime.datetime.fromtimestamp(ts, self.tz).hour
+            if ts + SLOT_GRID_SECONDS + estimates.expected_busy(hour) <= end_ts:
+                candidates.append(ts)
+                weights.append(estimates.weight(hour, self.failure_aversion))
+            ts += SLOT_GRID_SECONDS
+        if not candidates:
+            # Nothing is expected to finish in time; still hand out slots as before rather than none.
+            return generate_spaced_times(start_ts, end_ts, count, min_gap, rng)
+
+        # Two candidates this many grid steps apart are at least min_gap apart even after jitter.
+        spacing = math.ceil(min_gap / SLOT_GRID_SECONDS) + 1 if min_gap > 0 else 1
+        fits = min(count, (len(candidates) - 1) // spacing + 1)
+        times = []
+        for _ in range(5):
+            times = self._draw(candidates, weights, count, spacing, rng)
+            if len(times) >= fits:
+                break
+        if len(times) < fits:
+            # The weighted draws kept fragmenting a tight window; space them evenly-at-random instead.
+            return generate_spaced_times(candidates[0], candidates[-1], count, min_gap, rng)
+        return times
+
+    @staticmethod
+    def _draw(candidates, weights, count, spacing, rng):
+        available = list(weights)
+        chosen = []
+        for _ in range(count):
+            total = sum(available)
+            if total <= 0:
+                break
+            target = rng.uniform(0, total)
+            index = None
+            for position, weight in enumerate(available):
+                if weight <= 0:
+                    continue
+                index = position
+                target -= weight
+                if target <= 0:
+                    break
+            chosen.append(candidates[index] + rng.uniform(0, SLOT_GRID_SECONDS))
+            for blocked in range(max(0, index - spacing + 1), min(len(available), index + spacing)):
+                available[blocked] = 0.0
+        return sorted(chosen)
@@ -0,0 +1,181 @@
+import datetime
+import heapq
+import logging
+import random
+import time
+from collections import namedtuple
+
+# `due_at` is a UTC epoch timestamp; `day` is the local calendar date (YYYY-MM-DD) the slot belongs to.
+Slot = namedtuple('Slot', ['due_at', 'slot_id', 'day'])
+
+
+def generate_spaced_times(start_ts, end_ts, count, min_gap, rng=random):
+    """
+    Returns `count` sorted random timestamps in [start_ts, end_ts] that are at
+    least `min_gap` seconds apart, drawn uniformly from all such arrangements.
+
+    Draws `count` uniform points in the window shrunk by the total mandatory gap
+    and then spreads them back out, so no rejection sampling is needed. If the
+    window can't fit `count` slots, as many as fit are returned.
+    """
+    length = end_ts - start_ts
+    if length < 0 or count <= 0:
+        return []
+    if min_gap > 0:
+        count = min(count, int(length // min_gap) + 1)
+    slack = length - (count - 1) * min_gap
+    offsets = sorted(rng.uniform(0, slack) for _ in range(count))
+    return [start_ts + offset + i * min_gap for i, offset in enumerate(offsets)]
+
+
+class UploadScheduler:
+    """
+    Persistent priority-queue scheduler for upload slots.
+
+    Slots for the next `plan_days_ahead` days are generated once, written to the
+    state store and kept in a min-heap ordered by due time, so a restart resumes
+    exactly the same plan. Consecutive uploads are kept at least `min_gap_seconds`
+    apart, both when slots are planned and when they are run late. A `slot_planner`
+    (see slot_planner.SlotPlanner) can replace the uniform placement of a day's
+    slots with one weighted by historical upload outcomes. Waiting is done
+    in short monotonic-timer chunks against a wall-clock deadline, so suspends and
+    DST changes don't make the scheduler oversleep.
+    """
+
+    def __init__(self, store, tz, uploads_per_day, window_start_hour=8, window_end_hour=20,
+                 min_gap_seconds=1800, plan_days_ahead=1, wake_interval=60, rng=random, slot_planner=None):
+        """
+        Args:
+            store (StateStore): Persists planned slots and their status.
+            tz (tzinfo): Timezone the upload window is defined in (a zoneinfo.ZoneInfo).
+            uploads_per_day (int): Slots planned per day (minus uploads already done that day).
+            window_start_hour, window_end_hour (int): Local hours bounding each day's slots.
+            min_gap_seconds (int): Minimum spacing between any two uploads.
+            plan_days_ahead (int): Number of days (starting with the current one) kept planned.
+            wake_interval (int): Longest single sleep while waiting for a slot.
+            slot_planner (SlotPlanner): Places each new day's slots; generate_spaced_times if None.
+        """
+        self.store = store
+        self.tz = tz
+        self.uploads_per_day = uploads_per_day
+        self.window_start_hour = window_start_hour
+        self.window_end_hour = window_end_hour
+        self.min_gap_seconds = min_gap_seconds
+        self.plan_days_ahead = plan_days_ahead
+        self.wake_interval = wake_interval
+        self.rng = rng
+        self.slot_planner = slot_planner
+        self.heap = []
+        self.wake_requested = False # Set (together with the stop event) to end the current wait early
+
+    # --- Planning ---
+
+    def local_window(self, day):
+        """Returns the (start, end) UTC timestamps of the upload window on local date `day`."""
+        start = datetime.datetime.combine(day, datetime.time(self.window_start_hour), tzinfo=self.tz)
+        end = datetime.datetime.combine(day, datetime.time(self.window_end_hour), tzinfo=self.tz)
+        return start.timestamp(), end.timestamp()
+
+    def first_plan_day(self, now_ts):
+        """The current local date, or tomorrow once today's upload window has closed."""
+        today = datetime.datetime.fromtimestamp(now_ts, self.tz).date()
+        if now_ts >= self.local_window(today)[1]:
+            return today + datetime.timedelta(days=1)
+        return today
+
+    def plan(self, now_ts=None, persist=True):
+        """
+        Marks past-day slots as missed, plans any day in the horizon that has no
+        plan yet, and loads all pending slots into the heap.
+
+        With `persist=False` nothing is written: days without a plan get preview
+        slots (slot_id None) that a later real `plan` will draw again.
+        """
+        now_ts = time.time() if now_ts is None else now_ts
+        first_day = self.first_plan_day(now_ts)
+        if persist:
+            missed = self.store.expire_slots_before(first_day.isoformat())
+            if missed:
+                logging.info(f"Marked {missed} slot(s) from previous days as missed.")
+        preview = []
+
+        last_ts = self.store.last_slot_time()
+        for offset in range(self.plan_days_ahead):
+            day = first_day + datetime.timedelta(days=offset)
+            day_key = day.isoformat()
+            if self.store.day_is_planned(day_key):
+                continue
+
+            start_ts, end_ts = self.local_window(day)
+            start_ts = max(start_ts, now_ts)
+            if last_ts is not None:
+                start_ts = max(start_ts, last_ts + self.min_gap_seconds)
+            count = self.uploads_per_day - self.store.daily_count(day_key)
+            place = self.slot_planner.place if self.slot_planner is not None else generate_spaced_times
+            times = place(start_ts, end_ts, count, self.min_gap_seconds, self.rng)
+            if times:
+                last_ts = times[-1]
+            if not persist:
+                preview.extend(Slot(ts, None, day_key) for ts in times)
+                continue
+            self.store.save_planned_slots(day_key, times)
+            logging.info(f"Planned {len(times)} upload slot(s) for {day_key}:")
+            for ts in times:
+                logging.info(f"- {datetime.datetime.fromtimestamp(ts, self.tz).strftime('%Y-%m-%d %H:%M:%S %Z%z')}")
+
+        first_key = first_day.isoformat()
+        self.heap = [Slot(due_at, slot_id, day) for slot_id, day, due_at in self.store.pending_slots() if day >= first_key]
+        self.heap.extend(preview)
+        heapq.heapify(self.heap)
+        return self
+
+    # --- Queue access ---
+
+    def peek(self):
+        return self.heap[0] if self.heap else None
+
+    def pending(self):
+        return sorted(self.heap)
+
+    def complete(self, slot, status='done'):
+        """Removes `slot` from the queue and persists its final status ('done', 'skipped', 'missed')."""
+        if self.heap and self.heap[0] == slot:
+            heapq.heappop(self.heap)
+        else:
+            self.heap.remove(slot)
+            heapq.heapify(self.heap)
+        self.store.set_slot_status(slot.slot_id, status)
+
+    def run_at(self, slot):
+        """When `slot` may actually run: its due time, pushed back to keep the minimum gap after the last upload."""
+        last_upload_ts = self.store.last_upload_timestamp()
+        if last_upload_ts is None:
+            return slot.due_at
+        return max(slot.due_at, last_upload_ts + self.min_gap_seconds)
+
+    # --- Waiting ---
+
+    def wait_until(self, deadline_ts, stop_event=None):
+        """
+        Sleeps until the wall clock reaches `deadline_ts`, in chunks of at most
+        `wake_interval` seconds measured on the monotonic clock. Returns False if
+        `stop_event` was set before the deadline, True otherwise.
+
+        If `wake_requested` is set when `stop_event` fires, the wait ends as if the
+        deadline had passed (both are reset), which is how a daemon's "upload now"
+        skips ahead without stopping the scheduler.
+        """
+        while True:
+            remaining = deadline_ts - time.time()
+            if remaining <= 0:
+                return True
+            chunk = min(remaining, self.wake_interval)
+            if stop_event is not None:
+                if stop_event.wait(chunk):
+                    if self.wake_requested:
+                        self.wake_requested = False
+                        stop_event.clear()
+                        return True
+                    return False
+            else:
+                time.sleep(chunk)
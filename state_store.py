@@ -0,0 +1,598 @@
+import datetime
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Schema migrations, applied in order. PRAGMA user_version records how many have run.
+SCHEMA_MIGRATIONS = [
+    """
+    CREATE TABLE meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    CREATE TABLE uploads (
+        channel TEXT NOT NULL,
+        filename TEXT NOT NULL,
+        channel_number INTEGER,
+        title TEXT,
+        upload_day TEXT,
+        uploaded_at TEXT,
+        PRIMARY KEY (channel, filename)
+    );
+    CREATE INDEX uploads_by_day ON uploads (channel, upload_day);
+    CREATE TABLE counters (
+        channel TEXT NOT NULL,
+        name TEXT NOT NULL,
+        value INTEGER NOT NULL,
+        PRIMARY KEY (channel, name)
+    );
+    CREATE TABLE daily_counts (
+        channel TEXT NOT NULL,
+        day TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (channel, day)
+    );
+    """,
+    """
+    CREATE TABLE video_files (
+        folder TEXT NOT NULL,
+        filename TEXT NOT NULL,
+        number INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        mtime REAL NOT NULL,
+        PRIMARY KEY (folder, filename)
+    );
+    """,
+    """
+    CREATE TABLE notifications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        channel TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        body TEXT NOT NULL,
+        digest_key TEXT,
+        created_at REAL NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL DEFAULT 0
+    );
+    CREATE INDEX notifications_by_channel ON notifications (channel, id);
+    """,
+    """
+    CREATE TABLE probe_cache (
+        path TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        mtime REAL NOT NULL,
+        duration REAL,
+        width INTEGER,
+        height INTEGER,
+        codec TEXT,
+        error TEXT
+    );
+    """,
+    """
+    CREATE TABLE fingerprints (
+        path TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        mtime REAL NOT NULL,
+        partial_hash TEXT NOT NULL,
+        full_hash TEXT
+    );
+    ALTER TABLE uploads ADD COLUMN partial_hash TEXT;
+    ALTER TABLE uploads ADD COLUMN content_hash TEXT;
+    CREATE INDEX uploads_by_partial_hash ON uploads (channel, partial_hash);
+    """,
+    """
+    CREATE TABLE planned_slots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        channel TEXT NOT NULL,
+        day TEXT NOT NULL,
+        due_at REAL NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending'
+    );
+    CREATE INDEX planned_slots_by_day ON planned_slots (channel, day);
+    CREATE INDEX planned_slots_by_status ON planned_slots (channel, status, due_at);
+    """,
+    """
+    CREATE TABLE quarantine (
+        channel TEXT NOT NULL,
+        filename TEXT NOT NULL,
+        category TEXT NOT NULL,
+        reason TEXT,
+        quarantined_at TEXT NOT NULL,
+        PRIMARY KEY (channel, filename)
+    );
+    """,
+    """
+    CREATE TABLE title_assignments (
+        channel TEXT NOT NULL,
+        filename TEXT NOT NULL,
+        channel_number INTEGER,
+        title_id TEXT NOT NULL,
+        title TEXT NOT NULL,
+        assigned_at REAL NOT NULL,
+        PRIMARY KEY (channel, filename)
+    );
+    CREATE INDEX title_assignments_by_title ON title_assignments (channel, title_id);
+    CREATE INDEX title_assignments_by_time ON title_assignments (channel, assigned_at);
+    """,
+]
+
+CHANNEL_NUMBER_COUNTER = "channel_video_number"
+
+
+class StateStore:
+    """
+    Transactional SQLite (WAL mode) store for upload history, the channel video
+    counter and per-day upload counts.
+
+    Every row is keyed by channel so several channels can share one database file.
+    All public methods are safe to call from multiple threads.
+    """
+
+    def __init__(self, db_path, channel="default"):
+        self.db_path = db_path
+        self.channel = channel
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._apply_schema_migrations()
+
+    def _apply_schema_migrations(self):
+        with self.transaction() as cur:
+            version = cur.execute("PRAGMA user_version").fetchone()[0]
+            for index, script in enumerate(SCHEMA_MIGRATIONS[version:], start=version + 1):
+                for statement in script.split(';'):
+                    if statement.strip():
+                        cur.execute(statement)
+                cur.execute(f"PRAGMA user_version = {index}")
+                logging.info(f"State store '{self.db_path}' migrated to schema version {index}.")
+
+    @contextmanager
+    def transaction(self):
+        """Runs the enclosed statements in one immediate (write-locked) transaction."""
+        with self.lock:
+            cur = self.conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                yield cur
+            except BaseException:
+                cur.execute("ROLLBACK")
+                raise
+            else:
+                cur.execute("COMMIT")
+            finally:
+                cur.close()
+
+    def _query_one(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    # --- Meta ---
+
+    def get_meta(self, key, default=None):
+        row = self._query_one("SELECT value FROM meta WHERE key = ?", (key,))
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self.transaction() as cur:
+            cur.execute("INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+    def delete_meta(self, key):
+        with self.transaction() as cur:
+            cur.execute("DELETE FROM meta WHERE key = ?", (key,))
+
+    # --- Uploads ---
+
+    def is_uploaded(self, filename):
+        """Returns True if `filename` has been uploaded to this channel."""
+        row = self._query_one("SELECT 1 FROM uploads WHERE channel = ? AND filename = ?", (self.channel, filename))
+        return row is not None
+
+    def uploaded_filenames(self):
+        """Returns the set of all filenames uploaded to this channel."""
+        with self.lock:
+            rows = self.conn.execute("SELECT filename FROM uploads WHERE channel = ?", (self.channel,)).fetchall()
+        return {row[0] for row in rows}
+
+    def uploaded_count(self):
+        return self._query_one("SELECT COUNT(*) FROM uploads WHERE channel = ?", (self.channel,))[0]
+
+    def record_upload(self, filename, channel_number, title, day, partial_hash=None, content_hash=None, title_choice=None):
+        """
+        Atomically records a successful upload (with its content fingerprints and
+        catalogue title, if known), advances the channel video counter past
+        `channel_number` and increments the upload count for `day`.
+
+        Returns:
+            int: The new upload count for `day`.
+        """
+        uploaded_at = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+        with self.transaction() as cur:
+            cur.execute(
+                "INSERT OR REPLACE INTO uploads (channel, filename, channel_number, title, upload_day, uploaded_at, partial_hash, content_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.channel, filename, channel_number, title, day, uploaded_at, partial_hash, content_hash)
+            )
+            if title_choice is not None:
+                cur.execute(
+                    "INSERT OR REPLACE INTO title_assignments (channel, filename, channel_number, title_id, title, assigned_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.channel, filename, channel_number, title_choice.title_id, title_choice.text, time.time())
+                )
+            if channel_number is not None:
+                cur.execute(
+                    "INSERT INTO counters (channel, name, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT(channel, name) DO UPDATE SET value = MAX(value, excluded.value)",
+                    (self.channel, CHANNEL_NUMBER_COUNTER, channel_number + 1)
+                )
+            cur.execute(
+                "INSERT INTO daily_counts (channel, day, count) VALUES (?, ?, 1) "
+                "ON CONFLICT(channel, day) DO UPDATE SET count = count + 1",
+                (self.channel, day)
+            )
+            return cur.execute("SELECT count FROM daily_counts WHERE channel = ? AND day = ?", (self.channel, day)).fetchone()[0]
+
+    def last_upload_timestamp(self):
+        """Returns the UTC epoch time of this channel's most recent recorded upload, or None."""
+        row = self._query_one("SELECT MAX(uploaded_at) FROM uploads WHERE channel = ?", (self.channel,))
+        if not row or row[0] is None:
+            return None
+        return datetime.datetime.fromisoformat(row[0]).timestamp()
+
+    def upload_times(self):
+        """Returns (filename, UTC epoch time) of this channel's recorded uploads that have an upload time."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT filename, uploaded_at FROM uploads WHERE channel = ? AND uploaded_at IS NOT NULL", (self.channel,)
+            ).fetchall()
+        return [(filename, datetime.datetime.fromisoformat(uploaded_at).timestamp()) for filename, uploaded_at in rows]
+
+    def mark_uploaded(self, filename, day):
+        """Records `filename` as uploaded without touching the counter or the daily count."""
+        with self.transaction() as cur:
+            cur.execute(
+                "INSERT OR IGNORE INTO uploads (channel, filename, upload_day) VALUES (?, ?, ?)",
+                (self.channel, filename, day)
+            )
+
+    # --- Quarantine ---
+
+    def quarantine_video(self, filename, category, reason):
+        quarantined_at = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+        with self.transaction() as cur:
+            cur.execute(
+                "INSERT OR REPLACE INTO quarantine (channel, filename, category, reason, quarantined_at) VALUES (?, ?, ?, ?, ?)",
+                (self.channel, filename, category, reason, quarantined_at)
+            )
+
+    def is_quarantined(self, filename):
+        row = self._query_one("SELECT 1 FROM quarantine WHERE channel = ? AND filename = ?", (self.channel, filename))
+        return row is not None
+
+    def quarantined_videos(self):
+        """Returns (filename, category, reason, quarantined_at) for this channel's quarantined videos."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT filename, category, reason, quarantined_at FROM quarantine WHERE channel = ? ORDER BY quarantined_at",
+                (self.channel,)
+            ).fetchall()
+
+    def release_quarantine(self, filename):
+        with self.transaction() as cur:
+            cur.execute("DELETE FROM quarantine WHERE channel = ? AND filename = ?", (self.channel, filename))
+            return cur.rowcount > 0
+
+    # --- Counters ---
+
+    def get_counter(self, name, default):
+        row = self._query_one("SELECT value FROM counters WHERE channel = ? AND name = ?", (self.channel, name))
+        return row[0] if row else default
+
+    def set_counter(self, name, value):
+        with self.transaction() as cur:
+            cur.execute(
+                "INSERT INTO counters (channel, name, value) VALUES (?, ?, ?) "
+                "ON CONFLICT(channel, name) DO UPDATE SET value = excluded.value",
+                (self.channel, name, value)
+            )
+
+    def next_channel_video_number(self, default):
+        return self.get_counter(CHANNEL_NUMBER_COUNTER, default)
+
+    # --- Daily counts ---
+
+    def daily_count(self, day):
+        row = self._query_one("SELECT count FROM daily_counts WHERE channel = ? AND day = ?", (self.channel, day))
+        return row[0] if row else 0
+
+    # --- Planned upload slots ---
+
+    def day_is_planned(self, day):
+        row = self._query_one("SELECT 1 FROM planned_slots WHERE channel = ? AND day = ? LIMIT 1", (self.channel, day))
+        return row is not None
+
+    def save_planned_slots(self, day, due_times):
+        with self.transaction() as cur:
+            cur.executemany(
+                "INSERT INTO planned_slots (channel, day, due_at) VALUES (?, ?, ?)",
+                [(self.channel, day, due_at) for due_at in due_times]
+            )
+
+    def pending_slots(self):
+        """Returns (id, day, due_at) of every pending slot for this channel."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT id, day, due_at FROM planned_slots WHERE channel = ? AND status = 'pending' ORDER BY due_at",
+                (self.channel,)
+            ).fetchall()
+
+    def last_slot_time(self):
+        """Returns the latest planned slot time (any status) for this channel, or None."""
+        row = self._query_one("SELECT MAX(due_at) FROM planned_slots WHERE channel = ?", (self.channel,))
+        return row[0] if row else None
+
+    def set_slot_status(self, slot_id, status):
+        with self.transaction() as cur:
+            cur.execute("UPDATE planned_slots SET status = ? WHERE id = ?", (status, slot_id))
+
+    def expire_slots_before(self, day):
+        """Marks pending slots on days before `day` as missed. Returns how many were updated."""
+        with self.transaction() as cur:
+            cur.execute(
+                "UPDATE planned_slots SET status = 'missed' WHERE channel = ? AND status = 'pending' AND day < ?",
+                (self.channel, day)
+            )
+            return cur.rowcount
+
+    # --- Video folder index ---
+
+    def get_video_index_mtime(self, folder):
+        """Returns the folder mtime (ns) the persisted index was last synced with, or None."""
+        value = self.get_meta(f"video_index_mtime:{folder}")
+        return int(value) if value is not None else None
+
+    def set_video_index_mtime(self, folder, dir_mtime_ns):
+        self.set_meta(f"video_index_mtime:{folder}", str(dir_mtime_ns))
+
+    def load_video_index(self, folder):
+        """Returns (number, filename, size, mtime) rows of the persisted index for `folder`."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT number, filename, size, mtime FROM video_files WHERE folder = ?", (folder,)
+            ).fetchall()
+
+    def save_video_index(self, folder, rows, dir_mtime_ns):
+        """Replaces the persisted index for `folder` with (number, filename, size, mtime) rows."""
+        with self.transaction() as cur:
+            cur.execute("DELETE FROM video_files WHERE folder = ?", (folder,))
+            cur.executemany(
+                "INSERT INTO video_files (folder, number, filename, size, mtime) VALUES (?, ?, ?, ?, ?)",
+                [(folder,) + tuple(row) for row in rows]
+            )
+            cur.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (f"video_index_mtime:{folder}", str(dir_mtime_ns))
+            )
+
+    def upsert_video_file(self, folder, number, filename, size, mtime):
+        with self.transaction() as cur:
+            cur.execute(
+                "INSERT OR REPLACE INTO video_files (folder, number, filename, size, mtime) VALUES (?, ?, ?, ?, ?)",
+                (folder, number, filename, size, mtime)
+            )
+
+    def delete_video_file(self, folder, filename):
+        with self.transaction() as cur:
+            cur.execute("DELETE FROM video_files WHERE folder = ? AND filename = ?", (folder, filename))
+
+    # --- Video probe cache ---
+
+    def get_probe(self, path, size, mtime):
+        """Returns the cached (duration, width, height, codec, error) for this exact file version, or None."""
+        return self._query_one(
+            "SELECT duration, width, height, codec, error FROM probe_cache WHERE path = ? AND size = ? AND mtime = ?",
+            (path, size, mtime)
+        )
+
+    def save_probe(self, path, size, mtime, result):
+        with self.transaction() as cur:
+            cur.execute(
+                "INSERT OR REPLACE INTO probe_cache (path, size, mtime, duration, width, height, codec, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, size, mtime) + tuple(result)
+            )
+
+    # --- Content fingerprints ---
+
+    def get_fingerprint(self, path, size, mtime):
+        """Returns (partial_hash, full_hash) for this exact file version, or None. full_hash may be None."""
+        return self._query_one(
+            "SELECT partial_hash, full_hash FROM fingerprints WHERE path = ? AND size = ? AND mtime = ?",
+            (path, size, mtime)
+        )
+
+    def save_fingerprint(self, path, size, mtime, partial_hash, full_hash):
+        with self.transaction() as cur:
+            cur.execute(
+                "INSERT OR REPLACE INTO fingerprints (path, size, mtime, partial_hash, full_hash) VALUES (?, ?, ?, ?, ?)",
+                (path, size, mtime, partial_hash, full_hash)
+            )
+
+    def uploads_with_partial_hash(self, partial_hash):
+        """Returns (filename, content_hash) of this channel's uploads with the given partial hash."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT filename, content_hash FROM uploads WHERE channel = ? AND partial_hash = ?",
+                (self.channel, partial_hash)
+            ).fetchall()
+
+    def uploads_missing_partial_hash(self):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT filename FROM uploads WHERE channel = ? AND partial_hash IS NULL", (self.channel,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def set_upload_hashes(self, filename, partial_hash, content_hash):
+        with self.transaction() as cur:
+            cur.execute(
+                "UPDATE uploads SET partial_hash = ?, content_hash = COALESCE(?, content_hash) WHERE channel = ? AND filename = ?",
+                (partial_hash, content_hash, self.channel, filename)
+            )
+
+    # --- Title assignments ---
+
+    def used_title_ids(self):
+        """Returns the ids of every title this channel has used."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT title_id FROM title_assignments WHERE channel = ?", (self.channel,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def recent_title_ids(self, limit):
+        """Returns the title ids of this channel's last `limit` assignments, newest first."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT title_id FROM title_assignments WHERE channel = ? ORDER BY assigned_at DESC LIMIT ?",
+                (self.channel, limit)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def title_last_used(self):
+        """Returns {title_id: epoch time of its most recent assignment}."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT title_id, MAX(assigned_at) FROM title_assignments WHERE channel = ? GROUP BY title_id",
+                (self.channel,)
+            ).fetchall()
+        return dict(rows)
+
+    def assigned_channel_numbers(self):
+        """Returns the channel video numbers that have a recorded title assignment."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT channel_number FROM title_assignments WHERE channel = ? AND channel_number IS NOT NULL", (self.channel,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def untitled_upload_count(self):
+        """Number of this channel's uploads recorded without a title (imported from the legacy log or marked by hand)."""
+        return self._query_one("SELECT COUNT(*) FROM uploads WHERE channel = ? AND title IS NULL", (self.channel,))[0]
+
+    def title_assignment(self, filename):
+        """Returns (title_id, title) assigned to `filename`, or None."""
+        return self._query_one(
+            "SELECT title_id, title FROM title_assignments WHERE channel = ? AND filename = ?", (self.channel, filename)
+        )
+
+    def uploads_missing_title_assignment(self):
+        """Returns (filename, channel_number, title, uploaded_at epoch) of titled uploads with no recorded assignment."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT u.filename, u.channel_number, u.title, u.uploaded_at FROM uploads u "
+                "WHERE u.channel = ? AND u.title IS NOT NULL AND NOT EXISTS ("
+                "SELECT 1 FROM title_assignments t WHERE t.channel = u.channel AND t.filename = u.filename)",
+                (self.channel,)
+            ).fetchall()
+        return [(filename, number, title, datetime.datetime.fromisoformat(uploaded_at).timestamp() if uploaded_at else 0.0)
+                for filename, number, title, uploaded_at in rows]
+
+    def save_title_assignments(self, rows):
+        """Inserts (filename, channel_number, title_id, title, assigned_at) rows, keeping existing ones."""
+        with self.transaction() as cur:
+            cur.executemany(
+                "INSERT OR IGNORE INTO title_assignments (channel, filename, channel_number, title_id, title, assigned_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(self.channel, *row) for row in rows]
+            )
+
+    # --- Notification outbox ---
+
+    def enqueue_notification(self, subject, body, digest_key, created_at):
+        with self.transaction() as cur:
+            cur.execute(
+                "INSERT INTO notifications (channel, subject, body, digest_key, created_at) VALUES (?, ?, ?, ?, ?)",
+                (self.channel, subject, body, digest_key, created_at)
+            )
+
+    def pending_notifications(self):
+        """Returns this channel's undelivered notifications as dicts, oldest first."""
+        with self.lock:
+            cur = self.conn.execute(
+                "SELECT id, subject, body, digest_key, created_at, attempts, next_attempt_at "
+                "FROM notifications WHERE channel = ? ORDER BY id", (self.channel,)
+            )
+            columns = [c[0] for c in cur.description]
+            return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+    def delete_notifications(self, ids):
+        with self.transaction() as cur:
+            cur.executemany("DELETE FROM notifications WHERE id = ?", [(i,) for i in ids])
+
+    def defer_notifications(self, ids, attempts, next_attempt_at):
+        with self.transaction() as cur:
+            cur.executemany(
+                "UPDATE notifications SET attempts = ?, next_attempt_at = ? WHERE id = ?",
+                [(attempts, next_attempt_at, i) for i in ids]
+            )
+
+    # --- Migration from the legacy text files ---
+
+    def migrate_from_files(self, uploaded_log_file, channel_counter_file, daily_upload_counter_file):
+        """
+        Imports the legacy uploaded-videos log, channel counter file and daily
+        counter log into the store. Paths that are None or missing are skipped.
+        Runs once per channel; later calls are no-ops.
+        """
+        marker = f"legacy_files_migrated:{self.channel}"
+        if self.get_meta(marker):
+            return
+
+        filenames = []
+        if uploaded_log_file and os.path.exists(uploaded_log_file):
+            with open(uploaded_log_file, 'r') as f:
+                filenames = [line.strip() for line in f if line.strip()]
+
+        counter = None
+        if channel_counter_file and os.path.exists(channel_counter_file):
+            with open(channel_counter_file, 'r') as f:
+                content = f.read().strip()
+                if content.isdigit():
+                    counter = int(content)
+
+        daily_counts = []
+        if daily_upload_counter_file and os.path.exists(daily_upload_counter_file):
+            with open(daily_upload_counter_file, 'r') as f:
+                for line in f:
+                    parts = line.strip().split(',')
+                    if len(parts) == 2 and parts[1].isdigit():
+                        daily_counts.append((parts[0], int(parts[1])))
+
+        with self.transaction() as cur:
+            cur.executemany(
+                "INSERT OR IGNORE INTO uploads (channel, filename) VALUES (?, ?)",
+                [(self.channel, name) for name in filenames]
+            )
+            if counter is not None:
+                cur.execute(
+                    "INSERT OR IGNORE INTO counters (channel, name, value) VALUES (?, ?, ?)",
+                    (self.channel, CHANNEL_NUMBER_COUNTER, counter)
+                )
+            cur.executemany(
+                "INSERT OR IGNORE INTO daily_counts (channel, day, count) VALUES (?, ?, ?)",
+                [(self.channel, day, count) for day, count in daily_counts]
+            )
+            cur.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (marker, datetime.date.today().isoformat()))
+
+        logging.info(
+            f"Migrated legacy state into '{self.db_path}': {len(filenames)} uploaded videos, "
+            f"channel counter {counter if counter is not None else 'unset'}, {len(daily_counts)} daily counts."
+        )
@@ -0,0 +1,153 @@
+import logging
+import re
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+# DOM markers used to detect each stage of the YouTube Studio upload dialog.
+UPLOAD_DIALOG_XPATH = '//ytcp-uploads-dialog'
+FILE_INPUT_XPATH = '//input[@type="file"]'
+TITLE_TEXTBOX_XPATH = '//*[@id="textbox"]'
+PROGRESS_LABEL_CSS = 'ytcp-video-upload-progress .progress-label'
+# Content shown on each wizard step reached by clicking 'Next' (Video elements, Checks, Visibility).
+STEP_CONTENT_CSS = [
+    'ytcp-uploads-video-elements',
+    'ytcp-uploads-checks',
+    'ytcp-uploads-review',
+]
+# Either of these appears once Studio has accepted the Publish/Save click.
+PUBLISH_CONFIRMATION_CSS = 'ytcp-video-share-dialog, ytcp-uploads-still-processing-dialog'
+CONFIRMATION_CLOSE_CSS = 'ytcp-video-share-dialog #close-button, ytcp-uploads-still-processing-dialog #close-button'
+
+UPLOAD_PERCENT_PATTERN = re.compile(r'(\d{1,3})\s*%')
+UPLOAD_COMPLETE_PATTERN = re.compile(r'upload complete|processing|checks complete|finished processing', re.IGNORECASE)
+CHECKS_COMPLETE_PATTERN = re.compile(r'checks complete|no issues found|finished processing', re.IGNORECASE)
+UPLOAD_ERROR_PATTERN = re.compile(r'upload failed|daily upload limit|processing abandoned', re.IGNORECASE)
+
+POLL_INTERVAL_SECONDS = 0.5
+
+
+def wait_for_upload_dialog(driver, timeout):
+    """Waits until the upload dialog is open and its file input is present. Returns the file input."""
+    WebDriverWait(driver, timeout).until(
+        EC.presence_of_element_located((By.XPATH, UPLOAD_DIALOG_XPATH))
+    )
+    return WebDriverWait(driver, timeout).until(
+        EC.presence_of_element_located((By.XPATH, FILE_INPUT_XPATH))
+    )
+
+
+def wait_for_details_form(driver, timeout):
+    """Waits until the title textbox of the details step is visible and editable. Returns it."""
+    return WebDriverWait(driver, timeout).until(
+        EC.element_to_be_clickable((By.XPATH, TITLE_TEXTBOX_XPATH))
+    )
+
+
+def read_progress_label(driver):
+    """Returns the text of the upload progress label, or an empty string if it isn't rendered."""
+    try:
+        labels = driver.find_elements(By.CSS_SELECTOR, PROGRESS_LABEL_CSS)
+        return labels[0].text.strip() if labels else ""
+    except WebDriverException:
+        return ""
+
+
+def wait_for_upload_progress(driver, stall_timeout, total_timeout):
+    """
+    Follows the upload progress label until Studio reports the file transfer as
+    complete.
+
+    Fails if the reported percentage doesn't advance for `stall_timeout` seconds
+    or if the whole transfer takes longer than `total_timeout`, so large files on
+    slow links get as long as they need while a stuck upload is still caught.
+
+    Raises:
+        TimeoutException: If the upload stalls or exceeds the total timeout.
+        RuntimeError: If Studio reports an upload error.
+    """
+    started = time.monotonic()
+    last_progress_at = started
+    last_percent = -1
+    last_label = None
+
+    while True:
+        label = read_progress_label(driver)
+        if label != last_label:
+            if label:
+                logging.info(f"Upload progress: {label}")
+            last_label = label
+
+        if label and UPLOAD_ERROR_PATTERN.search(label):
+            raise RuntimeError(f"YouTube Studio reported an upload error: '{label}'")
+        if label and UPLOAD_COMPLETE_PATTERN.search(label):
+            logging.info(f"Upload transfer finished in {time.monotonic() - started:.1f}s.")
+            return label
+
+        match = UPLOAD_PERCENT_PATTERN.search(label)
+        now = time.monotonic()
+        if match and int(match.group(1)) > last_percent:
+            last_percent = int(match.group(1))
+            last_progress_at = now
+
+        if now - last_progress_at > stall_timeout:
+            raise TimeoutException(f"Upload progress stalled at {max(last_percent, 0)}% for more than {stall_timeout}s.")
+        if now - started > total_timeout:
+            raise TimeoutException(f"Upload did not complete within {total_timeout}s (last progress: {max(last_percent, 0)}%).")
+        time.sleep(POLL_INTERVAL_SECONDS)
+
+
+def wait_for_checks_complete(driver, timeout):
+    """
+    Waits for Studio's processing/copyright checks to finish. Returns True if they
+    did, False on timeout (publishing is still allowed while checks run).
+    """
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL_SECONDS).until(
+            lambda d: CHECKS_COMPLETE_PATTERN.search(read_progress_label(d))
+        )
+        return True
+    except TimeoutException:
+        logging.warning(f"Studio checks did not complete within {timeout}s. Continuing anyway.")
+        return False
+
+
+def wait_for_step(driver, step_index, timeout):
+    """Waits until the content of wizard step `step_index` (0 = Video elements) is displayed."""
+    css = STEP_CONTENT_CSS[min(step_index, len(STEP_CONTENT_CSS) - 1)]
+    WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL_SECONDS).until(
+        EC.visibility_of_element_located((By.CSS_SELECTOR, css))
+    )
+
+
+def dismiss_publish_confirmation(driver, timeout):
+    """
+    Closes the "video published" dialog left open by the previous upload, so the
+    next one can start on the same page. Returns False if Studio is in any other
+    state (the caller should navigate afresh instead).
+    """
+    try:
+        for button in driver.find_elements(By.CSS_SELECTOR, CONFIRMATION_CLOSE_CSS):
+            if button.is_displayed():
+                button.click()
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL_SECONDS).until(
+            lambda d: not any(dialog.is_displayed() for dialog in d.find_elements(By.CSS_SELECTOR, PUBLISH_CONFIRMATION_CSS))
+        )
+        dialogs = driver.find_elements(By.XPATH, UPLOAD_DIALOG_XPATH + '/tp-yt-paper-dialog')
+        return not dialogs or not dialogs[0].is_displayed()
+    except (TimeoutException, WebDriverException):
+        return False
+
+
+def wait_for_publish_confirmation(driver, timeout):
+    """Waits until Studio confirms the video was published/saved, or the upload dialog has closed."""
+    def confirmed(d):
+        if d.find_elements(By.CSS_SELECTOR, PUBLISH_CONFIRMATION_CSS):
+            return True
+        dialogs = d.find_elements(By.XPATH, UPLOAD_DIALOG_XPATH + '/tp-yt-paper-dialog')
+        return not dialogs or not dialogs[0].is_displayed()
+
+    WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL_SECONDS).until(confirmed)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import time
+
+from logging_setup import setup_logging, set_message_prefix
+
+# --- Supervisor Configuration ---
+CHANNELS_CONFIG_FILE = "channels.json"
+DEFAULT_MAX_CONCURRENT_BROWSERS = 2
+DEFAULT_BROWSER_SLOT_DIR = os.path.join(tempfile.gettempdir(), "yt-shorts-browser-slots")
+UPLOAD_HANG_TIMEOUT_SECONDS = 2 * 3600 # Kill a worker whose single upload attempt runs longer than this
+WORKER_RESTART_DELAY_SECONDS = 60 # Wait before restarting a crashed or killed worker
+MONITOR_INTERVAL_SECONDS = 5
+SUPERVISOR_LOG_FILE = "youtube_automation.log" # Workers forward their records to the supervisor, which writes them here (alongside any main.py runs)
+
+REQUIRED_CHANNEL_KEYS = ('name', 'profile_path', 'channel_id', 'video_folder', 'titles_file')
+
+
+def load_channel_config(config_path):
+    """
+    Reads and validates the multi-channel config file.
+
+    Returns:
+        dict: The config, with `max_concurrent_browsers` and `browser_slot_dir` filled in.
+
+    Raises:
+        ValueError: If the file is malformed or a channel entry is incomplete.
+    """
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    channels = config.get('channels')
+    if not isinstance(channels, list) or not channels:
+        raise ValueError(f"'{config_path}' must define a non-empty 'channels' list.")
+
+    seen_names = set()
+    for index, channel in enumerate(channels):
+        missing = [key for key in REQUIRED_CHANNEL_KEYS if not channel.get(key)]
+        if missing:
+            raise ValueError(f"Channel #{index + 1} in '{config_path}' is missing: {', '.join(missing)}")
+        if channel['name'] in seen_names:
+            raise ValueError(f"Duplicate channel name '{channel['name']}' in '{config_path}'.")
+        seen_names.add(channel['name'])
+
+    config.setdefault('max_concurrent_browsers', DEFAULT_MAX_CONCURRENT_BROWSERS)
+    config.setdefault('browser_slot_dir', DEFAULT_BROWSER_SLOT_DIR)
+    return config
+
+
+def channel_worker(channel, browser_slot_dir, max_concurrent_browsers, heartbeat, log_queue):
+    """Entry point of a worker process: runs one channel's daily scheduler."""
+    import main
+    from browser_session import BrowserSlots
+    from logging_setup import forward_logging_to
+
+    forward_logging_to(log_queue)
+    main.apply_channel_config(channel)
+    main.browser_slots = BrowserSlots(browser_slot_dir, max_concurrent_browsers)
+    main.upload_heartbeat = heartbeat
+    main.schedule_daily_uploads()
+
+
+class ChannelSupervisor:
+    """
+    Runs each channel's scheduler in its own worker process.
+
+    Workers share the state database (rows are keyed by channel) and a global cap
+    on concurrent Firefox instances. A worker that crashes, or whose upload attempt
+    hangs past `UPLOAD_HANG_TIMEOUT_SECONDS`, is killed and restarted on its own
+    without affecting the other channels.
+    """
+
+    def __init__(self, config, log_queue):
+        self.config = config
+        self.log_queue = log_queue
+        self.context = multiprocessing.get_context('spawn')
+        self.workers = {}       # name -> (process, heartbeat)
+        self.restart_at = {}    # name -> monotonic time a restart is due
+        self.channels = {channel['name']: channel for channel in config['channels']}
+        self.stopping = False
+
+    def start_worker(self, name):
+        heartbeat = self.context.Value('d', 0.0)
+        process = self.context.Process(
+            target=channel_worker,
+            args=(self.channels[name], self.config['browser_slot_dir'], self.config['max_concurrent_browsers'], heartbeat, self.log_queue),
+            name=f"channel-{name}",
+        )
+        process.start()
+        self.workers[name] = (process, heartbeat)
+        logging.info(f"Started worker for channel '{name}' (pid {process.pid}).")
+
+    def stop_worker(self, name, process):
+        process.terminate()
+        process.join(10)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    def run(self):
+        logging.info(
+            f"Supervising {len(self.channels)} channel(s) with at most "
+            f"{self.config['max_concurrent_browsers']} concurrent browser(s)."
+        )
+        for name in self.channels:
+            self.start_worker(name)
+
+        while (self.workers or self.restart_at) and not self.stopping:
+            time.sleep(MONITOR_INTERVAL_SECONDS)
+            now = time.monotonic()
+
+            for name, (process, heartbeat) in list(self.workers.items()):
+                if not process.is_alive():
+                    del self.workers[name]
+                    if process.exitcode == 0:
+                        logging.info(f"Worker for channel '{name}' finished for today.")
+                    else:
+                        logging.error(f"Worker for channel '{name}' exited with code {process.exitcode}. Restarting in {WORKER_RESTART_DELAY_SECONDS}s.")
+                        self.restart_at[name] = now + WORKER_RESTART_DELAY_SECONDS
+                    continue
+
+                started = heartbeat.value
+                if started and time.time() - started > UPLOAD_HANG_TIMEOUT_SECONDS:
+                    logging.error(f"Upload in channel '{name}' has been running for over {UPLOAD_HANG_TIMEOUT_SECONDS}s. Killing its worker.")
+                    self.stop_worker(name, process)
+                    del self.workers[name]
+                    self.restart_at[name] = now + WORKER_RESTART_DELAY_SECONDS
+
+            for name, due in list(self.restart_at.items()):
+                if now >= due and not self.stopping:
+                    del self.restart_at[name]
+                    self.start_worker(name)
+
+        self.shutdown()
+
+    def shutdown(self):
+        self.stopping = True
+        for name, (process, _) in list(self.workers.items()):
+            logging.info(f"Stopping worker for channel '{name}'...")
+            self.stop_worker(name, process)
+        self.workers.clear()
+        self.restart_at.clear()
+
+
+def run_supervisor(config_path=CHANNELS_CONFIG_FILE):
+    # Workers send their log records over this queue instead of opening the log file themselves.
+    log_queue = multiprocessing.get_context('spawn').Queue()
+    setup_logging(SUPERVISOR_LOG_FILE, log_queue=log_queue)
+    set_message_prefix("[supervisor]")
+
+    config = load_channel_config(config_path)
+    supervisor = ChannelSupervisor(config, log_queue)
+
+    def handle_stop(signum, frame):
+        logging.info(f"Received signal {signum}. Stopping all channel workers.")
+        supervisor.stopping = True
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+    supervisor.run()
+
+
+if __name__ == "__main__":
+    run_supervisor(sys.argv[1] if len(sys.argv) > 1 else CHANNELS_CONFIG_FILE)
@@ -0,0 +1,34 @@
+import subprocess
+import sys
+
+import pytest
+
+from browser_resources import uses_profile_under
+
+
+@pytest.fixture
+def start_process():
+    processes = []
+
+    def start(*arguments):
+        # A stand-in with a Firefox-like command line; only /proc/<pid>/cmdline is inspected.
+        process = subprocess.Popen([sys.executable, '-c', 'import sys; print(flush=True); sys.stdin.read()', *arguments],
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        processes.append(process)
+        process.stdout.readline() # Its command line is only the forked parent's until the exec
+        return process.pid
+
+    yield start
+    for process in processes:
+        process.communicate(b'')
+
+
+def test_only_browsers_on_this_tools_profiles_are_matched(tmp_path, start_process):
+    ours = tmp_path.resolve() / "yt-shorts-profiles"
+    (ours / "worker-1").mkdir(parents=True)
+    (tmp_path / "other-job").mkdir()
+
+    assert uses_profile_under(start_process('-marionette', '-profile', str(ours / "worker-1")), [str(ours)])
+    assert not uses_profile_under(start_process('-marionette', '-profile', str(tmp_path / "other-job")), [str(ours)])
+    assert not uses_profile_under(start_process('-marionette', '-profile', f"{ours}-2"), [str(ours)])
+    assert not uses_profile_under(start_process('-profile', str(ours / "worker-1")), [str(ours)])
@@ -0,0 +1,44 @@
+import os
+import socket
+
+import pytest
+
+from daemon_control import ControlServer, DaemonAlreadyRunning, send_control_command
+
+
+def test_second_server_refuses_a_live_socket(tmp_path):
+    socket_path = str(tmp_path / "control.sock")
+    first = ControlServer({'status': lambda: {'daemon': 'first'}}, socket_path=socket_path).start()
+    try:
+        with pytest.raises(DaemonAlreadyRunning):
+            ControlServer({'status': lambda: {'daemon': 'second'}}, socket_path=socket_path)
+        assert send_control_command('status', socket_path=socket_path) == (200, {'daemon': 'first'})
+    finally:
+        first.stop()
+    assert not os.path.exists(socket_path)
+
+
+def test_stale_socket_is_replaced(tmp_path):
+    socket_path = str(tmp_path / "control.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(socket_path) # Bound but never listening, like a socket left behind by a killed daemon
+    stale.close()
+
+    server = ControlServer({'status': lambda: {'daemon': 'new'}}, socket_path=socket_path).start()
+    try:
+        assert send_control_command('status', socket_path=socket_path) == (200, {'daemon': 'new'})
+    finally:
+        server.stop()
+
+
+def test_stop_leaves_a_replaced_socket_alone(tmp_path):
+    socket_path = str(tmp_path / "control.sock")
+    server = ControlServer({}, socket_path=socket_path).start()
+    os.remove(socket_path)
+    replacement = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    replacement.bind(socket_path)
+    try:
+        server.stop()
+        assert os.path.exists(socket_path)
+    finally:
+        replacement.close()
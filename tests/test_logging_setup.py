@@ -0,0 +1,41 @@
+import gzip
+import logging
+import multiprocessing
+
+from logging_setup import SizeAndTimeRotatingFileHandler, rotated_segments
+
+RECORDS_PER_WRITER = 3000
+
+
+def write_records(log_file, writer):
+    handler = SizeAndTimeRotatingFileHandler(log_file, max_bytes=20 * 1024, backup_count=0, compress=True)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    for i in range(RECORDS_PER_WRITER):
+        handler.handle(logging.makeLogRecord({'msg': f"writer {writer} record {i} " + 'x' * 40}))
+    handler.close()
+
+
+def read_lines(log_file):
+    lines = []
+    for path in rotated_segments(log_file) + [log_file]:
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt') as f:
+            lines.extend(f.read().splitlines())
+    return lines
+
+
+def test_two_processes_share_a_rotating_log_without_losing_records(tmp_path):
+    log_file = str(tmp_path / "shared.log")
+    context = multiprocessing.get_context('spawn')
+    writers = [context.Process(target=write_records, args=(log_file, writer)) for writer in (0, 1)]
+    for process in writers:
+        process.start()
+    for process in writers:
+        process.join(60)
+        assert process.exitcode == 0
+
+    lines = read_lines(log_file)
+    assert len(rotated_segments(log_file)) > 10
+    for writer in (0, 1):
+        assert sum(1 for line in lines if line.startswith(f"writer {writer} ")) == RECORDS_PER_WRITER
+    assert len(lines) == len(set(lines)) == 2 * RECORDS_PER_WRITER
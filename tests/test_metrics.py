@@ -0,0 +1,20 @@
+from metrics import UploadMetrics, load_records, stage_percentiles
+
+
+def test_stage_percentiles_round_trip_through_jsonl(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    sink = UploadMetrics('main', jsonl_path=str(path))
+    for seconds in range(1, 21):
+        trace = sink.trace(f"{seconds}.mp4")
+        trace.add('file_upload', float(seconds))
+        trace.finish('success')
+        sink.record(trace)
+    other = UploadMetrics('other', jsonl_path=str(path)).trace()
+    other.add('file_upload', 1000.0)
+    other.finish('success')
+    UploadMetrics('other', jsonl_path=str(path)).record(other)
+
+    percentiles = stage_percentiles(load_records(str(path), 'main'))
+
+    assert percentiles['file_upload'] == {0.5: 10.0, 0.95: 19.0}
+    assert set(percentiles) == {'file_upload', 'total'}
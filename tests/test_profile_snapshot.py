@@ -0,0 +1,88 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+from profile_snapshot import COOKIE_DB, ProfileSnapshot
+
+
+def make_profile(path):
+    path.mkdir()
+    conn = sqlite3.connect(path / COOKIE_DB)
+    conn.execute("CREATE TABLE moz_cookies (name TEXT, value TEXT)")
+    conn.execute("INSERT INTO moz_cookies VALUES ('SID', 'original')")
+    conn.commit()
+    conn.close()
+    (path / "prefs.js").write_text("// prefs\n")
+    return path
+
+
+def cookie_value(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT value FROM moz_cookies WHERE name = 'SID'").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def rotate_cookie(worker_dir):
+    conn = sqlite3.connect(os.path.join(worker_dir, COOKIE_DB))
+    conn.execute("UPDATE moz_cookies SET value = 'rotated' WHERE name = 'SID'")
+    conn.commit()
+    conn.close()
+
+
+def test_checkin_leaves_source_profile_untouched_by_default(tmp_path):
+    source = make_profile(tmp_path / "profile")
+    snapshot = ProfileSnapshot(str(source), str(tmp_path / "snapshots"))
+
+    rotate_cookie(snapshot.checkout())
+    snapshot.checkin()
+
+    assert cookie_value(source / COOKIE_DB) == 'original'
+    assert cookie_value(os.path.join(snapshot.master_dir, COOKIE_DB)) == 'rotated'
+    assert not snapshot.refresh() # The master keeps the rotated cookies
+
+
+def test_write_back_updates_unlocked_source(tmp_path):
+    source = make_profile(tmp_path / "profile")
+    snapshot = ProfileSnapshot(str(source), str(tmp_path / "snapshots"), write_back=True)
+
+    rotate_cookie(snapshot.checkout())
+    snapshot.checkin()
+
+    assert cookie_value(source / COOKIE_DB) == 'rotated'
+
+
+def test_write_back_skips_locked_source(tmp_path):
+    source = make_profile(tmp_path / "profile")
+    snapshot = ProfileSnapshot(str(source), str(tmp_path / "snapshots"), write_back=True)
+    rotate_cookie(snapshot.checkout())
+
+    # Another process (standing in for a running Firefox) holds the profile lock.
+    holder = subprocess.Popen(
+        [sys.executable, '-c',
+         "import fcntl, os, sys; fd = os.open(sys.argv[1], os.O_RDWR | os.O_CREAT); "
+         "fcntl.lockf(fd, fcntl.LOCK_EX); print('locked', flush=True); sys.stdin.read()",
+         str(source / '.parentlock')],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        assert holder.stdout.readline().strip() == 'locked'
+        snapshot.checkin()
+    finally:
+        holder.communicate('')
+
+    assert cookie_value(source / COOKIE_DB) == 'original'
+    assert cookie_value(os.path.join(snapshot.master_dir, COOKIE_DB)) == 'rotated'
+
+
+def test_discard_removes_the_process_copy(tmp_path):
+    source = make_profile(tmp_path / "profile")
+    snapshot = ProfileSnapshot(str(source), str(tmp_path / "snapshots"))
+    worker_dir = snapshot.checkout()
+
+    snapshot.discard()
+
+    assert not os.path.exists(worker_dir)
+    assert os.path.isdir(snapshot.master_dir)
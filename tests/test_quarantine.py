@@ -0,0 +1,36 @@
+from daemon_control import ControlServer, send_control_command
+from state_store import StateStore
+
+
+def test_release_quarantine(tmp_path):
+    store = StateStore(str(tmp_path / "state.db"), channel="test")
+    store.quarantine_video("7.mp4", "transient", "stalled")
+    assert store.is_quarantined("7.mp4")
+    assert [row[0] for row in store.quarantined_videos()] == ["7.mp4"]
+
+    assert store.release_quarantine("7.mp4")
+    assert not store.is_quarantined("7.mp4")
+    assert store.quarantined_videos() == []
+    assert not store.release_quarantine("7.mp4")
+
+
+def test_unquarantine_control_command(tmp_path):
+    store = StateStore(str(tmp_path / "state.db"), channel="test")
+    store.quarantine_video("7.mp4", "bad_file", "pre-flight")
+
+    def unquarantine(filenames=()):
+        if not filenames:
+            raise ValueError("Name the file(s) to release from quarantine.")
+        return {'released': [name for name in filenames if store.release_quarantine(name)]}
+
+    socket_path = str(tmp_path / "control.sock")
+    server = ControlServer({'unquarantine': unquarantine}, socket_path=socket_path).start()
+    try:
+        status, reply = send_control_command('unquarantine', socket_path=socket_path, payload={'filenames': ["7.mp4", "8.mp4"]})
+        assert (status, reply) == (200, {'released': ["7.mp4"]})
+        assert not store.is_quarantined("7.mp4")
+
+        status, reply = send_control_command('unquarantine', socket_path=socket_path)
+        assert status == 409
+    finally:
+        server.stop()
@@ -0,0 +1,34 @@
+import os
+
+from retry_policy import FAILURE_BAD_FILE, FAILURE_TRANSIENT, UploadFailure, classify_failure
+
+
+def test_missing_file_in_readable_folder_is_bad_file(tmp_path):
+    error = FileNotFoundError(2, "No such file or directory", str(tmp_path / "7.mp4"))
+    assert classify_failure(error) == FAILURE_BAD_FILE
+
+
+def test_missing_folder_is_transient(tmp_path):
+    error = FileNotFoundError(2, "No such file or directory", str(tmp_path / "unmounted" / "7.mp4"))
+    assert classify_failure(error) == FAILURE_TRANSIENT
+
+
+def test_unreadable_folder_is_transient(tmp_path):
+    folder = tmp_path / "videos"
+    folder.mkdir()
+    os.chmod(folder, 0)
+    try:
+        if os.access(folder, os.R_OK):
+            return # Running as root: permissions aren't enforced
+        error = PermissionError(13, "Permission denied", str(folder / "7.mp4"))
+        assert classify_failure(error) == FAILURE_TRANSIENT
+    finally:
+        os.chmod(folder, 0o700)
+
+
+def test_os_error_without_a_path_is_transient():
+    assert classify_failure(PermissionError(13, "Permission denied")) == FAILURE_TRANSIENT
+
+
+def test_explicit_failure_class_is_kept():
+    assert classify_failure(UploadFailure(FAILURE_BAD_FILE, "Failed the pre-flight check")) == FAILURE_BAD_FILE
@@ -0,0 +1,49 @@
+from state_store import StateStore
+from title_catalog import LEGACY_TITLE_OFFSET, TitleCatalog
+
+
+def migrated_store(tmp_path, uploaded, counter):
+    log = tmp_path / "uploaded_videos.log"
+    log.write_text(''.join(f"{number}.mp4\n" for number in uploaded))
+    counter_file = tmp_path / "channel_video_counter.txt"
+    counter_file.write_text(str(counter))
+    store = StateStore(str(tmp_path / "state.db"), channel="test")
+    store.migrate_from_files(str(log), str(counter_file), None)
+    return store
+
+
+def test_migrated_store_does_not_repeat_legacy_titles(tmp_path):
+    titles = [f"Title {i}" for i in range(50)]
+    (tmp_path / "titles.txt").write_text('\n'.join(titles) + '\n')
+    store = migrated_store(tmp_path, range(16, 43), counter=43)
+    catalog = TitleCatalog(str(tmp_path / "titles.txt"), store, no_repeat_window=30)
+
+    choice = catalog.choose(43)
+
+    legacy_recent = {titles[(n - LEGACY_TITLE_OFFSET) % len(titles)] for n in range(43 - 30, 43)}
+    assert titles[(42 - LEGACY_TITLE_OFFSET) % len(titles)] in legacy_recent
+    assert choice.text not in legacy_recent
+
+
+def test_backfill_covers_all_untitled_uploads_and_is_idempotent(tmp_path):
+    titles = [f"Title {i}" for i in range(100)]
+    (tmp_path / "titles.txt").write_text('\n'.join(titles) + '\n')
+    store = migrated_store(tmp_path, range(0, 45), counter=45)
+    catalog = TitleCatalog(str(tmp_path / "titles.txt"), store, no_repeat_window=10)
+
+    catalog.choose(45)
+    assert store.assigned_channel_numbers() == set(range(0, 45))
+    catalog.backfill_assignments()
+    assert len(store.used_title_ids()) == 45
+
+
+def test_recorded_title_is_not_chosen_again(tmp_path):
+    (tmp_path / "titles.txt").write_text("Alpha\nBeta\n")
+    store = StateStore(str(tmp_path / "state.db"), channel="test")
+    catalog = TitleCatalog(str(tmp_path / "titles.txt"), store, no_repeat_window=1)
+
+    first = catalog.choose(1)
+    store.record_upload("1.mp4", 1, f"{first.text} | #Shorts 1", "2026-01-01", title_choice=first)
+    catalog.mark_used(first)
+
+    assert catalog.choose(2).text != first.text
@@ -0,0 +1,209 @@
+import hashlib
+import logging
+import os
+import random
+import re
+import time
+from collections import namedtuple
+
+from state_store import CHANNEL_NUMBER_COUNTER
+
+YOUTUBE_TITLE_MAX_LENGTH = 100
+TITLE_SUFFIX_RESERVE = len(" | #Shorts ") + 7 # Room left for the Shorts number appended to every base title
+INVALID_TITLE_CHARACTERS = re.compile('[<>]') # Rejected by YouTube
+TITLE_SUFFIX_SEPARATOR = " | #Shorts "
+LEGACY_TITLE_OFFSET = 42 # Before the catalogue, video number n got line (n - 42) % len(lines) of the titles file
+LEGACY_FILENAME_PREFIX = "legacy:#" # Stands in for the unknown filename of a backfilled legacy upload
+
+Title = namedtuple('Title', ['title_id', 'text'])
+
+
+def title_id(text):
+    """Stable id of a title: its hash after collapsing whitespace and case, so it survives reordering and edits elsewhere in the file."""
+    return _normalized_id(' '.join(text.split()))
+
+
+def _normalized_id(text):
+    return hashlib.blake2b(text.casefold().encode('utf-8'), digest_size=8).hexdigest()
+
+
+def parse_titles(lines, known_ids=None):
+    """
+    Validates title lines. Returns (titles, skipped) where `skipped` counts lines
+    dropped per reason ('duplicate', 'too_long', 'invalid_characters').
+    `known_ids` maps already hashed titles to their ids, so a reload only hashes new lines.
+    """
+    titles, seen = [], set()
+    skipped = {'duplicate': 0, 'too_long': 0, 'invalid_characters': 0}
+    known_ids = known_ids or {}
+    max_length = YOUTUBE_TITLE_MAX_LENGTH - TITLE_SUFFIX_RESERVE
+    for line in lines:
+        text = ' '.join(line.split())
+        if not text:
+            continue
+        if INVALID_TITLE_CHARACTERS.search(text):
+            skipped['invalid_characters'] += 1
+            continue
+        if len(text) > max_length:
+            skipped['too_long'] += 1
+            continue
+        key = known_ids.get(text) or _normalized_id(text)
+        if key in seen:
+            skipped['duplicate'] += 1
+            continue
+        seen.add(key)
+        titles.append(Title(key, text))
+    return titles, skipped
+
+
+class TitleCatalog:
+    """
+    Titles from a titles file, loaded once and reloaded only when the file's
+    size or mtime changes, with a rotation that doesn't repeat titles.
+
+    Titles are keyed by a content hash, so adding, removing or reordering lines
+    doesn't change which titles count as used. Every upload's title is recorded
+    in the state store. Selection prefers titles that were never used, in file
+    order, so new lines are picked up first. Once every title has been used, it
+    picks at random among titles not used in the last `no_repeat_window`
+    assignments, or the least recently used one if the pool is smaller than
+    that window. The random pick is seeded by the channel number, so a retry
+    of the same upload (or a dry-run preview) gets the same title.
+
+    The cost of picking a title doesn't grow with the pool: never-used titles
+    are found with a cursor, and the random pick only checks the recent window.
+    """
+
+    def __init__(self, path, store, no_repeat_window=30):
+        """
+        Args:
+            path (str): Titles file, one title per line.
+            store (StateStore): Records title assignments (per channel).
+            no_repeat_window (int): Assignments within which a title is not reused.
+        """
+        self.path = path
+        self.store = store
+        self.no_repeat_window = no_repeat_window
+        self.titles = []
+        self.file_signature = None
+        self.used_ids = None
+        self.cursor = 0 # Titles before this index are all used
+
+    # --- Loading ---
+
+    def refresh(self):
+        """Reloads the file if it changed since the last load. Returns the current titles."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            if self.file_signature != 'missing':
+                logging.error(f"Titles file not found: {self.path}")
+            self.file_signature = 'missing'
+            self.titles = []
+            return self.titles
+        signature = (st.st_size, st.st_mtime_ns)
+        if signature == self.file_signature:
+            return self.titles
+
+        start = time.monotonic()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                titles, skipped = parse_titles(f, {title.text: title.title_id for title in self.titles})
+        except (OSError, UnicodeDecodeError) as e:
+            logging.error(f"Error reading titles from '{self.path}': {e}")
+            return self.titles
+        self.titles = titles
+        self.file_signature = signature
+        self.cursor = 0
+        dropped = ', '.join(f"{count} {reason.replace('_', ' ')}" for reason, count in skipped.items() if count)
+        logging.info(f"Loaded {len(titles)} titles from '{self.path}' in {time.monotonic() - start:.2f}s"
+                     f"{f' (skipped: {dropped})' if dropped else ''}.")
+        if not titles:
+            logging.warning(f"Titles file '{self.path}' is empty or contains no valid titles.")
+        return self.titles
+
+    def _load_usage(self):
+        if self.used_ids is None:
+            self.backfill_assignments()
+            self.used_ids = set(self.store.used_title_ids())
+
+    def backfill_assignments(self):
+        """
+        Records title assignments for uploads made before titles were tracked:
+        from their stored titles where there is one, and otherwise (uploads
+        imported from the legacy log) by replaying the old rotation for the
+        channel numbers below the counter.
+        """
+        rows = []
+        for filename, channel_number, title, uploaded_at in self.store.uploads_missing_title_assignment():
+            base_title = title.split(TITLE_SUFFIX_SEPARATOR, 1)[0]
+            rows.append((filename, channel_number, title_id(base_title), base_title, uploaded_at))
+        if rows:
+            self.store.save_title_assignments(rows)
+            logging.info(f"Recorded titles of {len(rows)} earlier upload(s) in the title history.")
+
+        counter = self.store.get_counter(CHANNEL_NUMBER_COUNTER, None)
+        lines = self.legacy_titles() if counter is not None else []
+        if not lines:
+            return
+        assigned = self.store.assigned_channel_numbers()
+        count = max(self.store.untitled_upload_count(), self.no_repeat_window)
+        rows = []
+        for number in range(max(0, counter - count), counter):
+            if number in assigned:
+                continue
+            text = ' '.join(lines[(number - LEGACY_TITLE_OFFSET) % len(lines)].split())
+            # The real upload times are unknown; the channel number keeps them in order and older than any tracked upload.
+            rows.append((f"{LEGACY_FILENAME_PREFIX}{number}", number, title_id(text), text, float(number)))
+        if rows:
+            self.store.save_title_assignments(rows)
+            logging.info(f"Recorded the legacy titles of channel videos #{rows[0][1]}-#{rows[-1][1]} in the title history.")
+
+    def legacy_titles(self):
+        """The titles file's lines as the pre-catalogue code read them: stripped, blank lines dropped, nothing else."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return [line.strip() for line in f if line.strip()]
+        except (OSError, UnicodeDecodeError):
+            return []
+
+    # --- Selection ---
+
+    def choose(self, channel_number, reserved=()):
+        """
+        Returns the Title for the upload that will get `channel_number`, or None
+        if there are no titles. Ids in `reserved` are treated as taken (for
+        previewing several upcoming uploads at once).
+        """
+        titles = self.refresh()
+        if not titles:
+            return None
+        self._load_usage()
+        reserved = set(reserved)
+
+        while self.cursor < len(titles) and titles[self.cursor].title_id in self.used_ids:
+            self.cursor += 1
+        for index in range(self.cursor, len(titles)):
+            title = titles[index]
+            if title.title_id not in self.used_ids and title.title_id not in reserved:
+                return title
+
+        recent = set(self.store.recent_title_ids(self.no_repeat_window)) | reserved
+        if len(recent) < len(titles):
+            rng = random.Random(f"{self.store.channel}:{channel_number}")
+            for _ in range(64):
+                title = titles[rng.randrange(len(titles))]
+                if title.title_id not in recent:
+                    return title
+            candidates = [title for title in titles if title.title_id not in recent]
+            return candidates[rng.randrange(len(candidates))]
+
+        # The pool is smaller than the window: fall back to the least recently used title.
+        last_used = self.store.title_last_used()
+        available = [title for title in titles if title.title_id not in reserved] or titles
+        return min(available, key=lambda title: last_used.get(title.title_id, 0.0))
+
+    def mark_used(self, title):
+        """Notes an assignment the caller has recorded in the store (via StateStore.record_upload)."""
+        if self.used_ids is not None:
+            self.used_ids.add(title.title_id)
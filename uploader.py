@@ -0,0 +1,93 @@
+import random
+import time
+
+from retry_policy import FAILURE_AUTH, FAILURE_BAD_FILE, FAILURE_LAYOUT, FAILURE_TRANSIENT, UploadFailure
+
+# Stages a backend reports through the trace, in the order the Studio flow runs them.
+UPLOAD_STAGES = ('open_dialog', 'file_select', 'title_entry', 'file_transfer', 'next_steps', 'checks', 'publish')
+
+
+class UploaderBackend:
+    """
+    Drives one video through YouTube Studio (or a stand-in for it).
+
+    `upload` either returns normally once the video is published (or scheduled)
+    or raises; an UploadFailure carries its failure class, anything else is
+    classified by the caller. `release` is always called after an attempt that
+    reached `upload`, and `close` when the process is done uploading or going
+    idle. Uploads between `begin_batch` and `end_batch` belong to one batch,
+    which a backend may use to skip per-video setup.
+    """
+
+    name = None
+
+    def upload(self, video_path, title, trace, publish_at=None):
+        """
+        Uploads `video_path` with `title`, timing each stage with `trace.span`.
+        With `publish_at` (UTC epoch seconds) the video is scheduled to go public
+        at that time instead of being published immediately.
+        """
+        raise NotImplementedError
+
+    def release(self, upload_successful):
+        pass
+
+    def begin_batch(self):
+        pass
+
+    def end_batch(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeUploader(UploaderBackend):
+    """
+    In-process stand-in for YouTube Studio, for benchmarks and dry runs.
+
+    Each stage sleeps for a random duration in its configured (min, max)
+    range and attempts fail with probability `failure_rate`, raising an
+    UploadFailure whose class is drawn from `failure_weights`. Nothing leaves
+    the machine; published videos are only appended to `uploaded` as
+    (path, title, publish_at) tuples.
+    """
+
+    name = 'fake'
+
+    def __init__(self, stage_latency=None, failure_rate=0.0, failure_weights=None, rng=None, sleep=time.sleep):
+        """
+        Args:
+            stage_latency (dict): stage -> (min_seconds, max_seconds). Missing stages take no time.
+            failure_rate (float): Probability in [0, 1] that an attempt fails.
+            failure_weights (dict): failure class -> relative weight of injected failures.
+            rng (random.Random): Source of randomness, seeded for reproducible runs.
+            sleep (callable): Used to simulate latency; pass a no-op to measure pure overhead.
+        """
+        self.stage_latency = stage_latency or {}
+        self.failure_rate = failure_rate
+        self.failure_weights = failure_weights or {
+            FAILURE_TRANSIENT: 6, FAILURE_LAYOUT: 2, FAILURE_AUTH: 1, FAILURE_BAD_FILE: 1,
+        }
+        self.rng = rng or random.Random()
+        self.sleep = sleep
+        self.attempts = 0
+        self.uploaded = []
+
+    def upload(self, video_path, title, trace, publish_at=None):
+        self.attempts += 1
+        # Pick the failing stage up front so a failure costs the latency of the stages before it.
+        failing_stage = None
+        if self.rng.random() < self.failure_rate:
+            failing_stage = self.rng.choice(UPLOAD_STAGES)
+
+        for stage in UPLOAD_STAGES:
+            with trace.span(stage):
+                low, high = self.stage_latency.get(stage, (0, 0))
+                if high > 0:
+                    self.sleep(self.rng.uniform(low, high))
+                if stage == failing_stage:
+                    classes, weights = zip(*self.failure_weights.items())
+                    category = self.rng.choices(classes, weights)[0]
+                    raise UploadFailure(category, f"Injected {category} failure during '{stage}'.")
+        self.uploaded.append((video_path, title, publish_at))
@@ -0,0 +1,304 @@
+import bisect
+import logging
+import os
+import re
+import select
+import struct
+import sys
+import threading
+from collections import namedtuple
+
+VIDEO_FILE_PATTERN = re.compile(r'(\d+)\.(mp4|mov|avi|webm)$', re.IGNORECASE)
+
+VideoEntry = namedtuple('VideoEntry', ['number', 'filename', 'path', 'size', 'mtime'])
+
+# inotify(7) event masks
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT_HEADER = struct.Struct('iIII')
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+
+
+def parse_video_filename(filename, min_number):
+    """Returns the video number for an eligible '<number>.<ext>' filename, or None."""
+    match = VIDEO_FILE_PATTERN.match(filename)
+    if not match:
+        return None
+    number = int(match.group(1))
+    return number if number >= min_number else None
+
+
+def load_libc_inotify():
+    """Returns libc if it exposes inotify (Linux), otherwise None."""
+    if not sys.platform.startswith('linux'):
+        return None
+    # ctypes (and ctypes.util's subprocess) is only loaded once a watch is started, not for every index lookup.
+    import ctypes
+    import ctypes.util
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, 'inotify_init1') or not hasattr(libc, 'inotify_add_watch'):
+        return None
+    return libc
+
+
+class VideoIndex:
+    """
+    Sorted, incrementally maintained index of the eligible videos in a folder.
+
+    The index is built once with `os.scandir` (or loaded from the state store when
+    the folder hasn't changed since the last run) and then kept current by an
+    inotify watch, falling back to polling the folder's mtime where inotify isn't
+    available. `next_pending` walks forward from a cursor past entries already
+    known to be uploaded, so finding the next video never rescans the folder.
+    """
+
+    def __init__(self, folder, store=None, min_number=4, poll_interval=30):
+        """
+        Args:
+            folder (str): Folder containing the rendered '<number>.<ext>' videos.
+            store (StateStore): Optional store used to persist the index between runs.
+            min_number (int): Lowest video number eligible for upload.
+            poll_interval (int): Seconds between folder checks when inotify is unavailable.
+        """
+        self.folder = folder
+        self.store = store
+        self.min_number = min_number
+        self.poll_interval = poll_interval
+        self.lock = threading.RLock()
+        self.keys = []      # Sorted (number, filename) tuples, parallel to `entries`
+        self.entries = []
+        self.cursor = 0     # Every entry before the cursor is known to be uploaded
+        self.dir_mtime_ns = None
+        self.stop_event = threading.Event()
+        self.watch_thread = None
+
+    # --- Building ---
+
+    def load(self):
+        """Loads the index from the store if the folder is unchanged, otherwise rescans it."""
+        try:
+            dir_mtime_ns = os.stat(self.folder).st_mtime_ns
+        except OSError as e:
+            logging.error(f"Video folder '{self.folder}' is not accessible: {e}")
+            self._replace([], None)
+            return self
+
+        if self.store is not None and self.store.get_video_index_mtime(self.folder) == dir_mtime_ns:
+            entries = [
+                VideoEntry(number, filename, os.path.join(self.folder, filename), size, mtime)
+                for number, filename, size, mtime in self.store.load_video_index(self.folder)
+            ]
+            self._replace(entries, dir_mtime_ns)
+            logging.info(f"Loaded video index for '{self.folder}' from state store ({len(entries)} files).")
+        else:
+            self.rescan()
+        return self
+
+    def rescan(self):
+        """Rebuilds the index with a single `os.scandir` pass over the folder."""
+        entries = []
+        try:
+            dir_mtime_ns = os.stat(self.folder).st_mtime_ns
+            with os.scandir(self.folder) as it:
+                for dir_entry in it:
+                    number = parse_video_filename(dir_entry.name, self.min_number)
+                    if number is None or not dir_entry.is_file():
+                        continue
+                    st = dir_entry.stat()
+                    entries.append(VideoEntry(number, dir_entry.name, dir_entry.path, st.st_size, st.st_mtime))
+        except OSError as e:
+            logging.error(f"Could not scan video folder '{self.folder}': {e}")
+            return
+        self._replace(entries, dir_mtime_ns)
+        if self.store is not None:
+            self.store.save_video_index(self.folder, [(e.number, e.filename, e.size, e.mtime) for e in entries], dir_mtime_ns)
+        logging.info(f"Indexed {len(entries)} eligible video files in '{self.folder}'.")
+
+    def _replace(self, entries, dir_mtime_ns):
+        entries.sort(key=lambda e: (e.number, e.filename))
+        with self.lock:
+            self.entries = entries
+            self.keys = [(e.number, e.filename) for e in entries]
+            self.cursor = 0
+            self.dir_mtime_ns = dir_mtime_ns
+
+    # --- Incremental updates ---
+
+    def add_or_update(self, filename):
+        """Indexes (or refreshes) a single file by name. Non-video files are ignored."""
+        number = parse_video_filename(filename, self.min_number)
+        if number is None:
+            return
+        path = os.path.join(self.folder, filename)
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.remove(filename)
+            return
+        entry = VideoEntry(number, filename, path, st.st_size, st.st_mtime)
+        key = (number, filename)
+        with self.lock:
+            i = bisect.bisect_left(self.keys, key)
+            if i < len(self.keys) and self.keys[i] == key:
+                self.entries[i] = entry
+            else:
+                self.keys.insert(i, key)
+                self.entries.insert(i, entry)
+                if i < self.cursor:
+                    self.cursor = i
+        if self.store is not None:
+            self.store.upsert_video_file(self.folder, number, filename, entry.size, entry.mtime)
+
+    def remove(self, filename):
+        """Drops a file from the index."""
+        number = parse_video_filename(filename, self.min_number)
+        if number is None:
+            return
+        key = (number, filename)
+        with self.lock:
+            i = bisect.bisect_left(self.keys, key)
+            if i < len(self.keys) and self.keys[i] == key:
+                del self.keys[i]
+                del self.entries[i]
+                if i < self.cursor:
+                    self.cursor -= 1
+        if self.store is not None:
+            self.store.delete_video_file(self.folder, filename)
+
+    def _record_dir_mtime(self):
+        try:
+            dir_mtime_ns = os.stat(self.folder).st_mtime_ns
+        except OSError:
+            return
+        with self.lock:
+            self.dir_mtime_ns = dir_mtime_ns
+        if self.store is not None:
+            self.store.set_video_index_mtime(self.folder, dir_mtime_ns)
+
+    # --- Queries ---
+
+    def __len__(self):
+        return len(self.entries)
+
+    def next_pending(self, is_uploaded, is_eligible=None):
+        """
+        Returns the lowest-numbered entry that isn't uploaded (and passes
+        `is_eligible`, if given), or None if there is nothing left to upload.
+
+        Args:
+            is_uploaded (callable): Called with a filename; True if already uploaded.
+            is_eligible (callable): Optional extra filter called with a VideoEntry.
+        """
+        with self.lock:
+            i = self.cursor
+            advancing = True
+            while i < len(self.entries):
+                entry = self.entries[i]
+                if is_uploaded(entry.filename):
+                    if advancing:
+                        self.cursor = i + 1
+                elif is_eligible is None or is_eligible(entry):
+                    return entry
+                else:
+                    advancing = False
+                i += 1
+        return None
+
+    def pending(self, is_uploaded, limit, is_eligible=None):
+        """Returns up to `limit` pending entries in upload order."""
+        result = []
+        with self.lock:
+            for entry in self.entries[self.cursor:]:
+                if len(result) >= limit:
+                    break
+                if not is_uploaded(entry.filename) and (is_eligible is None or is_eligible(entry)):
+                    result.append(entry)
+        return result
+
+    # --- Change notification ---
+
+    def start_watching(self):
+        """Starts a background thread that keeps the index current (inotify, or polling as a fallback)."""
+        if self.watch_thread is not None:
+            return
+        self.stop_event.clear()
+        libc = load_libc_inotify()
+        target = self._inotify_loop if libc is not None else self._poll_loop
+        self.watch_thread = threading.Thread(target=target, args=(libc,) if libc else (), name="video-index-watch", daemon=True)
+        self.watch_thread.start()
+
+    def stop_watching(self):
+        self.stop_event.set()
+        if self.watch_thread is not None:
+            self.watch_thread.join(timeout=5)
+            self.watch_thread = None
+
+    def _poll_loop(self):
+        logging.info(f"Watching '{self.folder}' for changes by polling every {self.poll_interval}s.")
+        while not self.stop_event.wait(self.poll_interval):
+            try:
+                dir_mtime_ns = os.stat(self.folder).st_mtime_ns
+            except OSError:
+                continue
+            if dir_mtime_ns != self.dir_mtime_ns:
+                self.rescan()
+
+    def _inotify_loop(self, libc):
+        fd = libc.inotify_init1(IN_CLOEXEC)
+        if fd < 0 or libc.inotify_add_watch(fd, os.fsencode(self.folder), WATCH_MASK) < 0:
+            import ctypes
+            logging.warning(f"inotify watch on '{self.folder}' failed (errno {ctypes.get_errno()}). Falling back to polling.")
+            if fd >= 0:
+                os.close(fd)
+            self._poll_loop()
+            return
+
+        logging.info(f"Watching '{self.folder}' for changes with inotify.")
+        # Catch anything that changed between the initial scan and the watch being set up.
+        if os.stat(self.folder).st_mtime_ns != self.dir_mtime_ns:
+            self.rescan()
+        try:
+            while not self.stop_event.is_set():
+                readable, _, _ = select.select([fd], [], [], 1.0)
+                if not readable:
+                    continue
+                buf = os.read(fd, 64 * 1024)
+                if self._handle_inotify_events(buf):
+                    logging.warning(f"Lost inotify watch on '{self.folder}'. Falling back to polling.")
+                    break
+                self._record_dir_mtime()
+        finally:
+            os.close(fd)
+        if not self.stop_event.is_set():
+            self._poll_loop()
+
+    def _handle_inotify_events(self, buf):
+        """Applies a buffer of inotify events. Returns True if the watch itself went away."""
+        offset = 0
+        while offset + INOTIFY_EVENT_HEADER.size <= len(buf):
+            _, mask, _, name_len = INOTIFY_EVENT_HEADER.unpack_from(buf, offset)
+            offset += INOTIFY_EVENT_HEADER.size
+            name = os.fsdecode(buf[offset:offset + name_len].rstrip(b'\0'))
+            offset += name_len
+
+            if mask & IN_Q_OVERFLOW:
+                logging.warning("inotify queue overflowed. Rescanning video folder.")
+                self.rescan()
+            elif mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                return True
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self.remove(name)
+            elif mask & (IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO):
+                self.add_or_update(name)
+        return False
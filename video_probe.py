@@ -0,0 +1,138 @@
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+# Containers whose headers we can parse. Other formats are passed through unprobed.
+PROBEABLE_EXTENSIONS = ('.mp4', '.mov', '.m4v')
+
+ProbeResult = namedtuple('ProbeResult', ['duration', 'width', 'height', 'codec', 'error'])
+
+CONTAINER_BOXES = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+
+
+class ProbeError(Exception):
+    """Raised when a file's container headers are missing or malformed."""
+
+
+def iter_boxes(buf, start, end):
+    """Yields (type, payload_start, box_end) for the ISO-BMFF boxes in buf[start:end]."""
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', buf, offset)
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                raise ProbeError("Truncated 64-bit box header.")
+            size = struct.unpack_from('>Q', buf, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            raise ProbeError(f"Box '{box_type.decode('latin-1')}' at offset {offset} runs past the end of the file.")
+        yield box_type, offset + header, offset + size
+        offset += size
+
+
+def find_box(buf, start, end, box_type):
+    for found_type, payload, box_end in iter_boxes(buf, start, end):
+        if found_type == box_type:
+            return payload, box_end
+    return None
+
+
+def parse_mvhd(buf, payload):
+    """Returns the movie duration in seconds from an mvhd payload."""
+    version = buf[payload]
+    if version == 1:
+        timescale, duration = struct.unpack_from('>IQ', buf, payload + 20)
+    else:
+        timescale, duration = struct.unpack_from('>II', buf, payload + 12)
+    if not timescale:
+        raise ProbeError("mvhd has a zero timescale.")
+    return duration / timescale
+
+
+def parse_tkhd(buf, payload, box_end):
+    """Returns the (width, height) a track is displayed at, accounting for 90/270 degree rotation."""
+    version = buf[payload]
+    matrix_offset = payload + (52 if version == 1 else 40)
+    a, b = struct.unpack_from('>ii', buf, matrix_offset)
+    width, height = struct.unpack_from('>II', buf, box_end - 8)
+    width, height = width >> 16, height >> 16
+    # A matrix with a == 0 and b != 0 rotates the frame by 90 or 270 degrees.
+    if a == 0 and b != 0:
+        width, height = height, width
+    return width, height
+
+
+def parse_track(buf, payload, end):
+    """Returns (handler_type, width, height, codec) for a trak box."""
+    tkhd = find_box(buf, payload, end, b'tkhd')
+    mdia = find_box(buf, payload, end, b'mdia')
+    if tkhd is None or mdia is None:
+        return None, 0, 0, None
+    width, height = parse_tkhd(buf, *tkhd)
+
+    hdlr = find_box(buf, mdia[0], mdia[1], b'hdlr')
+    handler = bytes(buf[hdlr[0] + 8:hdlr[0] + 12]) if hdlr else None
+
+    codec = None
+    minf = find_box(buf, mdia[0], mdia[1], b'minf')
+    stbl = find_box(buf, minf[0], minf[1], b'stbl') if minf else None
+    stsd = find_box(buf, stbl[0], stbl[1], b'stsd') if stbl else None
+    if stsd and stsd[0] + 16 <= stsd[1]:
+        codec = bytes(buf[stsd[0] + 12:stsd[0] + 16]).decode('latin-1')
+    return handler, width, height, codec
+
+
+def probe_video(path):
+    """
+    Reads duration, resolution and video codec from an MP4/MOV file's moov box.
+
+    The file is memory-mapped, so only the header pages are actually read. Files in
+    formats we can't parse are returned with every field None and no error.
+
+    Returns:
+        ProbeResult: `error` is set (and the other fields may be None) if the
+        container is broken.
+    """
+    if not path.lower().endswith(PROBEABLE_EXTENSIONS):
+        return ProbeResult(None, None, None, None, None)
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < 8:
+                raise ProbeError("File is too small to be a video.")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                moov = find_box(buf, 0, len(buf), b'moov')
+                if moov is None:
+                    raise ProbeError("No moov box found (incomplete or corrupt file).")
+                mvhd = find_box(buf, moov[0], moov[1], b'mvhd')
+                if mvhd is None:
+                    raise ProbeError("No mvhd box in moov.")
+                duration = parse_mvhd(buf, mvhd[0])
+
+                for box_type, payload, box_end in iter_boxes(buf, moov[0], moov[1]):
+                    if box_type != b'trak':
+                        continue
+                    handler, width, height, codec = parse_track(buf, payload, box_end)
+                    if handler == b'vide':
+                        return ProbeResult(duration, width, height, codec, None)
+                raise ProbeError("No video track found.")
+    except (ProbeError, OSError, ValueError, struct.error) as e:
+        return ProbeResult(None, None, None, None, str(e) or e.__class__.__name__)
+
+
+def check_short_eligibility(result, max_duration, allow_landscape=False):
+    """Returns None if a probed file qualifies as a Short, otherwise the reason it doesn't."""
+    if result.error:
+        return f"Unreadable video: {result.error}"
+    if result.duration is None:
+        return None # Not a container we can probe; let Studio decide.
+    if result.duration <= 0:
+        return "Video has zero duration."
+    if result.duration > max_duration:
+        return f"Video is {result.duration:.1f}s long (Shorts limit is {max_duration}s)."
+    if not allow_landscape and result.width > result.height:
+        return f"Video is landscape ({result.width}x{result.height}); Shorts must be vertical or square."
+    return None